@@ -1,79 +1,255 @@
 from __future__ import annotations
 
 import os
-import logging
+import json
+import uuid
 from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
 
-from flask import Flask, flash, redirect, render_template, request, url_for
+from flask import (
+    Flask,
+    Response,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+    url_for,
+)
 
+from .core.catalog import GameCatalog
+from .core.engine_pool import EnginePool
 from .core.game_engine import GameEngine
+from .models.db_models import StaleStateError, slot_key
+from .models.persistence import SlotBusyError, SlotLeases, delete_slot, rename_slot
+from .utils.metrics import REGISTRY, configure_logging
 
 
 BASE_DIR = Path(__file__).resolve().parent
-CONFIG_PATH = BASE_DIR / "configs" / "5d_spacetime_romance.yaml"
-DB_PATH = BASE_DIR / "game_state.db"
+CONFIG_DIR = Path(os.getenv("ADVENTURE_CONFIG_DIR", BASE_DIR / "configs"))
+# The game new sessions start in; every config in CONFIG_DIR can be picked.
+CONFIG_PATH = Path(
+    os.getenv("ADVENTURE_CONFIG", BASE_DIR / "configs" / "5d_spacetime_romance.yaml")
+)
+DB_PATH = Path(os.getenv("ADVENTURE_DB", BASE_DIR / "game_state.db"))
+PROVIDER_OVERRIDE = os.getenv("ADVENTURE_PROVIDER")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# "json" emits one JSON object per log line, including per-turn timing events.
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
 
-logging.basicConfig(level=LOG_LEVEL)
+configure_logging(LOG_LEVEL, json_logs=LOG_FORMAT == "json")
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret")
 
-_engine: GameEngine | None = None
+POOL_MAX_SIZE = int(os.getenv("ADVENTURE_POOL_SIZE", "256"))
+POOL_TTL_SECONDS = float(os.getenv("ADVENTURE_POOL_TTL", "1800"))
+POOL_MAX_BYTES = int(os.getenv("ADVENTURE_POOL_MAX_BYTES", "0")) or None
+HISTORY_MAX_LIMIT = 100
+# Set when several worker processes share DB_PATH: turns on a slot are then
+# serialized through database leases of this many seconds.
+SLOT_LEASE_SECONDS = float(os.getenv("ADVENTURE_SLOT_LEASE_SECONDS", "0"))
+SLOT_WAIT_SECONDS = float(os.getenv("ADVENTURE_SLOT_WAIT_SECONDS", "30"))
 
 
-def get_engine() -> GameEngine:
-    global _engine
-    if _engine is None:
-        provider_override = os.getenv("ADVENTURE_PROVIDER")
-        _engine = GameEngine(
-            config_path=CONFIG_PATH,
-            db_path=DB_PATH,
-            provider=provider_override,
-        )
-    return _engine
+# Prewarm workers make paid model calls, so none start at import: each game's
+# starts with its first engine, or all of them from the ASGI startup hook.
+catalog = GameCatalog(
+    CONFIG_DIR, db_path=DB_PATH, default_config=CONFIG_PATH, provider=PROVIDER_OVERRIDE
+)
+
+
+def _build_engine(key: str) -> GameEngine:
+    game_name, _, slot = key.rpartition(":")
+    return catalog.build_engine(game_name, slot)
+
+
+engine_pool = EnginePool(
+    _build_engine,
+    max_size=POOL_MAX_SIZE,
+    ttl_seconds=POOL_TTL_SECONDS,
+    max_bytes=POOL_MAX_BYTES,
+    leases=(
+        SlotLeases(DB_PATH, ttl_seconds=SLOT_LEASE_SECONDS, wait_seconds=SLOT_WAIT_SECONDS)
+        if SLOT_LEASE_SECONDS > 0
+        else None
+    ),
+)
+
+REGISTRY.gauge(
+    "adventure_engine_pool_engines",
+    "Live engines held in the pool.",
+    lambda: engine_pool.stats()["engines"],
+)
+REGISTRY.gauge(
+    "adventure_engine_pool_bytes",
+    "Estimated memory held by pooled engines.",
+    lambda: engine_pool.stats()["bytes"],
+)
+REGISTRY.gauge(
+    "adventure_prewarm_ready",
+    "Prewarmed game bundles waiting to be claimed, across games.",
+    catalog.prewarm_ready,
+)
+
+
+def current_slot() -> str:
+    """Engine pool key of this session: its chosen game and player slot."""
+    slot = session.get("slot")
+    if slot is None:
+        slot = session["slot"] = uuid.uuid4().hex
+    game_name = session.get("game")
+    if game_name is None or not catalog.has(game_name):
+        if game_name is None:
+            # Saves from before the catalog were stored under the bare slot.
+            rename_slot(DB_PATH, slot, slot_key(catalog.default_game, slot))
+        game_name = session["game"] = catalog.default_game
+    return slot_key(game_name, slot)
 
 
 @app.route("/", methods=["GET", "POST"])
 def game() -> str:
-    engine = get_engine()
     narration = None
-    if request.method == "POST":
-        player_input = request.form.get("player_input", "").strip()
-        if not player_input:
-            flash("Please enter an action.", "warning")
-            return redirect(url_for("game"))
-        try:
-            result = engine.process_turn(player_input)
-            narration = result["narration"]
-        except ValueError as exc:
-            flash(str(exc), "warning")
-            return redirect(url_for("game"))
-        except RuntimeError as exc:
-            flash(str(exc), "danger")
-            return redirect(url_for("game"))
-
-    ui_state = engine.get_ui_state()
+    with engine_pool.lease(current_slot()) as engine:
+        if request.method == "POST":
+            player_input = request.form.get("player_input", "").strip()
+            if not player_input:
+                flash("Please enter an action.", "warning")
+                return redirect(url_for("game"))
+            try:
+                result = engine.process_turn(player_input)
+                narration = result["narration"]
+            except ValueError as exc:
+                flash(str(exc), "warning")
+                return redirect(url_for("game"))
+            except StaleStateError:
+                # Let the pool drop this engine and answer 409.
+                raise
+            except RuntimeError as exc:
+                flash(str(exc), "danger")
+                return redirect(url_for("game"))
+
+        ui_state = engine.get_ui_state()
     if narration is None and ui_state["log"]:
-        narration = ui_state["log"][-1]["narrator"]
+        narration = ui_state["log"][-1].narrator
 
     return render_template(
         "game.html",
+        games=catalog.games(),
+        current_game=session["game"],
         narration=narration,
         stats=ui_state["stats"],
         inventory=ui_state["inventory"],
         npc_rel=ui_state["npc_rel"],
         world_state=ui_state["world_state"],
         log=ui_state["log"],
+        log_before=ui_state["log_before"],
         summary=ui_state["summary"],
         tokens=ui_state["tokens"],
+        cached_tokens=ui_state["cached_tokens"],
+        context=ui_state["context"],
+    )
+
+
+@app.route("/games", methods=["GET"])
+def games() -> Response:
+    """The scenarios this server can run."""
+    return jsonify(
+        {
+            "games": [
+                {"name": info.name, "genre": info.genre, "language": info.language}
+                for info in catalog.games()
+            ],
+            "default": catalog.default_game,
+            "current": session.get("game", catalog.default_game),
+        }
+    )
+
+
+@app.route("/games/select", methods=["POST"])
+def select_game() -> Response:
+    """Switch this session to another scenario; each game keeps its own save."""
+    game_name = request.form.get("game", "")
+    if not catalog.has(game_name):
+        flash(f"Unknown game '{game_name}'.", "warning")
+        return redirect(url_for("game"))
+    current_slot()  # settles the slot, adopting a pre-catalog save, before switching
+    session["game"] = game_name
+    return redirect(url_for("game"))
+
+
+@app.route("/turn/stream", methods=["POST"])
+def turn_stream() -> Response:
+    """Run a turn and stream the narration as server-sent events."""
+    slot = current_slot()
+    player_input = request.form.get("player_input", "").strip()
+
+    def events() -> Iterator[str]:
+        if not player_input:
+            yield _sse("error", {"message": "Please enter an action."})
+            return
+        try:
+            with engine_pool.lease(slot) as engine:
+                for event in engine.process_turn_stream(player_input):
+                    if event["event"] == "narration":
+                        yield _sse("narration", {"text": event["text"]})
+                    else:
+                        yield _sse(
+                            "done",
+                            {
+                                "narration": event["narration"],
+                                "world_state": event["state"].world_state,
+                            },
+                        )
+        except (ValueError, RuntimeError) as exc:
+            yield _sse("error", {"message": str(exc)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/history", methods=["GET"])
+def history() -> Response:
+    """Page backwards through the turn log: ``/history?before=<turn>&limit=<n>``."""
+    before = request.args.get("before", type=int)
+    limit = min(max(request.args.get("limit", 20, type=int), 1), HISTORY_MAX_LIMIT)
+    with engine_pool.lease(current_slot()) as engine:
+        entries = engine.history(before=before, limit=limit)
+    return jsonify(
+        {
+            "entries": [entry.to_dict() for entry in entries],
+            "before": entries[0].turn if entries and entries[0].turn > 0 else None,
+        }
     )
 
 
+@app.errorhandler(SlotBusyError)
+@app.errorhandler(StaleStateError)
+def slot_conflict(exc: RuntimeError) -> Tuple[str, int]:
+    """Another worker is playing (or just played) this game; the retry will see its turn."""
+    return str(exc), 409
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics() -> Response:
+    """Counters and latency histograms in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/reset", methods=["POST"])
 def reset() -> str:
-    global _engine
-    _engine = None
+    slot = current_slot()
+    engine_pool.discard(slot)
+    delete_slot(DB_PATH, slot)
     flash("Game reset. Fresh mysteries await.", "info")
     return redirect(url_for("game"))
 
@@ -0,0 +1,368 @@
+"""Async serving mode.
+
+    uvicorn adventure_game.asgi:app
+
+Turns are served natively on the event loop (``POST /turn`` as JSON and
+``POST /turn/stream`` as server-sent events), so one worker holds many
+in-flight narrator calls instead of one thread each. Every other route is
+handed to the Flask app on a pool of ``ADVENTURE_WSGI_THREADS`` threads;
+both share the session cookie and the engine pool.
+``ADVENTURE_MAX_IN_FLIGHT`` bounds concurrent requests, and a request that
+cannot be admitted within ``ADVENTURE_ADMIT_TIMEOUT`` seconds gets a 503.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from werkzeug.formparser import parse_form_data
+from werkzeug.http import dump_cookie, parse_cookie
+
+from .app import DB_PATH, _sse, app as flask_app, catalog, engine_pool
+from .models.db_models import StaleStateError, slot_key
+from .models.persistence import SlotBusyError, rename_slot
+from .utils.metrics import REGISTRY
+
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+MAX_IN_FLIGHT = int(os.getenv("ADVENTURE_MAX_IN_FLIGHT", "512"))
+ADMIT_TIMEOUT_SECONDS = float(os.getenv("ADVENTURE_ADMIT_TIMEOUT", "10"))
+# Threads for routes still served by Flask (page renders, history, reset).
+WSGI_THREADS = int(os.getenv("ADVENTURE_WSGI_THREADS", "32"))
+
+_WSGI_EXECUTOR = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix="wsgi")
+
+REJECTED = REGISTRY.counter(
+    "adventure_asgi_rejected_total", "Requests turned away because the server was at capacity."
+)
+
+_admission = asyncio.Semaphore(MAX_IN_FLIGHT)
+_in_flight = 0
+
+REGISTRY.gauge(
+    "adventure_asgi_in_flight", "Requests currently admitted by the ASGI app.", lambda: _in_flight
+)
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    route = (scope["method"], scope["path"])
+    if route == ("GET", "/metrics"):
+        await _respond(send, 200, REGISTRY.render().encode("utf-8"), "text/plain; version=0.0.4")
+        return
+
+    global _in_flight
+    try:
+        await asyncio.wait_for(_admission.acquire(), ADMIT_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        REJECTED.inc()
+        await _respond_json(send, 503, {"error": "Server busy, try again shortly."})
+        return
+    _in_flight += 1
+    try:
+        body = await _read_body(receive)
+        if route == ("POST", "/turn"):
+            await _turn(scope, body, send)
+        elif route == ("POST", "/turn/stream"):
+            await _until_disconnect(receive, _turn_stream(scope, body, send))
+        else:
+            await _call_flask(scope, body, send)
+    finally:
+        _in_flight -= 1
+        _admission.release()
+
+
+async def _turn(scope: Scope, body: bytes, send: Send) -> None:
+    slot, cookie = await asyncio.to_thread(_session_slot, scope)
+    headers = [cookie] if cookie else []
+    player_input = _player_input(scope, body)
+    if not player_input:
+        await _respond_json(send, 400, {"error": "Please enter an action."}, headers)
+        return
+    try:
+        async with engine_pool.alease(slot) as engine:
+            result = await engine.aprocess_turn(player_input)
+            ui_state = engine.get_ui_state()
+    except ValueError as exc:
+        await _respond_json(send, 400, {"error": str(exc)}, headers)
+        return
+    except (SlotBusyError, StaleStateError) as exc:
+        await _respond_json(send, 409, {"error": str(exc)}, headers)
+        return
+    except RuntimeError as exc:
+        await _respond_json(send, 502, {"error": str(exc)}, headers)
+        return
+    await _respond_json(
+        send,
+        200,
+        {
+            "narration": result["narration"],
+            "turn": ui_state["turn"],
+            "world_state": ui_state["world_state"],
+            "stats": dict(ui_state["stats"]),
+            "inventory": list(ui_state["inventory"]),
+            "npc_rel": dict(ui_state["npc_rel"]),
+            "tokens": ui_state["tokens"],
+        },
+        headers,
+    )
+
+
+async def _turn_stream(scope: Scope, body: bytes, send: Send) -> None:
+    slot, cookie = await asyncio.to_thread(_session_slot, scope)
+    player_input = _player_input(scope, body)
+    headers = [
+        (b"content-type", b"text/event-stream"),
+        (b"cache-control", b"no-cache"),
+        (b"x-accel-buffering", b"no"),
+    ]
+    if cookie:
+        headers.append(cookie)
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+
+    async def emit(event: str, data: Dict[str, Any]) -> None:
+        await send(
+            {"type": "http.response.body", "body": _sse(event, data).encode("utf-8"), "more_body": True}
+        )
+
+    if not player_input:
+        await emit("error", {"message": "Please enter an action."})
+    else:
+        try:
+            async with engine_pool.alease(slot) as engine:
+                async for event in engine.aprocess_turn_stream(player_input):
+                    if event["event"] == "narration":
+                        await emit("narration", {"text": event["text"]})
+                    else:
+                        await emit(
+                            "done",
+                            {
+                                "narration": event["narration"],
+                                "world_state": event["state"].world_state,
+                            },
+                        )
+        except (ValueError, RuntimeError) as exc:
+            await emit("error", {"message": str(exc)})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def _until_disconnect(receive: Receive, work: Awaitable[None]) -> None:
+    """Run ``work``, cancelling it as soon as the client disconnects.
+
+    Servers may silently drop sends to a closed connection, so without this
+    an abandoned stream would keep the narrator generating to the end.
+    """
+
+    async def disconnected() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    if not task.cancelled():
+        task.result()
+
+
+async def _call_flask(scope: Scope, body: bytes, send: Send) -> None:
+    """Run the Flask app for this request on a worker thread."""
+    loop = asyncio.get_running_loop()
+    status, headers, payload = await loop.run_in_executor(
+        _WSGI_EXECUTOR, _run_wsgi, _wsgi_environ(scope, body)
+    )
+    await send(
+        {
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [
+                (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _run_wsgi(environ: Dict[str, Any]) -> Tuple[str, List[Tuple[str, str]], bytes]:
+    started: Dict[str, Any] = {}
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info: Any = None) -> None:
+        started["status"] = status
+        started["headers"] = headers
+
+    result = flask_app(environ, start_response)
+    try:
+        payload = b"".join(result)
+    finally:
+        close = getattr(result, "close", None)
+        if close is not None:
+            close()
+    return started["status"], started["headers"], payload
+
+
+def _wsgi_environ(scope: Scope, body: bytes) -> Dict[str, Any]:
+    server = scope.get("server") or ("localhost", 80)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").lower()
+        value = raw_value.decode("latin-1")
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif name != "content-length":
+            key = "HTTP_" + name.upper().replace("-", "_")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _session_slot(scope: Scope) -> Tuple[str, Optional[Tuple[bytes, bytes]]]:
+    """The engine pool key (game and slot) from Flask's signed session cookie.
+
+    Returns the key and, when the session had to be issued or updated, the
+    ``set-cookie`` header that stores it where the Flask routes will find it.
+    """
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    cookie_name = flask_app.config["SESSION_COOKIE_NAME"]
+    cookies = parse_cookie(_header(scope, b"cookie") or "")
+    data: Dict[str, Any] = {}
+    if cookie_name in cookies:
+        try:
+            data = serializer.loads(
+                cookies[cookie_name],
+                max_age=int(flask_app.permanent_session_lifetime.total_seconds()),
+            )
+        except Exception:
+            data = {}
+    changed = False
+    if not data.get("slot"):
+        data["slot"] = uuid.uuid4().hex
+        changed = True
+    if not data.get("game") or not catalog.has(data["game"]):
+        if not data.get("game") and not changed:
+            # Saves from before the catalog were stored under the bare slot.
+            rename_slot(DB_PATH, data["slot"], slot_key(catalog.default_game, data["slot"]))
+        data["game"] = catalog.default_game
+        changed = True
+    key = slot_key(data["game"], data["slot"])
+    if not changed:
+        return key, None
+    cookie = dump_cookie(cookie_name, serializer.dumps(data), httponly=True, path="/")
+    return key, (b"set-cookie", cookie.encode("latin-1"))
+
+
+def _player_input(scope: Scope, body: bytes) -> str:
+    content_type = _header(scope, b"content-type") or ""
+    if content_type.startswith("application/json"):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return ""
+        value = payload.get("player_input", "") if isinstance(payload, dict) else ""
+        return value.strip() if isinstance(value, str) else ""
+    _, form, _ = parse_form_data(
+        {
+            "REQUEST_METHOD": "POST",
+            "CONTENT_TYPE": content_type,
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        }
+    )
+    return form.get("player_input", "").strip()
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for raw_name, raw_value in scope.get("headers", []):
+        if raw_name.lower() == name:
+            return raw_value.decode("latin-1")
+    return None
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks: List[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _respond(
+    send: Send,
+    status: int,
+    payload: bytes,
+    content_type: str,
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode("latin-1"))] + (headers or []),
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def _respond_json(
+    send: Send,
+    status: int,
+    data: Dict[str, Any],
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+) -> None:
+    payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    await _respond(send, status, payload, "application/json", headers)
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await asyncio.to_thread(catalog.start)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            catalog.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
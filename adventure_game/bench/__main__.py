@@ -0,0 +1,269 @@
+"""Offline benchmark of the game hot path using the ``fake`` provider.
+
+    python -m adventure_game.bench --sessions 20 --turns 10 --latency-ms 50
+
+Drives ``GameEngine.process_turn`` directly, through the Flask routes and
+with ``aprocess_turn`` on one event loop for N sessions x M turns, then reports turn latency percentiles, throughput,
+SQLite write time, prompt-build time, the per-stage breakdown recorded in the
+metrics registry and RSS. No network access is needed. ``--backend ollama``
+puts the real Ollama client in the loop, talking to ``bench.ollama_stub``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+from ..core.game_engine import GameEngine
+from .config import DEFAULT_CONFIG, make_config
+from .ollama_stub import OllamaStub
+from ..models.db_models import GameStateRepository
+from ..utils.metrics import REGISTRY, STAGE_SECONDS
+
+
+class StageTimer:
+    """Wall time spent inside selected methods, summed across threads."""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def patched(self, targets: Dict[str, tuple]) -> Iterator[None]:
+        originals = []
+        for stage, (owner, attr) in targets.items():
+            original = getattr(owner, attr)
+            originals.append((owner, attr, original))
+            setattr(owner, attr, self._wrap(stage, original))
+        try:
+            yield
+        finally:
+            for owner, attr, original in originals:
+                setattr(owner, attr, original)
+
+    def _wrap(self, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.totals[stage] = self.totals.get(stage, 0.0) + elapsed
+                    self.calls[stage] = self.calls.get(stage, 0) + 1
+
+        return timed
+
+
+def run_engine(config_path: Path, db_path: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    def session(idx: int) -> Dict[str, Any]:
+        engine = GameEngine(config_path=config_path, db_path=db_path, slot=f"engine-{idx}")
+        latencies, errors = [], 0
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            try:
+                engine.process_turn(f"bench action {turn}")
+            except RuntimeError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        return {"latencies": latencies, "errors": errors}
+
+    return _run_sessions(session, args)
+
+
+def run_flask(config_path: Path, db_path: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    os.environ["ADVENTURE_CONFIG"] = str(config_path)
+    # Serve only the bench config, not (and without prewarming) the real games.
+    os.environ["ADVENTURE_CONFIG_DIR"] = str(config_path.parent)
+    os.environ["ADVENTURE_DB"] = str(db_path)
+    from .. import app as app_module
+
+    def session(idx: int) -> Dict[str, Any]:
+        client = app_module.app.test_client()
+        client.get("/")
+        latencies, errors = [], 0
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            response = client.post("/", data={"player_input": f"bench action {turn}"})
+            elapsed = time.perf_counter() - start
+            # Failed turns flash an error and redirect instead of rendering.
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+        return {"latencies": latencies, "errors": errors}
+
+    return _run_sessions(session, args)
+
+
+def run_async(config_path: Path, db_path: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """Every session in flight at once on a single event loop."""
+
+    async def session(idx: int) -> Dict[str, Any]:
+        engine = await asyncio.to_thread(
+            GameEngine, config_path=config_path, db_path=db_path, slot=f"async-{idx}"
+        )
+        latencies, errors = [], 0
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            try:
+                await engine.aprocess_turn(f"bench action {turn}")
+            except RuntimeError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        return {"latencies": latencies, "errors": errors}
+
+    async def run_all() -> List[Dict[str, Any]]:
+        return await asyncio.gather(*(session(idx) for idx in range(args.sessions)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all())
+    return _summarize(results, time.perf_counter() - start)
+
+
+def _run_sessions(session: Callable[[int], Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(session, range(args.sessions)))
+    return _summarize(results, time.perf_counter() - start)
+
+
+def _summarize(results: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    latencies = sorted(l for result in results for l in result["latencies"])
+    return {
+        "turns": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "wall_seconds": round(wall, 3),
+        "throughput_turns_per_s": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p95_ms": _percentile_ms(latencies, 95),
+        "p99_ms": _percentile_ms(latencies, 99),
+    }
+
+
+def _percentile_ms(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    idx = max(0, math.ceil(pct / 100 * len(values)) - 1)
+    return round(values[idx] * 1000, 2)
+
+
+def rss_mb() -> Dict[str, float]:
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    current_kb = 0
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current_kb = int(line.split()[1])
+    except OSError:
+        pass
+    return {
+        "rss_mb": round(current_kb / 1024, 1),
+        "peak_rss_mb": round(max(peak_kb, current_kb) / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--durability", choices=("sync", "batched"), default="sync")
+    parser.add_argument("--mode", choices=("engine", "flask", "async", "both", "all"), default="both")
+    parser.add_argument(
+        "--backend",
+        choices=("fake", "ollama"),
+        default="fake",
+        help="'ollama' drives the real Ollama client against a local stand-in server",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    out_dir = Path(tempfile.mkdtemp(prefix="adventure-bench-"))
+    stub = OllamaStub().start() if args.backend == "ollama" else None
+    config_path = make_config(
+        args.config,
+        out_dir,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        durability=args.durability,
+        ollama_host=stub.url if stub else None,
+    )
+    db_path = out_dir / "bench.db"
+
+    report: Dict[str, Any] = {
+        "sessions": args.sessions,
+        "turns_per_session": args.turns,
+        "latency_ms": args.latency_ms,
+        "durability": args.durability,
+        "backend": args.backend,
+    }
+    runners = {"engine": run_engine, "flask": run_flask, "async": run_async}
+    if args.mode == "all":
+        modes = list(runners)
+    elif args.mode == "both":
+        modes = ["engine", "flask"]
+    else:
+        modes = [args.mode]
+    for mode in modes:
+        timer = StageTimer()
+        targets = {
+            "sqlite_write": (GameStateRepository, "save_many"),
+            "prompt_build": (GameEngine, "_build_prompts"),
+        }
+        REGISTRY.reset()
+        with timer.patched(targets):
+            result = runners[mode](config_path, db_path, args)
+        turns = max(1, result["turns"])
+        for stage in targets:
+            result[f"{stage}_total_ms"] = round(timer.totals.get(stage, 0.0) * 1000, 2)
+            result[f"{stage}_per_turn_ms"] = round(timer.totals.get(stage, 0.0) * 1000 / turns, 3)
+        # Mean per turn of each traced stage (persist is only the enqueue when batched).
+        for stage, (total, _) in sorted(STAGE_SECONDS.totals("stage", kind="turn").items()):
+            result[f"stage_{stage}_ms"] = round(total * 1000 / turns, 3)
+        report[mode] = result
+    if stub is not None:
+        report["ollama_stub"] = stub.stats()
+        stub.stop()
+    report.update(rss_mb())
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{args.sessions} sessions x {args.turns} turns, fake latency {args.latency_ms} ms, "
+        f"durability {args.durability}, backend {args.backend}"
+    )
+    for mode in modes:
+        print(f"\n[{mode}]")
+        for key, value in report[mode].items():
+            print(f"  {key:28}{value}")
+    if stub is not None:
+        print(f"\nollama stand-in {report['ollama_stub']}")
+    print(f"\nRSS {report['rss_mb']} MB (peak {report['peak_rss_mb']} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Offline copies of a game config for the benchmarks and the test suite."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CONFIG = BASE_DIR / "configs" / "5d_spacetime_romance.yaml"
+
+
+def make_config(
+    base_path: Path,
+    out_dir: Path,
+    *,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    failure_rate: float = 0.0,
+    durability: str = "sync",
+    ollama_host: Optional[str] = None,
+) -> Path:
+    """Copy ``base_path`` with every role switched to the fake provider.
+
+    ``failure_rate`` applies to the narrator only. With ``ollama_host``,
+    roles use the real ``ollama`` client instead and the fake settings travel
+    as request options to the stand-in server there.
+    """
+    with open(base_path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    for role, role_config in config["models"].items():
+        role_config.pop("providers", None)
+        role_config.pop("routing", None)
+        fake_params = {
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "failure_rate": failure_rate if role == "narrator" else 0.0,
+            "seed": role,
+        }
+        if ollama_host is None:
+            role_config["provider"] = "fake"
+            role_config["create_params"] = fake_params
+        else:
+            role_config["provider"] = "ollama"
+            role_config["create_params"] = {"model": role, "host": ollama_host, "options": fake_params}
+        role_config["cache"] = {"enabled": False}
+    config["prewarm"] = {"depth": 0}
+    config["persistence"] = {**(config.get("persistence") or {}), "durability": durability}
+    path = out_dir / "bench_config.yaml"
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    return path
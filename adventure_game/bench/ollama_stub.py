@@ -0,0 +1,195 @@
+"""Local stand-in for an Ollama server, for exercising ``OllamaLLM`` offline.
+
+    python -m adventure_game.bench.ollama_stub --port 11434 --latency-ms 200
+
+Serves ``/api/chat`` as streamed NDJSON (one ``message`` delta per line, then
+a ``done`` record with top-level ``prompt_eval_count``/``eval_count``), plus
+``/api/tags`` and ``/api/version``. Text comes from the ``fake`` provider, so
+replies are deterministic and narrator prompts get narrator JSON. The fake
+provider's ``latency_ms``, ``jitter_ms``, ``first_token_ms``,
+``completion_tokens`` and ``failure_rate`` can also be passed per request in
+``options``. ``stats`` counts streams the client abandoned midway, which is
+how early cancellation is checked.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Optional
+
+from ..core.llm_provider.fake_llm import FakeLLM, FakeProviderError
+
+_FAKE_KEYS = ("latency_ms", "jitter_ms", "first_token_ms", "completion_tokens", "failure_rate")
+
+
+class OllamaStub:
+    """Threaded stand-in server; ``start()`` binds and serves in the background."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        models: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.defaults: Dict[str, Any] = {"latency_ms": latency_ms, "jitter_ms": jitter_ms}
+        # None accepts any model name; otherwise unknown models get a 404.
+        self.models = set(models) if models is not None else None
+        self.requests: list[Dict[str, Any]] = []
+        self._stats = {"requests": 0, "completed": 0, "cancelled": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "OllamaStub":
+        self._thread = threading.Thread(target=self.serve_forever, name="ollama-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "OllamaStub":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _record(self, body: Dict[str, Any]) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            # Only the most recent requests, for inspection in checks.
+            self.requests = self.requests[-99:] + [body]
+
+
+def _handler(stub: OllamaStub) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path == "/api/version":
+                self._json(200, {"version": "0.0.0-stub"})
+            elif self.path == "/api/tags":
+                self._json(200, {"models": [{"name": name} for name in sorted(stub.models or ())]})
+            else:
+                self._json(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if self.path != "/api/chat":
+                self._json(404, {"error": "not found"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError:
+                self._json(400, {"error": "invalid JSON body"})
+                return
+            stub._record(body)
+            model = body.get("model", "")
+            if stub.models is not None and model not in stub.models:
+                stub._count("errors")
+                self._json(404, {"error": f"model '{model}' not found"})
+                return
+            self._chat(body)
+
+        def _chat(self, body: Dict[str, Any]) -> None:
+            options = body.get("options") or {}
+            params = {**stub.defaults, **{k: options[k] for k in _FAKE_KEYS if k in options}}
+            fake = FakeLLM({**params, "seed": options.get("seed", body.get("model", ""))})
+            messages = body.get("messages") or []
+            system = "\n\n".join(m["content"] for m in messages if m.get("role") == "system")
+            user = "\n\n".join(m["content"] for m in messages if m.get("role") != "system")
+            stream = fake.generate_stream(system_prompt=system, user_prompt=user)
+            try:
+                first = next(stream)
+            except FakeProviderError as exc:
+                stub._count("errors")
+                self._json(500, {"error": str(exc)})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for chunk in itertools.chain([first], stream):
+                    line: Dict[str, Any] = {
+                        "model": body.get("model"),
+                        "message": {"role": "assistant", "content": chunk["text"]},
+                        "done": not chunk["text"],
+                    }
+                    if not chunk["text"]:
+                        # The fake stream ends with one empty chunk carrying usage.
+                        line["done_reason"] = "stop"
+                        line["prompt_eval_count"] = chunk["usage"]["prompt_tokens"]
+                        line["eval_count"] = chunk["usage"]["completion_tokens"]
+                    self._line(line)
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                stub._count("cancelled")
+                self.close_connection = True
+                return
+            stub._count("completed")
+
+        def _line(self, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode("utf-8") + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _json(self, status: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = OllamaStub(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    print(f"Ollama stand-in listening on {stub.url}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare the slotted ``GameState`` with the old dict-of-dicts state.
+
+    python -m adventure_game.bench.state_model --sessions 500 --turns 40
+
+Reports resident memory per session and (de)serialization time per state.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from ..models import state as state_model
+from ..models.state import GameState
+
+STAT_NAMES = ("health", "sanity", "intelligence")
+
+
+def make_dict_state(session: int, turns: int) -> Dict[str, Any]:
+    return {
+        "world_state": "beginning",
+        "stats": {name: 100 - (session + idx) % 50 for idx, name in enumerate(STAT_NAMES)},
+        "inventory": [f"item-{session}-{idx}" for idx in range(5)],
+        "npc_rel": {f"npc-{idx}": "wary" for idx in range(3)},
+        "log": [
+            {
+                "turn": turn,
+                "player": f"session {session} action {turn}",
+                "narrator": f"session {session} narration {turn} " * 8,
+            }
+            for turn in range(turns)
+        ],
+    }
+
+
+def make_typed_state(session: int, turns: int) -> GameState:
+    return GameState.from_dict(make_dict_state(session, turns), STAT_NAMES)
+
+
+def bytes_per_session(factory: Callable[[int, int], Any], sessions: int, turns: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held: List[Any] = [factory(session, turns) for session in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return (after - before) / sessions
+
+
+def time_per_call(fn: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    dict_state = make_dict_state(0, args.turns)
+    typed_state = make_typed_state(0, args.turns)
+    dict_text = json.dumps(dict_state)
+    typed_text = state_model.dumps(typed_state.to_dict())
+
+    rows = [
+        (
+            "memory / session (bytes)",
+            bytes_per_session(make_dict_state, args.sessions, args.turns),
+            bytes_per_session(make_typed_state, args.sessions, args.turns),
+        ),
+        (
+            "serialize (us)",
+            time_per_call(lambda: json.dumps(dict_state), args.repeat),
+            time_per_call(lambda: state_model.dumps(typed_state.to_dict()), args.repeat),
+        ),
+        (
+            "deserialize (us)",
+            time_per_call(lambda: json.loads(dict_text), args.repeat),
+            time_per_call(
+                lambda: GameState.from_dict(state_model.loads(typed_text), STAT_NAMES),
+                args.repeat,
+            ),
+        ),
+        (
+            "snapshot (us)",
+            time_per_call(lambda: json.loads(json.dumps(dict_state)), args.repeat),
+            time_per_call(typed_state.snapshot, args.repeat),
+        ),
+    ]
+
+    codec = "orjson" if state_model.orjson is not None else "json"
+    print(f"{args.sessions} sessions x {args.turns} turns, codec: {codec}")
+    print(f"{'':28}{'dict':>12}{'GameState':>12}")
+    for label, legacy, typed in rows:
+        print(f"{label:28}{legacy:12.1f}{typed:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
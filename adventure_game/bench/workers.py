@@ -0,0 +1,144 @@
+"""Several worker processes playing the same games against one database.
+
+    python -m adventure_game.bench.workers --workers 4 --slots 3 --turns 25
+
+Each worker runs its own ``EnginePool`` (with slot leases unless
+``--no-leases``) and plays turns on randomly chosen shared slots with the
+``fake`` provider, like gunicorn workers behind a load balancer. Afterwards
+every slot's ``turn_log`` must hold each accepted turn exactly once, in an
+unbroken sequence; the exit status is non-zero otherwise. Without leases
+(sync durability only), conflicting turns must be rejected as stale rather
+than lost.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .config import DEFAULT_CONFIG, make_config
+from ..core.engine_pool import EnginePool
+from ..core.game_engine import GameEngine
+from ..models.db_models import StaleStateError
+from ..models.persistence import SlotBusyError, SlotLeases
+
+
+def play(worker: int, config_path: Path, db_path: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    def build(slot: str) -> GameEngine:
+        return GameEngine(config_path=config_path, db_path=db_path, slot=slot)
+
+    leases = None if args.no_leases else SlotLeases(db_path, ttl_seconds=30, wait_seconds=30)
+    pool = EnginePool(build, leases=leases)
+    rng = random.Random(worker)
+    accepted: List[str] = []
+    stale = busy = 0
+    for n in range(args.turns):
+        action = f"w{worker}-t{n}"
+        try:
+            with pool.lease(f"slot-{rng.randrange(args.slots)}") as engine:
+                engine.process_turn(action)
+            accepted.append(action)
+        except StaleStateError:
+            stale += 1
+        except SlotBusyError:
+            busy += 1
+    return {"accepted": accepted, "stale": stale, "busy": busy}
+
+
+def _worker(worker: int, config_path: Path, db_path: Path, args: argparse.Namespace, results: Any) -> None:
+    results.put((worker, play(worker, config_path, db_path, args)))
+
+
+def check(db_path: Path, accepted: List[str]) -> Dict[str, Any]:
+    """Every accepted turn stored exactly once, with no gaps in any slot's log."""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT slot, turn, player FROM turn_log ORDER BY slot, turn").fetchall()
+    versions = dict(conn.execute("SELECT slot, version FROM game_state").fetchall())
+    conn.close()
+    turns: Dict[str, List[int]] = {}
+    stored: List[str] = []
+    for slot, turn, player in rows:
+        turns.setdefault(slot, []).append(turn)
+        if player:
+            stored.append(player)
+    gaps = [slot for slot, seq in turns.items() if seq != list(range(len(seq)))]
+    lost = sorted(set(accepted) - set(stored))
+    unexpected = sorted(set(stored) - set(accepted))
+    duplicated = len(stored) - len(set(stored))
+    return {
+        "slots": len(turns),
+        "stored_turns": len(stored),
+        "lost": lost,
+        "unexpected": unexpected,
+        "duplicated": duplicated,
+        "gaps": gaps,
+        "versions": versions,
+        "ok": not (lost or unexpected or duplicated or gaps),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--slots", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=25, help="turns per worker")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--durability", choices=("sync", "batched"), default="sync")
+    parser.add_argument("--no-leases", action="store_true", help="rely on version checks alone")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    if args.no_leases and args.durability == "batched":
+        # Write-behind acknowledges a turn before its version check runs.
+        parser.error("--no-leases needs --durability sync")
+
+    out_dir = Path(tempfile.mkdtemp(prefix="adventure-workers-"))
+    config_path = make_config(
+        args.config, out_dir, latency_ms=args.latency_ms, durability=args.durability
+    )
+    db_path = out_dir / "workers.db"
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    start = time.perf_counter()
+    procs = [
+        ctx.Process(target=_worker, args=(idx, config_path, db_path, args, results))
+        for idx in range(args.workers)
+    ]
+    for proc in procs:
+        proc.start()
+    outcomes = dict(results.get() for _ in procs)
+    for proc in procs:
+        proc.join()
+    wall = time.perf_counter() - start
+
+    accepted = [action for outcome in outcomes.values() for action in outcome["accepted"]]
+    report = check(db_path, accepted)
+    report.update(
+        {
+            "workers": args.workers,
+            "leases": not args.no_leases,
+            "durability": args.durability,
+            "accepted_turns": len(accepted),
+            "stale_rejections": sum(outcome["stale"] for outcome in outcomes.values()),
+            "busy_rejections": sum(outcome["busy"] for outcome in outcomes.values()),
+            "wall_seconds": round(wall, 3),
+        }
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"  {key:<20} {value}")
+    raise SystemExit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config_registry import CONFIG_DIR, ConfigError, get_config_registry, load_config
+from .game_engine import GameEngine
+from .prewarm import PrewarmWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GameInfo:
+    name: str
+    genre: str
+    language: str
+    path: Path
+
+
+class GameCatalog:
+    """Every scenario one process can serve, one per config file.
+
+    Games come from the config registry of ``config_dir``, plus
+    ``default_config`` when it lives elsewhere. Engines of every game share
+    the process-wide providers, tokenizer caches and database connections;
+    each game gets its own prewarm queue.
+    """
+
+    def __init__(
+        self,
+        config_dir: Path = CONFIG_DIR,
+        *,
+        db_path: Path,
+        default_config: Optional[Path] = None,
+        provider: Optional[str] = None,
+    ) -> None:
+        self.registry = get_config_registry(config_dir)
+        self.db_path = db_path
+        self.provider_override = provider
+        self._extra: Dict[str, Path] = {}
+        if default_config is not None:
+            default_config = Path(default_config).resolve()
+            self.default_game = load_config(default_config)["game_name"]
+            if default_config.parent != self.registry.config_dir:
+                self._extra[self.default_game] = default_config
+        else:
+            names = self.registry.names()
+            if not names:
+                raise ConfigError(f"no valid game configs in {self.registry.config_dir}")
+            self.default_game = names[0]
+        self._prewarm: Dict[str, PrewarmWorker] = {}
+        self._lock = threading.Lock()
+
+    def games(self) -> List[GameInfo]:
+        infos = []
+        for name in sorted({*self.registry.names(), *self._extra}):
+            try:
+                infos.append(self.info(name))
+            except ConfigError:
+                logger.warning("Game '%s' disappeared from the catalog", name)
+        return infos
+
+    def info(self, game_name: str) -> GameInfo:
+        path = self.path(game_name)
+        config = load_config(path)
+        return GameInfo(
+            name=game_name,
+            genre=config.get("genre", ""),
+            language=config["language"],
+            path=path,
+        )
+
+    def path(self, game_name: str) -> Path:
+        if game_name in self._extra:
+            return self._extra[game_name]
+        return self.registry.path(game_name)
+
+    def has(self, game_name: str) -> bool:
+        try:
+            self.path(game_name)
+        except ConfigError:
+            return False
+        return True
+
+    def prewarm(self, game_name: str) -> PrewarmWorker:
+        """The game's prewarm worker, started on first use."""
+        with self._lock:
+            worker = self._prewarm.get(game_name)
+            if worker is None:
+                worker = self._prewarm[game_name] = PrewarmWorker.from_config(
+                    self.path(game_name), self.db_path, provider=self.provider_override
+                )
+                worker.start()
+            return worker
+
+    def start(self) -> None:
+        """Start prewarming every game."""
+        for info in self.games():
+            self.prewarm(info.name)
+
+    def stop(self) -> None:
+        with self._lock:
+            workers = list(self._prewarm.values())
+        for worker in workers:
+            worker.stop()
+
+    def prewarm_ready(self) -> int:
+        with self._lock:
+            workers = list(self._prewarm.values())
+        return sum(worker.repository.count(worker.game_name) for worker in workers)
+
+    def build_engine(self, game_name: str, slot: str) -> GameEngine:
+        return GameEngine(
+            config_path=self.path(game_name),
+            db_path=self.db_path,
+            provider=self.provider_override,
+            slot=slot,
+            prewarm=self.prewarm(game_name),
+        )
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .llm_provider import base as provider_base
+from .llm_provider.router import POLICIES
+from ..utils.frozen import FrozenDict, freeze
+
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / "configs"
+# How often a lookup may stat the config files for changes.
+RELOAD_CHECK_SECONDS = 2.0
+
+ROLES = ("narrator", "lore_generator", "summarizer")
+NUMBER = (int, float)
+
+# key -> (accepted types, required)
+_TOP_LEVEL: Dict[str, Tuple[Any, bool]] = {
+    "game_name": (str, True),
+    "genre": (str, False),
+    "language": (str, True),
+    "lore_seed": (str, False),
+    "stats": (list, True),
+    "npcs": (int, True),
+    "items": (int, True),
+    "story_size": (int, True),
+    "models": (dict, True),
+    "prewarm": (dict, False),
+    "http": (dict, False),
+    "persistence": (dict, False),
+    "history": (dict, False),
+}
+_SECTIONS: Dict[str, Dict[str, Any]] = {
+    "prewarm": {"depth": int, "concurrency": int, "poll_seconds": NUMBER},
+    "http": {"pool_size": int, "timeout": NUMBER},
+    "persistence": {"durability": str, "flush_interval_ms": NUMBER, "batch_size": int},
+    "history": {"window": int, "max_in_memory": int},
+}
+_ROLE_KEYS: Dict[str, Any] = {
+    "provider": str,
+    "providers": list,
+    "create_params": dict,
+    "routing": dict,
+    "cache": dict,
+    "structured_output": (bool, str),
+    "max_concurrency": int,
+    "context_budget": int,
+    "incremental": bool,
+    "chapter_turns": int,
+    "max_chapters": int,
+}
+_SPEC_KEYS: Dict[str, Any] = {"provider": str, "create_params": dict, "max_concurrency": int}
+_ROUTING_KEYS: Dict[str, Any] = {
+    "policy": str,
+    "hedge_delay_ms": NUMBER,
+    "max_workers": int,
+    "breaker": dict,
+}
+_CACHE_KEYS: Dict[str, Any] = {"enabled": bool, "ttl_seconds": NUMBER}
+
+
+class ConfigError(ValueError):
+    """A game config that is missing, unreadable or fails validation."""
+
+
+def validate_config(data: Any, source: str = "config") -> None:
+    """Check a parsed game config, raising ``ConfigError`` listing every problem."""
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        raise ConfigError(f"{source}: expected a mapping at the top level")
+
+    for key, (types, required) in _TOP_LEVEL.items():
+        if key not in data:
+            if required:
+                errors.append(f"'{key}' is required")
+            continue
+        _check_type(errors, key, data[key], types)
+
+    stats = data.get("stats")
+    if isinstance(stats, list):
+        if not stats or not all(isinstance(name, str) and name for name in stats):
+            errors.append("'stats' must be a non-empty list of names")
+        elif len(set(stats)) != len(stats):
+            errors.append("'stats' contains duplicates")
+
+    for section, keys in _SECTIONS.items():
+        if isinstance(data.get(section), dict):
+            _check_keys(errors, section, data[section], keys)
+    durability = (data.get("persistence") or {}).get("durability")
+    if durability is not None and durability not in ("sync", "batched"):
+        errors.append("'persistence.durability' must be 'sync' or 'batched'")
+
+    models = data.get("models")
+    if isinstance(models, dict):
+        for role in ROLES:
+            if not isinstance(models.get(role), dict):
+                errors.append(f"'models.{role}' is required")
+                continue
+            _check_role(errors, f"models.{role}", models[role])
+
+    if errors:
+        raise ConfigError(f"{source}: " + "; ".join(errors))
+
+
+def _check_role(errors: List[str], where: str, role: Dict[str, Any]) -> None:
+    _check_keys(errors, where, role, _ROLE_KEYS)
+    if "providers" in role:
+        specs = role["providers"]
+        if not isinstance(specs, list) or not specs:
+            errors.append(f"'{where}.providers' must be a non-empty list")
+            specs = []
+        for idx, spec in enumerate(specs):
+            if not isinstance(spec, dict):
+                errors.append(f"'{where}.providers[{idx}]' must be a mapping")
+                continue
+            _check_keys(errors, f"{where}.providers[{idx}]", spec, _SPEC_KEYS)
+            _check_provider(errors, f"{where}.providers[{idx}]", spec)
+    else:
+        _check_provider(errors, where, role)
+
+    routing = role.get("routing")
+    if isinstance(routing, dict):
+        _check_keys(errors, f"{where}.routing", routing, _ROUTING_KEYS)
+        if routing.get("policy", "failover") not in POLICIES:
+            errors.append(f"'{where}.routing.policy' must be one of {POLICIES}")
+        workers = routing.get("max_workers", 1)
+        if isinstance(workers, int) and workers < 1:
+            errors.append(f"'{where}.routing.max_workers' must be at least 1")
+    cache = role.get("cache")
+    if isinstance(cache, dict):
+        _check_keys(errors, f"{where}.cache", cache, _CACHE_KEYS)
+    if role.get("structured_output") not in (None, True, False, "json"):
+        errors.append(f"'{where}.structured_output' must be true, false or 'json'")
+
+
+def _check_provider(errors: List[str], where: str, spec: Dict[str, Any]) -> None:
+    name = spec.get("provider")
+    if not isinstance(name, str):
+        errors.append(f"'{where}.provider' is required")
+    elif name not in provider_base.PROVIDER_REGISTRY:
+        errors.append(
+            f"'{where}.provider' '{name}' is not registered "
+            f"({', '.join(sorted(provider_base.PROVIDER_REGISTRY))})"
+        )
+    if not isinstance(spec.get("create_params"), dict):
+        errors.append(f"'{where}.create_params' must be a mapping")
+
+
+def _check_keys(errors: List[str], where: str, section: Dict[str, Any], keys: Dict[str, Any]) -> None:
+    for key, value in section.items():
+        if key not in keys:
+            errors.append(f"unknown key '{where}.{key}'")
+        else:
+            _check_type(errors, f"{where}.{key}", value, keys[key])
+
+
+def _check_type(errors: List[str], where: str, value: Any, types: Any) -> None:
+    accepted = types if isinstance(types, tuple) else (types,)
+    # YAML booleans are ints to Python; only accept them where bool is meant.
+    if isinstance(value, bool) and bool not in accepted:
+        ok = False
+    else:
+        ok = isinstance(value, accepted)
+    if not ok:
+        names = " or ".join(t.__name__ for t in accepted)
+        errors.append(f"'{where}' must be {names}, got {type(value).__name__}")
+
+
+@dataclass
+class _Entry:
+    mtime_ns: int
+    config: Optional[FrozenDict]
+    error: Optional[str] = None
+    version: int = 0
+
+
+class ConfigRegistry:
+    """Every game config in one directory, parsed and validated once.
+
+    Lookups return the same frozen object until the file changes on disk;
+    files are re-checked at most every ``check_seconds``. A reload that fails
+    validation is logged and the last good version stays in service.
+    """
+
+    def __init__(self, config_dir: Path, *, check_seconds: float = RELOAD_CHECK_SECONDS) -> None:
+        self.config_dir = Path(config_dir).resolve()
+        self.check_seconds = check_seconds
+        self._entries: Dict[Path, _Entry] = {}
+        self._by_name: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        with self._lock:
+            self._rescan()
+
+    def get(self, path: Path) -> FrozenDict:
+        """The config stored at ``path`` (inside this registry's directory)."""
+        path = Path(path).resolve()
+        with self._lock:
+            self._maybe_rescan()
+            entry = self._entries.get(path)
+            if entry is None:
+                # Not a *.yaml file or created since the last scan.
+                entry = self._load(path, self._entries.get(path))
+        if entry.config is None:
+            raise ConfigError(entry.error or f"{path}: not found")
+        return entry.config
+
+    def by_name(self, game_name: str) -> FrozenDict:
+        return self.get(self.path(game_name))
+
+    def path(self, game_name: str) -> Path:
+        """Where the config named ``game_name`` lives."""
+        with self._lock:
+            self._maybe_rescan()
+            path = self._by_name.get(game_name)
+        if path is None:
+            raise ConfigError(f"no game config named '{game_name}' in {self.config_dir}")
+        return path
+
+    def names(self) -> List[str]:
+        with self._lock:
+            self._maybe_rescan()
+            return sorted(self._by_name)
+
+    def version(self, path: Path) -> int:
+        with self._lock:
+            entry = self._entries.get(Path(path).resolve())
+            return entry.version if entry else 0
+
+    def _maybe_rescan(self) -> None:
+        if time.monotonic() - self._checked_at >= self.check_seconds:
+            self._rescan()
+
+    def _rescan(self) -> None:
+        self._checked_at = time.monotonic()
+        paths = sorted(self.config_dir.glob("*.yaml")) if self.config_dir.is_dir() else []
+        for path in paths:
+            self._load(path.resolve(), self._entries.get(path.resolve()))
+        for path in [p for p in self._entries if not p.exists()]:
+            logger.info("Game config %s was removed", path)
+            del self._entries[path]
+        self._by_name = {}
+        for path, entry in self._entries.items():
+            if entry.config is None:
+                continue
+            name = entry.config["game_name"]
+            if name in self._by_name:
+                logger.error(
+                    "Game name '%s' is used by both %s and %s; keeping the first",
+                    name,
+                    self._by_name[name],
+                    path,
+                )
+                continue
+            self._by_name[name] = path
+
+    def _load(self, path: Path, previous: Optional[_Entry]) -> _Entry:
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except OSError as exc:
+            entry = _Entry(0, None, f"{path}: {exc.strerror or exc}")
+            self._entries[path] = entry
+            return entry
+        if previous is not None and previous.mtime_ns == mtime_ns:
+            return previous
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f)
+            validate_config(data, str(path))
+        except (OSError, yaml.YAMLError, ConfigError) as exc:
+            error = str(exc) if isinstance(exc, ConfigError) else f"{path}: {exc}"
+            if previous is not None and previous.config is not None:
+                logger.error("Keeping the last good version of %s: %s", path, error)
+                entry = _Entry(mtime_ns, previous.config, error, previous.version)
+            else:
+                logger.error("Skipping invalid game config: %s", error)
+                entry = _Entry(mtime_ns, None, error)
+        else:
+            version = previous.version + 1 if previous else 1
+            if previous is not None:
+                logger.info("Reloaded game config %s (version %d)", path, version)
+            entry = _Entry(mtime_ns, freeze(data), None, version)
+        self._entries[path] = entry
+        return entry
+
+
+_registries: Dict[Path, ConfigRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_config_registry(config_dir: Path = CONFIG_DIR) -> ConfigRegistry:
+    """Process-wide registry per config directory."""
+    key = Path(config_dir).resolve()
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = ConfigRegistry(key)
+        return registry
+
+
+def load_config(path: Path) -> FrozenDict:
+    """Shared, validated config for the file at ``path``."""
+    path = Path(path).resolve()
+    return get_config_registry(path.parent).get(path)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+from .game_engine import GameEngine
+from ..models.db_models import StaleStateError
+from ..models.persistence import SlotLeases
+from ..models.state import dumps
+
+
+SLOT_POLL_SECONDS = 0.01
+
+
+@dataclass
+class _PoolEntry:
+    engine: GameEngine
+    last_used: float
+    size_bytes: int
+    # ``size_key`` of the engine when ``size_bytes`` was estimated.
+    size_key: Tuple[int, int]
+
+
+@dataclass
+class _SlotLock:
+    lock: threading.Lock
+    users: int = 0
+
+
+class EnginePool:
+    """Session-keyed pool of live engines with LRU/TTL eviction.
+
+    Evicted engines are not lost: their state is persisted every turn, so the
+    next request for the slot rebuilds the engine from ``GameStateRepository``.
+
+    A pooled engine that another worker has saved past since is rebuilt
+    from storage, and one whose save was rejected as stale is dropped. With
+    ``leases``, several worker processes can share one database without
+    such conflicts: each lease also holds the slot's database lease, and the
+    slot is flushed before the lease is handed back.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], GameEngine],
+        *,
+        max_size: int = 256,
+        ttl_seconds: float = 1800.0,
+        max_bytes: Optional[int] = None,
+        leases: Optional[SlotLeases] = None,
+    ) -> None:
+        self.factory = factory
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.leases = leases
+
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._slot_locks: Dict[str, _SlotLock] = {}
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._evictions = 0
+
+    @contextmanager
+    def lease(self, slot: str) -> Iterator[GameEngine]:
+        """Yield the engine for ``slot`` while holding its per-slot lock."""
+        with self._hold_slot(slot):
+            if self.leases is not None:
+                self.leases.acquire(slot)
+            try:
+                engine = self._get(slot)
+                if engine is not None and not engine.is_current():
+                    engine = None
+                if engine is None:
+                    # Built outside the pool lock: construction may call the LLM.
+                    engine = self.factory(slot)
+                stale = False
+                try:
+                    yield engine
+                except StaleStateError:
+                    stale = True
+                    raise
+                finally:
+                    self._check_in(slot, engine, stale)
+                    if self.leases is not None and not stale:
+                        engine.flush()
+            finally:
+                if self.leases is not None:
+                    self.leases.release(slot)
+
+    @asynccontextmanager
+    async def alease(self, slot: str) -> AsyncIterator[GameEngine]:
+        """``lease`` for an event loop; waiting, storage and engine construction run off the loop."""
+        slot_lock = self._ref_slot(slot)
+        try:
+            # Contention only comes from the same session's own requests, so
+            # polling is cheap, and unlike a blocked thread it can be cancelled.
+            while not slot_lock.lock.acquire(blocking=False):
+                await asyncio.sleep(SLOT_POLL_SECONDS)
+            try:
+                if self.leases is not None:
+                    await self.leases.aacquire(slot)
+                try:
+                    engine = self._get(slot)
+                    if engine is not None and not await asyncio.to_thread(engine.is_current):
+                        engine = None
+                    if engine is None:
+                        engine = await asyncio.to_thread(self.factory, slot)
+                    stale = False
+                    try:
+                        yield engine
+                    except StaleStateError:
+                        stale = True
+                        raise
+                    finally:
+                        self._check_in(slot, engine, stale)
+                        if self.leases is not None and not stale:
+                            await asyncio.to_thread(engine.flush)
+                finally:
+                    if self.leases is not None:
+                        await asyncio.to_thread(self.leases.release, slot)
+            finally:
+                slot_lock.lock.release()
+        finally:
+            self._unref_slot(slot, slot_lock)
+
+    def discard(self, slot: str) -> None:
+        with self._hold_slot(slot):
+            self._drop(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "engines": len(self._entries),
+                "max_size": self.max_size,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+            }
+
+    @contextmanager
+    def _hold_slot(self, slot: str) -> Iterator[None]:
+        slot_lock = self._ref_slot(slot)
+        try:
+            with slot_lock.lock:
+                yield
+        finally:
+            self._unref_slot(slot, slot_lock)
+
+    def _ref_slot(self, slot: str) -> _SlotLock:
+        # Slot locks are reference counted so idle sessions don't leak locks.
+        with self._lock:
+            slot_lock = self._slot_locks.get(slot)
+            if slot_lock is None:
+                slot_lock = self._slot_locks[slot] = _SlotLock(threading.Lock())
+            slot_lock.users += 1
+            return slot_lock
+
+    def _unref_slot(self, slot: str, slot_lock: _SlotLock) -> None:
+        with self._lock:
+            slot_lock.users -= 1
+            if slot_lock.users == 0:
+                del self._slot_locks[slot]
+
+    def _get(self, slot: str) -> Optional[GameEngine]:
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            entry = self._entries.get(slot)
+            if entry is None:
+                return None
+            self._entries.move_to_end(slot)
+            return entry.engine
+
+    def _check_in(self, slot: str, engine: GameEngine, stale: bool) -> None:
+        if stale:
+            # Another worker saved this game first; the next lease rebuilds it.
+            self._drop(slot)
+        else:
+            self._store(slot, engine)
+
+    def _drop(self, slot: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(slot, None)
+            if entry is not None:
+                self._total_bytes -= entry.size_bytes
+
+    def _store(self, slot: str, engine: GameEngine) -> None:
+        key = size_key(engine)
+        with self._lock:
+            previous = self._entries.get(slot)
+        if previous is not None and previous.engine is engine and previous.size_key == key:
+            # No turn since the last estimate: the state has not changed.
+            size = previous.size_bytes
+        else:
+            size = estimate_engine_bytes(engine)
+        with self._lock:
+            previous = self._entries.pop(slot, None)
+            if previous is not None:
+                self._total_bytes -= previous.size_bytes
+            self._entries[slot] = _PoolEntry(engine, time.monotonic(), size, key)
+            self._total_bytes += size
+            self._evict_over_capacity(keep=slot)
+
+    def _evict_expired(self, now: float) -> None:
+        for slot in [
+            slot
+            for slot, entry in self._entries.items()
+            if now - entry.last_used > self.ttl_seconds
+        ]:
+            self._evict(slot)
+
+    def _evict_over_capacity(self, *, keep: str) -> None:
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_size
+            or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            self._evict(oldest)
+
+    def _evict(self, slot: str) -> None:
+        entry = self._entries.pop(slot)
+        self._total_bytes -= entry.size_bytes
+        self._evictions += 1
+
+
+def size_key(engine: GameEngine) -> Tuple[int, int]:
+    """Changes whenever an engine's size may have: on every turn or new state."""
+    return (id(engine.state), engine.turn)
+
+
+def estimate_engine_bytes(engine: GameEngine) -> int:
+    """Approximate resident size of an engine from its serialized state."""
+    size = len(dumps(engine.state.to_dict()).encode("utf-8"))
+    if engine.summary:
+        size += len(engine.summary.encode("utf-8"))
+    return size
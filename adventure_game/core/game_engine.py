@@ -1,18 +1,60 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
+import time
+from concurrent.futures import Future
+from contextlib import aclosing, closing
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict
-
-import yaml
-import json
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from . import prompts
+from .config_registry import load_config
+from .json_repair import loads_lenient
 from .llm_provider import base as provider_base
-from .summarizer import LogSummarizer
-from ..models.db_models import GameStateRepository
+from .llm_provider.cache import CachedLLMProvider
+from .llm_provider.factory import build_role_provider
+from .stream_parser import NarrationTextStream
+from .summarizer import LogSummarizer, empty_summary_tree, render_summary
+from ..models.db_models import slot_key
+from ..models.persistence import get_persister
+from ..models.state import GameState, TurnLogEntry, validate_narration
+from ..utils.metrics import REGISTRY, TurnTrace
 from ..utils.token_counter import count_tokens
 
+if TYPE_CHECKING:
+    from .prewarm import PrewarmWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CONTEXT_BUDGET = 8000
+# Turns rendered on the page; older ones are paged in from ``turn_log``.
+DEFAULT_HISTORY_WINDOW = 10
+# Cap on the in-memory log; reaching it triggers a summary, and only turns a
+# summary covers are dropped. Every turn stays on disk regardless.
+DEFAULT_MAX_LOG_ENTRIES = 50
+
+NARRATION_PARSES = REGISTRY.counter(
+    "adventure_narration_parses_total", "Narrator responses parsed, by outcome."
+)
+NARRATION_REPAIRS = REGISTRY.counter(
+    "adventure_narration_repairs_total", "Local JSON repairs applied to narrator output, by kind."
+)
+SUMMARIES = REGISTRY.counter(
+    "adventure_summaries_total", "Background summaries submitted, applied or failed."
+)
+
+
+@dataclass
+class _PendingSummary:
+    future: Future[Dict[str, Any]]
+    through_turn: int
+    submitted_turn: int
+    submitted_at: float
+
 
 class GameEngine:
     def __init__(
@@ -22,235 +64,593 @@ class GameEngine:
         db_path: Path,
         provider: str | None = None,
         slot: str = "default",
+        prewarm: Optional[PrewarmWorker] = None,
     ) -> None:
         self.config_path = config_path
         self.db_path = db_path
-        self.slot = slot
+        self.prewarm = prewarm
+        # Replaces the provider of every role, e.g. "fake" for offline runs.
+        self.provider_override = provider
 
         self.config = self._load_config()
+        self.game_name = self.config["game_name"]
+        self.player_slot = slot
+        # Storage key; the same player slot holds one save per game.
+        self.slot = slot_key(self.game_name, slot)
         self.hidden_lore = self.config.get("lore_seed", "The world holds secrets.")
 
-        narrator_provider = self.config["models"]["narrator"]["provider"]
-        lore_provider = self.config["models"]["lore_generator"]["provider"]
-        summary_provider = self.config["models"]["summarizer"]["provider"]
-
-        self.narrator = self._instantiate_provider(narrator_provider, "narrator")
-        self.lore_generator = self._instantiate_provider(lore_provider, "lore_generator")
+        self.narrator = self._instantiate_provider("narrator")
+        self.lore_generator = self._instantiate_provider("lore_generator")
 
-        self.repository = GameStateRepository(self.db_path)
+        self.persister = get_persister(self.db_path, **self.config.get("persistence", {}))
+        self.repository = self.persister.repository
 
-        persisted = self.repository.load(self.slot)
+        persisted = self.persister.load(self.slot, stat_names=self.config["stats"])
         if persisted:
-            self.state = persisted
-            self.summary = self.state.pop("summary", None)
+            self.state, self.summary = persisted
         else:
-            self.state = {
-                "world_state": "beginning",
-                "inventory": [],
-                "stats": {stat: 100 for stat in self.config["stats"]},
-                "npc_rel": {},
-                "log": [],
-            }
+            self.state = GameState.new(self.config["stats"])
             self.summary = None
 
         self.token_usage = 0
+        self.cached_tokens = 0
+        # Conversation returned by the previous narrator call, for providers
+        # that reuse it from their KV cache (Ollama); None starts afresh.
+        self.narrator_context: Optional[List[Dict[str, str]]] = None
+        self._last_sent_state: Optional[Dict[str, Any]] = None
+        self._pending_summary: Optional[_PendingSummary] = None
+        self.summary_metrics: Dict[str, Any] = {
+            "submitted": 0,
+            "applied": 0,
+            "failed": 0,
+            "in_flight": False,
+            "last_lag_turns": None,
+            "last_lag_seconds": None,
+            "max_lag_turns": 0,
+        }
+        self.parse_metrics: Dict[str, Any] = {
+            "responses": 0,
+            "repaired": 0,
+            "failed": 0,
+            "repairs": {},
+        }
 
+        if not persisted:
+            self._claim_prewarmed_bundle()
         self._bootstrap_hidden_lore()
+        summary_config = self.config["models"]["summarizer"]
         self.summarizer = LogSummarizer(
-            self._instantiate_provider(summary_provider, "summarizer")
+            self._instantiate_provider("summarizer"),
+            incremental=summary_config.get("incremental", True),
+            chapter_turns=summary_config.get("chapter_turns"),
+            max_chapters=summary_config.get("max_chapters", 5),
+        )
+        if self.summary and self.state.summary_tree is None:
+            # Saves from before rolling summaries only kept the flat text.
+            self.state.summary_tree = {**empty_summary_tree(), "current": self.summary}
+        self.context_budget = self.config["models"]["narrator"].get(
+            "context_budget", DEFAULT_CONTEXT_BUDGET
         )
+        history_config = self.config.get("history", {})
+        self.history_window = history_config.get("window", DEFAULT_HISTORY_WINDOW)
+        self.max_log_entries = history_config.get("max_in_memory", DEFAULT_MAX_LOG_ENTRIES)
         self._ensure_intro_narration()
         self.turn = self._infer_turn_counter()
+        self.context_usage = self._measure_context()
 
     def _load_config(self) -> Dict[str, Any]:
-        with open(self.config_path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        return load_config(self.config_path)
+
+    def _instantiate_provider(self, name: str) -> provider_base.BaseLLMProvider:
+        return build_role_provider(
+            self.config, name, db_path=self.db_path, provider=self.provider_override
+        )
 
-    def _instantiate_provider(self, provider: str, name: str) -> provider_base.BaseLLMProvider:
-        provider_cls = provider_base.get_provider(provider)
-        return provider_cls(self.config["models"][name]["create_params"])
+    def _claim_prewarmed_bundle(self) -> None:
+        if self.prewarm is None:
+            return
+        bundle = self.prewarm.pop()
+        if bundle is None:
+            return
+        self.hidden_lore = bundle["hidden_lore"]
+        self.state = GameState.from_dict(bundle["state"], self.config["stats"])
+        self.state.hidden_lore = self.hidden_lore
+        self.state.log = [TurnLogEntry(turn=0, player="", narrator=bundle["intro"])]
+        self.token_usage += bundle["tokens"]
+        self._persist()
 
     def _bootstrap_hidden_lore(self) -> None:
-        if self.state.get("hidden_lore"):
-            self.hidden_lore = self.state["hidden_lore"]
+        if self.state.hidden_lore:
+            self.hidden_lore = self.state.hidden_lore
             return
 
-        story_size = self.config["story_size"]
-        npcs = self.config["npcs"]
-        items = self.config["items"]
-        prompt = (
-            f"Expand the following seed into a rich hidden lore and story of ({story_size} words).\n"
-            f"The story must focus on the protagonist (the user)'s journey.\n"
-            f"The story should have a plot twist.\n"
-            f"The story should include a maximum of {npcs} NPCs and {items} items.\n"
-            f"The story must have a final boss, and the player must defeat it to win.\n"
-            "Focus on mood, mystery, and stakes.\n"
-            f"Seed: {self.hidden_lore}"
-        )
-        try:
-            system_prompt = f"You craft hidden lore for a narrative game in the {self.config['language']} language."
-            response = self.lore_generator.generate(
-                system_prompt=system_prompt,
-                user_prompt=prompt,
-                context=None,
-            )
-            self.hidden_lore = response["text"].strip() or self.hidden_lore
-        except Exception as e:
-            print("Failed to generate hidden lore:", e)
-            # Fall back to seed on failure
-            pass
-        self.state["hidden_lore"] = self.hidden_lore
+        self.hidden_lore = generate_hidden_lore(self.config, self.lore_generator)
+        self.state.hidden_lore = self.hidden_lore
 
     def process_turn(self, player_input: str) -> Dict[str, Any]:
+        with TurnTrace("turn", slot=self.slot, mode="sync") as trace:
+            player_input, system_prompt, user_prompt = self._prepare_turn(player_input, trace)
+
+            context = self.narrator_context
+            try:
+                with trace.stage("narrator"):
+                    narration = self.narrator.generate(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        context=context,
+                    )
+            except Exception as exc:
+                raise RuntimeError(f"Narrator failed: {exc}") from exc
+
+            return self._complete_turn(player_input, system_prompt, user_prompt, narration, trace)
+
+    def process_turn_stream(self, player_input: str) -> Iterator[Dict[str, Any]]:
+        """Stream a turn as events: ``narration`` deltas, then one ``done``."""
+        with TurnTrace("turn", slot=self.slot, mode="stream") as trace:
+            player_input, system_prompt, user_prompt = self._prepare_turn(player_input, trace)
+
+            context = self.narrator_context
+            text_stream = NarrationTextStream()
+            chunks: list[str] = []
+            usage: Dict[str, Any] = {}
+            next_context = None
+            try:
+                # Includes the time the client takes to read each delta. If the
+                # client goes away mid-turn, closing this generator closes the
+                # provider stream too, so the backend stops generating.
+                with trace.stage("narrator"), closing(
+                    self.narrator.generate_stream(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        context=context,
+                    )
+                ) as stream:
+                    for chunk in stream:
+                        chunks.append(chunk["text"])
+                        usage = chunk.get("usage") or usage
+                        next_context = chunk.get("context") or next_context
+                        delta = text_stream.feed(chunk["text"])
+                        if delta:
+                            yield {"event": "narration", "text": delta}
+            except Exception as exc:
+                raise RuntimeError(f"Narrator failed: {exc}") from exc
+
+            narration = provider_base.LLMResponse(
+                text="".join(chunks), usage=usage, context=next_context
+            )
+            result = self._complete_turn(player_input, system_prompt, user_prompt, narration, trace)
+        yield {"event": "done", **result}
+
+    async def aprocess_turn(self, player_input: str) -> Dict[str, Any]:
+        """``process_turn`` for an event loop: the narrator call is awaited.
+
+        Prompt building runs inline; completing the turn (parsing, token
+        counting, persistence) runs on a worker thread, off the loop.
+        """
+        with TurnTrace("turn", slot=self.slot, mode="async") as trace:
+            player_input, system_prompt, user_prompt = self._prepare_turn(player_input, trace)
+
+            context = self.narrator_context
+            try:
+                with trace.stage("narrator"):
+                    narration = await self.narrator.agenerate(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        context=context,
+                    )
+            except Exception as exc:
+                raise RuntimeError(f"Narrator failed: {exc}") from exc
+
+            return await _off_loop(
+                self._complete_turn, player_input, system_prompt, user_prompt, narration, trace
+            )
+
+    async def aprocess_turn_stream(self, player_input: str) -> AsyncIterator[Dict[str, Any]]:
+        """Async ``process_turn_stream``: ``narration`` deltas, then one ``done``."""
+        with TurnTrace("turn", slot=self.slot, mode="async_stream") as trace:
+            player_input, system_prompt, user_prompt = self._prepare_turn(player_input, trace)
+
+            context = self.narrator_context
+            text_stream = NarrationTextStream()
+            chunks: list[str] = []
+            usage: Dict[str, Any] = {}
+            next_context = None
+            try:
+                with trace.stage("narrator"):
+                    async with aclosing(
+                        self.narrator.agenerate_stream(
+                            system_prompt=system_prompt,
+                            user_prompt=user_prompt,
+                            context=context,
+                        )
+                    ) as stream:
+                        async for chunk in stream:
+                            chunks.append(chunk["text"])
+                            usage = chunk.get("usage") or usage
+                            next_context = chunk.get("context") or next_context
+                            delta = text_stream.feed(chunk["text"])
+                            if delta:
+                                yield {"event": "narration", "text": delta}
+            except Exception as exc:
+                raise RuntimeError(f"Narrator failed: {exc}") from exc
+
+            narration = provider_base.LLMResponse(
+                text="".join(chunks), usage=usage, context=next_context
+            )
+            result = await _off_loop(
+                self._complete_turn, player_input, system_prompt, user_prompt, narration, trace
+            )
+        yield {"event": "done", **result}
+
+    def _prepare_turn(self, player_input: str, trace: TurnTrace) -> Tuple[str, str, str]:
         player_input = player_input.strip()
         if not player_input:
             raise ValueError("Player input cannot be empty")
 
         self.turn += 1
-
+        with trace.stage("summary_apply"):
+            self._apply_pending_summary()
+
+        # Only a narrator that keeps the previous turn in its context can
+        # work from a diff; stateless calls always get the full state.
+        changes_only = self.narrator_context is not None and self._last_sent_state is not None
+        with trace.stage("prompt_build"):
+            system_prompt, user_prompt = self._build_prompts(player_input, changes_only=changes_only)
+            self._last_sent_state = self.state.narrator_view()
+        return player_input, system_prompt, user_prompt
+
+    def _build_prompts(
+        self, player_input: str, *, changes_only: bool = False
+    ) -> Tuple[str, str]:
         system_prompt = prompts.build_system_prompt(self.config, self.hidden_lore)
+        game_state = self.state.narrator_view()
+        if changes_only:
+            game_state = prompts.diff_state(self._last_sent_state or {}, game_state)
         user_prompt = prompts.build_user_prompt(
             player_input=player_input,
-            game_state={k: v for k, v in self.state.items() if k != "log"},
-            log_history=self.state.get("log", []),
+            game_state=game_state,
+            log_history=self.state.log,
             summary=self.summary,
+            changes_only=changes_only,
         )
+        return system_prompt, user_prompt
 
-        context = None
-        try:
-            narration = self.narrator.generate(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                context=context,
-            )
-        except Exception as exc:
-            raise RuntimeError(f"Narrator failed: {exc}") from exc
+    def _measure_context(self) -> Dict[str, Any]:
+        """Size of the prompt the next turn would send, against the budget."""
+        prompt_tokens = count_tokens(self._build_prompts(""))
+        return {
+            "prompt_tokens": prompt_tokens,
+            "budget": self.context_budget,
+            "utilization": round(prompt_tokens / self.context_budget, 3),
+        }
 
-        try:
-            narrator_json = json.loads(narration["text"].strip())
-            narrator_text = narrator_json["text"]
-            self.state["stats"] = narrator_json["stats"]
-            self.state["inventory"] = narrator_json["inventory"]
-            self.state["npc_rel"] = narrator_json["npc_rel"]
-            self.state["world_state"] = narrator_json["world_state"]
-            if self.state["stats"].get("health", 100) < 1:
-                self.state["world_state"] = "game_over"
-            if self.state["stats"].get("sanity", 100) < 1:
-                self.state["world_state"] = "game_over"
-        except Exception as exc:
-            raise RuntimeError(f"Failed to parse narrator response: {exc}") from exc
+    def _complete_turn(
+        self,
+        player_input: str,
+        system_prompt: str,
+        user_prompt: str,
+        narration: provider_base.LLMResponse,
+        trace: TurnTrace,
+    ) -> Dict[str, Any]:
+        self.parse_metrics["responses"] += 1
+        with trace.stage("parse"):
+            try:
+                narrator_json, repairs = parse_narration(narration["text"])
+            except ValueError as exc:
+                self.parse_metrics["failed"] += 1
+                NARRATION_PARSES.inc(outcome="failed")
+                raise RuntimeError(f"Failed to parse narrator response: {exc}") from exc
+            if repairs:
+                self.parse_metrics["repaired"] += 1
+                for repair in repairs:
+                    self.parse_metrics["repairs"][repair] = self.parse_metrics["repairs"].get(repair, 0) + 1
+                    NARRATION_REPAIRS.inc(kind=repair)
+                logger.warning("Repaired narrator JSON (%s) for slot %s", ", ".join(repairs), self.slot)
+            NARRATION_PARSES.inc(outcome="repaired" if repairs else "ok")
+            apply_state_delta(self.state, narrator_json)
+        narrator_text = narrator_json["text"]
         usage = narration.get("usage", {})
 
-        self.token_usage += usage.get("total_tokens", count_tokens([system_prompt, user_prompt, narrator_text]))
-
-        log_entry = {
-            "turn": self.turn,
-            "player": player_input,
-            "narrator": narrator_text,
-        }
-        self.state.setdefault("log", []).append(log_entry)
+        if "total_tokens" in usage:
+            self.token_usage += usage["total_tokens"]
+        else:
+            with trace.stage("tokenize"):
+                self.token_usage += count_tokens([system_prompt, user_prompt, narrator_text])
+        self.cached_tokens += usage.get("cached_tokens", 0)
+        next_context = narration.get("context")
+        # Drop the conversation once it outgrows the budget; the next call
+        # starts again from the (cacheable) static prefix.
+        if next_context and (
+            count_tokens([message["content"] for message in next_context]) < self.context_budget
+        ):
+            self.narrator_context = next_context
+        else:
+            self.narrator_context = None
+
+        log = self.state.log
+        log.append(TurnLogEntry(turn=self.turn, player=player_input, narrator=narrator_text))
+        if len(log) > self.max_log_entries:
+            # Only turns a summary already covers may go (all of them stay in
+            # turn_log); the rest wait for the summary the cap triggers below.
+            covered = (self.state.summary_tree or {}).get("through_turn", 0)
+            excess = len(log) - self.max_log_entries
+            drop = 0
+            while drop < excess and log[drop].turn <= covered:
+                drop += 1
+            del log[:drop]
 
         # self._update_stats(player_input, narrator_text)
-        self._maybe_summarize()
-        self._persist()
+        with trace.stage("tokenize"):
+            self.context_usage = self._measure_context()
+        with trace.stage("summarize"):
+            self._maybe_summarize()
+        with trace.stage("persist"):
+            self._persist()
 
         return {
             "narration": narrator_text,
             "state": self.state,
             "tokens": self.token_usage,
             "summary": self.summary,
+            "context": self.context_usage,
+            "usage": usage,
         }
 
     def _maybe_summarize(self) -> None:
-        log = self.state.get("log", [])
-        if not log:
+        log = self.state.log
+        if not log or self._pending_summary is not None:
             return
 
         if not self.summarizer.should_summarize(
-            total_tokens=self.token_usage, turn_count=len(log)
+            prompt_tokens=self.context_usage["prompt_tokens"],
+            budget=self.context_budget,
+            turn_count=len(log),
+            max_turns=self.max_log_entries,
         ):
             return
 
-        summary_text = self.summarizer.summarize(log)
-        self.summary = summary_text
-        # keep only last two log entries post-summary
-        self.state["log"] = log[-2:]
+        # Runs after this turn is returned; swapped in by a later turn.
+        self._pending_summary = _PendingSummary(
+            future=self.summarizer.submit(log, self.state.summary_tree),
+            through_turn=log[-1].turn,
+            submitted_turn=self.turn,
+            submitted_at=time.monotonic(),
+        )
+        self.summary_metrics["submitted"] += 1
+        self.summary_metrics["in_flight"] = True
+        SUMMARIES.inc(outcome="submitted")
+
+    def _apply_pending_summary(self) -> None:
+        pending = self._pending_summary
+        if pending is None or not pending.future.done():
+            return
+        self._pending_summary = None
+        self.summary_metrics["in_flight"] = False
+        try:
+            summary_tree = pending.future.result()
+        except Exception as exc:
+            logger.warning("Summarization failed for slot %s: %s", self.slot, exc)
+            self.summary_metrics["failed"] += 1
+            SUMMARIES.inc(outcome="failed")
+            return
+
+        log = self.state.log
+        summarized = [e for e in log if e.turn <= pending.through_turn]
+        arrived = [e for e in log if e.turn > pending.through_turn]
+        # keep the last two summarized entries, plus turns played meanwhile
+        self.state.log = summarized[-2:] + arrived
+        self.state.summary_tree = summary_tree
+        self.summary = render_summary(summary_tree)
+        # The conversation still holds the pre-summary history.
+        self.narrator_context = None
+
+        lag_turns = self.turn - pending.submitted_turn
+        self.summary_metrics["applied"] += 1
+        SUMMARIES.inc(outcome="applied")
+        self.summary_metrics["last_lag_turns"] = lag_turns
+        self.summary_metrics["last_lag_seconds"] = round(
+            time.monotonic() - pending.submitted_at, 3
+        )
+        self.summary_metrics["max_lag_turns"] = max(
+            self.summary_metrics["max_lag_turns"], lag_turns
+        )
 
     def _persist(self) -> None:
-        self.repository.save(self.slot, game_state=self.state, summary=self.summary)
+        self.persister.save(self.slot, game_state=self.state, summary=self.summary)
+
+    def flush(self) -> None:
+        """Write any queued save of this game now."""
+        self.persister.flush(self.slot)
+
+    def is_current(self) -> bool:
+        """False once another process has saved this game since we loaded it."""
+        return self.persister.is_current(self.slot)
+
+    def history(self, *, before: Optional[int] = None, limit: int = 20) -> List[TurnLogEntry]:
+        """A page of past turns read from disk, oldest first."""
+        self.flush()
+        return self.repository.load_history(self.slot, before=before, limit=limit)
 
     def get_ui_state(self) -> Dict[str, Any]:
+        log = self.state.log[-self.history_window :]
         return {
             "turn": self.turn,
-            "stats": self.state.get("stats", {}),
-            "inventory": self.state.get("inventory", []),
-            "npc_rel": self.state.get("npc_rel", {}),
-            "world_state": self.state.get("world_state", {}),
-            "log": self.state.get("log", []),
+            "stats": self.state.stats,
+            "inventory": self.state.inventory,
+            "npc_rel": self.state.npc_rel,
+            "world_state": self.state.world_state,
+            "log": log,
+            # Cursor for /history; None once the first turn is on the page.
+            "log_before": log[0].turn if log and log[0].turn > 0 else None,
             "summary": self.summary,
             "tokens": self.token_usage,
+            "cached_tokens": self.cached_tokens,
+            "context": self.context_usage,
+            "summary_metrics": {**self.summary_metrics, **self.summarizer.stats},
+            "parse_metrics": self._parse_report(),
+            "cache": self._cache_report(),
         }
 
+    def _parse_report(self) -> Dict[str, Any]:
+        responses = max(1, self.parse_metrics["responses"])
+        return {
+            **self.parse_metrics,
+            "repair_rate": round(self.parse_metrics["repaired"] / responses, 3),
+            "failure_rate": round(self.parse_metrics["failed"] / responses, 3),
+        }
+
+    def _cache_report(self) -> Dict[str, Any]:
+        for provider in (self.narrator, self.lore_generator, self.summarizer.provider):
+            if isinstance(provider, CachedLLMProvider):
+                return provider.cache.report()
+        return {}
+
     def _ensure_intro_narration(self) -> None:
-        log = self.state.setdefault("log", [])
-        if log:
+        if self.state.log:
             return
 
-        system_prompt = prompts.build_system_prompt(self.config, self.hidden_lore)
-        game_snapshot = {k: v for k, v in self.state.items() if k != "log"}
+        with TurnTrace("intro", slot=self.slot) as trace:
+            intro_text, tokens = generate_intro(
+                self.config, self.narrator, self.state, self.hidden_lore, trace=trace
+            )
+            self.token_usage += tokens
+
+            self.state.log.append(TurnLogEntry(turn=0, player="", narrator=intro_text))
+            with trace.stage("persist"):
+                self._persist()
+
+    def _infer_turn_counter(self) -> int:
+        return max((entry.turn for entry in self.state.log), default=0)
+
+
+async def _off_loop(func: Any, *args: Any) -> Any:
+    """Run ``func`` on a worker thread.
+
+    A thread cannot be cancelled, so when the caller is, this still waits for
+    ``func`` to return before re-raising; the engine lease is only released
+    once nothing else is touching the engine.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait({future})
+        raise
+
+
+def generate_hidden_lore(
+    config: Dict[str, Any],
+    lore_generator: provider_base.BaseLLMProvider,
+    *,
+    fallback: bool = True,
+) -> str:
+    """Generate the hidden lore, falling back to the config's seed.
+
+    With ``fallback=False`` a failed or empty generation raises instead.
+    """
+    seed = config.get("lore_seed", "The world holds secrets.")
+    try:
+        response = lore_generator.generate(
+            system_prompt=prompts.build_lore_system_prompt(config),
+            user_prompt=prompts.build_lore_prompt(config, seed),
+            context=None,
+        )
+        lore = response["text"].strip()
+        if not lore:
+            raise ValueError("the lore generator returned no text")
+        return lore
+    except Exception as exc:
+        if not fallback:
+            raise
+        logger.warning("Failed to generate hidden lore, using the seed: %s", exc)
+        return seed
+
+
+def generate_intro(
+    config: Dict[str, Any],
+    narrator: provider_base.BaseLLMProvider,
+    state: GameState,
+    hidden_lore: str,
+    *,
+    trace: Optional[TurnTrace] = None,
+) -> Tuple[str, int]:
+    """Narrate the opening beat, applying its state changes to ``state``.
+
+    Returns the intro text and the tokens spent on it. Stage timings go to
+    ``trace`` when given, otherwise to a trace of their own.
+    """
+    if trace is None:
+        with TurnTrace("intro") as trace:
+            return generate_intro(config, narrator, state, hidden_lore, trace=trace)
+
+    with trace.stage("prompt_build"):
+        system_prompt = prompts.build_system_prompt(config, hidden_lore)
         user_prompt = prompts.build_intro_prompt(
-            config=self.config,
-            game_state=game_snapshot,
-            hidden_lore=self.hidden_lore,
+            config=config,
+            game_state=state.narrator_view(),
+            hidden_lore=hidden_lore,
         )
 
-        intro_text = "An uneasy hush hangs in the air."
-        usage: Dict[str, Any] = {}
-        try:
-            narration = self.narrator.generate(
+    intro_text = "An uneasy hush hangs in the air."
+    usage: Dict[str, Any] = {}
+    try:
+        with trace.stage("narrator"):
+            narration = narrator.generate(
                 system_prompt=system_prompt,
                 user_prompt=user_prompt,
                 context=None,
             )
-            usage = narration.get("usage", {})
-        except Exception as exc:  # pragma: no cover - defensive guard
-            print(f"Intro narration failed, falling back: {exc}")
-        try:
-            narrator_json = json.loads(narration["text"].strip())
-            intro_text = narrator_json["text"]
-            self.state["stats"] = narrator_json["stats"]
-            self.state["inventory"] = narrator_json["inventory"]
-            self.state["npc_rel"] = narrator_json["npc_rel"]
-            self.state["world_state"] = narrator_json["world_state"]
-            if self.state["stats"].get("health", 100) < 1:
-                self.state["world_state"] = "game_over"
-            if self.state["stats"].get("sanity", 100) < 1:
-                self.state["world_state"] = "game_over"
-        except Exception as exc:
-            raise RuntimeError(f"Failed to parse narrator response: {exc}") from exc
-        self.token_usage += usage.get(
-            "total_tokens",
-            count_tokens([system_prompt, user_prompt, intro_text]),
-        )
-
-        log.append(
-            {
-                "turn": 0,
-                "player": "",
-                "narrator": intro_text,
-            }
-        )
-        self._persist()
-
-    def _infer_turn_counter(self) -> int:
-        log = self.state.get("log", [])
-        if not log:
-            return 0
-
-        max_turn = 0
-        for idx, entry in enumerate(log, start=1):
-            if isinstance(entry, dict) and isinstance(entry.get("turn"), int):
-                max_turn = max(max_turn, entry["turn"])
-            else:
-                max_turn = max(max_turn, idx)
-        return max_turn
+        usage = narration.get("usage", {})
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("Intro narration failed, falling back: %s", exc)
+    try:
+        with trace.stage("parse"):
+            intro_text = apply_narration(state, narration["text"])
+    except Exception as exc:
+        raise RuntimeError(f"Failed to parse narrator response: {exc}") from exc
+    if "total_tokens" in usage:
+        return intro_text, usage["total_tokens"]
+    with trace.stage("tokenize"):
+        return intro_text, count_tokens([system_prompt, user_prompt, intro_text])
+
+
+def parse_narration(raw_text: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Parse and validate a narrator response, repairing it locally if needed.
+
+    Returns the validated payload and the repairs applied. Raises
+    ``ValueError`` when the response cannot be salvaged.
+    """
+    payload, repairs = loads_lenient(raw_text)
+    return validate_narration(payload), repairs
+
+
+def apply_narration(state: GameState, raw_text: str) -> str:
+    """Validate the narrator's JSON, apply its delta to ``state`` and return its text."""
+    narrator_json, _ = parse_narration(raw_text)
+    apply_state_delta(state, narrator_json)
+    return narrator_json["text"]
+
+
+def apply_state_delta(state: GameState, delta: Dict[str, Any]) -> None:
+    """Merge a validated narrator delta into ``state``.
+
+    Full ``inventory`` lists and complete ``stats``/``npc_rel`` maps are still
+    accepted, so older-style responses apply the same way.
+    """
+    state.stats.update(delta.get("stats") or {})
+    state.npc_rel.update(delta.get("npc_rel") or {})
+    if "inventory" in delta:
+        state.inventory = list(delta["inventory"])
+    else:
+        removed = delta.get("inventory_remove") or []
+        inventory = [item for item in state.inventory if item not in removed]
+        for item in delta.get("inventory_add") or []:
+            if item not in inventory:
+                inventory.append(item)
+        state.inventory = inventory
+    if delta.get("world_state"):
+        state.world_state = delta["world_state"]
+    if state.stats.get("health", 100) < 1:
+        state.world_state = "game_over"
+    if state.stats.get("sanity", 100) < 1:
+        state.world_state = "game_over"
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Tuple
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```\s*$")
+
+# How many times a truncated object is cut back to an earlier comma.
+_MAX_CUTS = 8
+
+
+def loads_lenient(text: str) -> Tuple[Any, List[str]]:
+    """Parse model output as JSON, repairing common damage locally.
+
+    Returns the parsed value and the repairs that were needed (empty when the
+    text was valid JSON). Handles code fences, prose around the object,
+    trailing commas and objects truncated mid-way. Raises ``ValueError`` when
+    nothing usable is left.
+    """
+    text = text.strip()
+    try:
+        return json.loads(text), []
+    except ValueError:
+        pass
+
+    repairs: List[str] = []
+    if text.startswith("```"):
+        text = _FENCE.sub("", text).strip()
+        repairs.append("code_fence")
+
+    start = text.find("{")
+    if start == -1:
+        if not text:
+            raise ValueError("empty response")
+        # No object at all: keep the prose as narration with no state change.
+        return {"text": text}, repairs + ["prose"]
+    end = _matching_close(text, start)
+    if end == -1:
+        # Truncated: everything after the opening brace goes to the repair below.
+        if start > 0:
+            text = text[start:]
+            repairs.append("surrounding_text")
+    elif start > 0 or text[end + 1 :].strip():
+        text = text[start : end + 1]
+        repairs.append("surrounding_text")
+
+    cleaned = _strip_trailing_commas(text)
+    if cleaned != text:
+        text = cleaned
+        repairs.append("trailing_comma")
+    try:
+        return json.loads(text), repairs
+    except ValueError:
+        pass
+
+    candidate = text
+    for attempt in range(_MAX_CUTS):
+        # A number or literal cut short may parse but mean something else
+        # ("9" for "95"), so drop it rather than close after it. Values
+        # before a comma are complete.
+        if attempt > 0 or not _ends_mid_scalar(candidate):
+            try:
+                return json.loads(_strip_trailing_commas(_close(candidate))), repairs + ["truncated"]
+            except ValueError:
+                pass
+        cut = _last_comma(candidate)
+        if cut <= 0:
+            break
+        candidate = candidate[:cut]
+    raise ValueError("could not repair narrator JSON")
+
+
+def _scan(text: str):
+    """Yield ``(index, char, in_string)`` for every character of ``text``."""
+    in_string = False
+    escaped = False
+    for idx, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                yield idx, ch, True
+                continue
+            yield idx, ch, True
+        else:
+            if ch == '"':
+                in_string = True
+            yield idx, ch, in_string
+
+
+def _strip_trailing_commas(text: str) -> str:
+    out: List[str] = []
+    pending_comma = -1
+    for idx, ch, in_string in _scan(text):
+        if not in_string:
+            if ch == ",":
+                pending_comma = len(out)
+            elif ch in "}]" and pending_comma != -1:
+                del out[pending_comma]
+                pending_comma = -1
+            elif not ch.isspace():
+                pending_comma = -1
+        else:
+            pending_comma = -1
+        out.append(ch)
+    return "".join(out)
+
+
+def _matching_close(text: str, start: int) -> int:
+    """Index of the brace closing the object opened at ``start``, or -1."""
+    depth = 0
+    for idx, ch, in_string in _scan(text[start:]):
+        if in_string:
+            continue
+        if ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return start + idx if ch == "}" else -1
+    return -1
+
+
+def _close(text: str) -> str:
+    """Terminate an open string and close every open bracket.
+
+    Only the top-level ``text`` may end in a string cut short: anywhere else
+    (an inventory item, a map key or value) a partial string would be taken
+    as real, so it is dropped together with its key.
+    """
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    string_start = -1
+    last_string = (-1, -1)
+    for idx, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                last_string = (string_start, idx)
+        elif ch == '"':
+            in_string = True
+            string_start = idx
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    if in_string:
+        before = text[:string_start].rstrip()
+        key = None
+        if before.endswith(":") and last_string[0] != -1:
+            key = json.loads(text[last_string[0] : last_string[1] + 1])
+        if key == "text" and len(stack) == 1:
+            if escaped:
+                text = text[:-1]
+            text += '"'
+        elif key is not None:
+            text = text[: last_string[0]]
+        else:
+            text = before
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+
+def _ends_mid_scalar(text: str) -> bool:
+    stripped = text.rstrip()
+    if not stripped:
+        return False
+    in_string = False
+    for _, _, in_string in _scan(stripped):
+        pass
+    return not in_string and (stripped[-1].isalnum() or stripped[-1] in ".-+")
+
+
+def _last_comma(text: str) -> int:
+    last = -1
+    for idx, ch, in_string in _scan(text):
+        if ch == "," and not in_string:
+            last = idx
+    return last
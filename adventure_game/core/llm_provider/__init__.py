@@ -1,13 +1,30 @@
 """LLM provider factory and registrations."""
 
 from .base import BaseLLMProvider, LLMResponse, get_provider, register_provider
+from .cache import CachedLLMProvider, ResponseCache, get_response_cache
+from .factory import build_role_provider, get_provider_instance
+from .limits import ConcurrencyLimit, LimitedProvider
+from .recording import RecordingProvider, ReplayMismatchError, ReplayProvider
+from .router import CircuitBreaker, ProviderRouter
 
 # Side-effect imports to populate registry
-from . import openai_llm, ollama_llm  # noqa: F401
+from . import fake_llm, openai_llm, ollama_llm  # noqa: F401
 
 __all__ = [
     "BaseLLMProvider",
+    "CachedLLMProvider",
+    "CircuitBreaker",
+    "ConcurrencyLimit",
     "LLMResponse",
+    "LimitedProvider",
+    "ProviderRouter",
+    "RecordingProvider",
+    "ReplayMismatchError",
+    "ReplayProvider",
+    "ResponseCache",
+    "build_role_provider",
     "get_provider",
+    "get_provider_instance",
+    "get_response_cache",
     "register_provider",
 ]
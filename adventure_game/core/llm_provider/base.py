@@ -1,7 +1,15 @@
 from __future__ import annotations
 
 import abc
-from typing import Any, Dict, Optional
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+from .clients import DEFAULT_SETTINGS, ClientSettings
+
+# Either an extra textual context block or, for chat providers that keep the
+# conversation in their KV cache, the earlier messages returned by the
+# previous call.
+LLMContext = Union[str, List[Dict[str, str]]]
 
 
 class LLMResponse(dict):
@@ -9,13 +17,32 @@ class LLMResponse(dict):
 
     text: str  # type: ignore[assignment]
     usage: Dict[str, Any]  # type: ignore[assignment]
+    context: Optional[List[Dict[str, str]]]  # type: ignore[assignment]
 
 
 class BaseLLMProvider(abc.ABC):
-    """Abstract interface for narration providers."""
+    """Abstract interface for narration providers.
+
+    ``http`` holds the pool size and timeout for providers that talk to a
+    server through the pooled clients in ``clients``.
+    """
 
-    def __init__(self, create_params: Dict[str, Any]) -> None:
+    def __init__(
+        self, create_params: Dict[str, Any], *, http: ClientSettings = DEFAULT_SETTINGS
+    ) -> None:
         self.create_params = create_params
+        self.http = http
+
+    @classmethod
+    def structured_output_params(
+        cls, create_params: Dict[str, Any], schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """``create_params`` asking for JSON output matching ``schema``.
+
+        ``schema`` is None for plain JSON mode. Providers without native
+        support return the params unchanged and rely on lenient parsing.
+        """
+        return create_params
 
     @abc.abstractmethod
     def generate(
@@ -23,10 +50,81 @@ class BaseLLMProvider(abc.ABC):
         *,
         system_prompt: str,
         user_prompt: str,
-        context: Optional[str] = None,
+        context: Optional[LLMContext] = None,
     ) -> LLMResponse:
         """Generate a narration block."""
 
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        """Yield narration deltas as they arrive.
+
+        Each chunk carries a ``text`` delta; the final chunk carries ``usage``.
+        Providers without native streaming emit the full response as one chunk.
+        """
+        yield self.generate(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            context=context,
+        )
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        """Async ``generate``.
+
+        Providers with an async client override this; the default runs the
+        blocking call on a worker thread so the event loop stays free.
+        """
+        return await asyncio.to_thread(
+            lambda: self.generate(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+        )
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        """Async ``generate_stream``; by default pulls the blocking stream on a worker thread."""
+        stream = self.generate_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        )
+        async for chunk in iterate_in_thread(stream):
+            yield chunk
+
+
+_DONE = object()
+
+
+async def iterate_in_thread(iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """Consume a blocking iterator one item per worker-thread hop."""
+    try:
+        while True:
+            item = await asyncio.to_thread(next, iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # Cancelled while a worker thread is still inside next().
+                pass
+
 
 PROVIDER_REGISTRY: Dict[str, type[BaseLLMProvider]] = {}
 
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+from .base import BaseLLMProvider, LLMContext, LLMResponse
+from ...models.db_models import connection, ensure_schema, transaction
+from ...utils.metrics import REGISTRY
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    key TEXT PRIMARY KEY,
+    response_json TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_used ON llm_response_cache (last_used_at);
+"""
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "adventure_llm_cache_lookups_total", "Response cache lookups by role and result."
+)
+
+# How many writes between sweeps of expired / excess rows on disk.
+PRUNE_EVERY = 64
+
+
+class ResponseCache:
+    """Two-level cache of provider responses: in-memory LRU over SQLite."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        max_entries: int = 512,
+        max_rows: int = 10_000,
+        max_ttl_seconds: float = 7 * 24 * 3600,
+    ) -> None:
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.max_ttl_seconds = max_ttl_seconds
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        ensure_schema(self.db_path, "llm_response_cache", SCHEMA)
+
+    def get(self, key: str, *, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                if now - hit[0] <= ttl_seconds:
+                    self._memory.move_to_end(key)
+                    return hit[1]
+                del self._memory[key]
+
+        with connection(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT response_json, created_at FROM llm_response_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or now - row[1] > ttl_seconds:
+                return None
+            conn.execute(
+                "UPDATE llm_response_cache SET last_used_at = ? WHERE key = ?", (now, key)
+            )
+        response = json.loads(row[0])
+        self._remember(key, row[1], response)
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        now = time.time()
+        self._remember(key, now, response)
+        with transaction(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO llm_response_cache (key, response_json, created_at, last_used_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    response_json = excluded.response_json,
+                    created_at = excluded.created_at,
+                    last_used_at = excluded.last_used_at
+                """,
+                (key, json.dumps(response), now, now),
+            )
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % PRUNE_EVERY == 0
+            if prune:
+                conn.execute(
+                    "DELETE FROM llm_response_cache WHERE created_at < ?",
+                    (now - self.max_ttl_seconds,),
+                )
+                conn.execute(
+                    """
+                    DELETE FROM llm_response_cache WHERE key IN (
+                        SELECT key FROM llm_response_cache
+                        ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_rows,),
+                )
+
+    def record(self, role: str, *, hit: bool, saved_tokens: int = 0) -> None:
+        with self._lock:
+            stats = self.stats.setdefault(role, {"hits": 0, "misses": 0, "saved_tokens": 0})
+            stats["hits" if hit else "misses"] += 1
+            stats["saved_tokens"] += saved_tokens
+        CACHE_LOOKUPS.inc(role=role, result="hit" if hit else "miss")
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                role: {
+                    **stats,
+                    "hit_rate": round(stats["hits"] / max(1, stats["hits"] + stats["misses"]), 3),
+                }
+                for role, stats in self.stats.items()
+            }
+
+    def _remember(self, key: str, created_at: float, response: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = (created_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+_CACHES: Dict[str, ResponseCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_response_cache(db_path: Path) -> ResponseCache:
+    """Process-wide cache per database, shared by every engine and role."""
+    with _CACHES_LOCK:
+        cache = _CACHES.get(str(db_path))
+        if cache is None:
+            cache = _CACHES[str(db_path)] = ResponseCache(db_path)
+        return cache
+
+
+class CachedLLMProvider(BaseLLMProvider):
+    """Serves repeated identical requests from a ``ResponseCache``.
+
+    ``validate`` is called on a fresh response's text before it is stored;
+    if it raises ``ValueError`` the response is still returned but never
+    cached, so a retry reaches the provider again instead of replaying it.
+    """
+
+    def __init__(
+        self,
+        inner: BaseLLMProvider,
+        *,
+        provider_name: str,
+        role: str,
+        cache: ResponseCache,
+        ttl_seconds: float = 3600,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> None:
+        super().__init__(inner.create_params)
+        self.inner = inner
+        self.provider_name = provider_name
+        self.role = role
+        self.cache = cache
+        self.ttl_seconds = ttl_seconds
+        self.validate = validate
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        key = self._key(system_prompt, user_prompt, context)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.inner.generate(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        )
+        self._store(key, dict(response))
+        return response
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        key = self._key(system_prompt, user_prompt, context)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks: list[str] = []
+        usage: Dict[str, Any] = {}
+        next_context = None
+        for chunk in self.inner.generate_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        ):
+            chunks.append(chunk["text"])
+            usage = chunk.get("usage") or usage
+            next_context = chunk.get("context") or next_context
+            yield chunk
+        # Only reached when the stream was consumed to the end.
+        self._store(key, {"text": "".join(chunks), "usage": usage, "context": next_context})
+
+    # SQLite lookups and writes stay synchronous: they are local and short
+    # next to the provider call they save.
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        key = self._key(system_prompt, user_prompt, context)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.inner.agenerate(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        )
+        self._store(key, dict(response))
+        return response
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        key = self._key(system_prompt, user_prompt, context)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks: list[str] = []
+        usage: Dict[str, Any] = {}
+        next_context = None
+        async for chunk in self.inner.agenerate_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        ):
+            chunks.append(chunk["text"])
+            usage = chunk.get("usage") or usage
+            next_context = chunk.get("context") or next_context
+            yield chunk
+        self._store(key, {"text": "".join(chunks), "usage": usage, "context": next_context})
+
+    def _store(self, key: str, response: Dict[str, Any]) -> None:
+        if self.validate is not None:
+            try:
+                self.validate(response["text"])
+            except ValueError:
+                return
+        self.cache.put(key, response)
+
+    def _lookup(self, key: str) -> Optional[LLMResponse]:
+        cached = self.cache.get(key, ttl_seconds=self.ttl_seconds)
+        if cached is None:
+            self.cache.record(self.role, hit=False)
+            return None
+        usage = cached.get("usage") or {}
+        self.cache.record(self.role, hit=True, saved_tokens=usage.get("total_tokens", 0))
+        # Nothing was spent on a hit, so report zero usage to the engine.
+        return LLMResponse(
+            text=cached["text"],
+            usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cache_hit": True},
+            context=cached.get("context"),
+        )
+
+    def _key(self, system_prompt: str, user_prompt: str, context: Optional[LLMContext]) -> str:
+        payload = json.dumps(
+            [self.provider_name, self.create_params, system_prompt, user_prompt, context],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
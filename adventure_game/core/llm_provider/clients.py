@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:  # pragma: no cover - optional dependency
+    from openai import AsyncOpenAI, OpenAI
+except ImportError:  # pragma: no cover - fallback when openai not installed
+    AsyncOpenAI = OpenAI = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - installed alongside openai
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore[assignment]
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """The ``http`` block of a config; every pooled client is keyed by it."""
+
+    pool_size: int = 32
+    timeout: float = 60.0
+
+
+DEFAULT_SETTINGS = ClientSettings()
+
+_sessions: Dict[Tuple[str, ClientSettings], requests.Session] = {}
+_openai_clients: Dict[Tuple[str, Optional[str], ClientSettings], Any] = {}
+# Async clients hold connections bound to one event loop, so they are kept per loop.
+_async_http_clients: Dict[Tuple[int, str, ClientSettings], Tuple[asyncio.AbstractEventLoop, Any]] = {}
+_async_openai_clients: Dict[
+    Tuple[int, str, Optional[str], ClientSettings], Tuple[asyncio.AbstractEventLoop, Any]
+] = {}
+_lock = threading.Lock()
+
+
+def get_http_session(host: str, settings: ClientSettings = DEFAULT_SETTINGS) -> requests.Session:
+    """Keep-alive ``requests`` session shared by every caller of ``host`` with ``settings``."""
+    key = (host, settings)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+        return session
+
+
+def get_openai_client(
+    *,
+    api_key: str,
+    base_url: Optional[str] = None,
+    settings: ClientSettings = DEFAULT_SETTINGS,
+) -> Any:
+    """One pooled ``OpenAI`` client per API key, endpoint and settings."""
+    if OpenAI is None:
+        raise ImportError("openai package is not installed")
+    key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest(), base_url, settings)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            kwargs: Dict[str, Any] = {"api_key": api_key, "timeout": settings.timeout}
+            if base_url:
+                kwargs["base_url"] = base_url
+            if httpx is not None:
+                kwargs["http_client"] = httpx.Client(
+                    limits=_httpx_limits(settings), timeout=settings.timeout
+                )
+            client = _openai_clients[key] = OpenAI(**kwargs)
+        return client
+
+
+def get_async_http_client(host: str, settings: ClientSettings = DEFAULT_SETTINGS) -> Any:
+    """Keep-alive ``httpx.AsyncClient`` for ``host`` on the running event loop."""
+    if httpx is None:
+        raise ImportError("httpx is required for async HTTP providers")
+    loop = asyncio.get_running_loop()
+    key = (id(loop), host, settings)
+    with _lock:
+        _drop_closed_loops(_async_http_clients)
+        entry = _async_http_clients.get(key)
+        if entry is None:
+            client = httpx.AsyncClient(limits=_httpx_limits(settings), timeout=settings.timeout)
+            entry = _async_http_clients[key] = (loop, client)
+        return entry[1]
+
+
+def get_async_openai_client(
+    *,
+    api_key: str,
+    base_url: Optional[str] = None,
+    settings: ClientSettings = DEFAULT_SETTINGS,
+) -> Any:
+    """``AsyncOpenAI`` counterpart of ``get_openai_client`` for the running loop."""
+    if AsyncOpenAI is None:
+        raise ImportError("openai package is not installed")
+    loop = asyncio.get_running_loop()
+    key = (id(loop), hashlib.sha256(api_key.encode("utf-8")).hexdigest(), base_url, settings)
+    with _lock:
+        _drop_closed_loops(_async_openai_clients)
+        entry = _async_openai_clients.get(key)
+        if entry is None:
+            kwargs: Dict[str, Any] = {"api_key": api_key, "timeout": settings.timeout}
+            if base_url:
+                kwargs["base_url"] = base_url
+            if httpx is not None:
+                kwargs["http_client"] = httpx.AsyncClient(
+                    limits=_httpx_limits(settings), timeout=settings.timeout
+                )
+            entry = _async_openai_clients[key] = (loop, AsyncOpenAI(**kwargs))
+        return entry[1]
+
+
+def _httpx_limits(settings: ClientSettings) -> Any:
+    return httpx.Limits(
+        max_connections=settings.pool_size,
+        max_keepalive_connections=settings.pool_size,
+    )
+
+
+def _drop_closed_loops(registry: Dict[Any, Tuple[asyncio.AbstractEventLoop, Any]]) -> None:
+    for key in [key for key, (loop, _) in registry.items() if loop.is_closed()]:
+        del registry[key]
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from . import clients
+from .base import BaseLLMProvider, get_provider
+from ..json_repair import loads_lenient
+from ..prompts import build_narration_schema
+from .cache import CachedLLMProvider, get_response_cache
+from .instrumented import InstrumentedProvider
+from .limits import LimitedProvider, get_limit
+from .router import DEFAULT_HEDGE_WORKERS, ProviderRouter, RouteMember, get_breaker
+from ...models.state import validate_narration
+from ...utils.frozen import FrozenDict
+
+
+_instances: Dict[Tuple[Any, ...], BaseLLMProvider] = {}
+_instances_lock = threading.Lock()
+
+# (id(config), role, provider override, db_path) -> built role provider, for
+# the read-only configs handed out by the config registry.
+_role_providers: Dict[Tuple[Any, ...], BaseLLMProvider] = {}
+_role_configs: Dict[int, weakref.finalize] = {}
+_role_providers_lock = threading.Lock()
+
+
+def get_provider_instance(
+    name: str,
+    create_params: Dict[str, Any],
+    http: clients.ClientSettings = clients.DEFAULT_SETTINGS,
+) -> BaseLLMProvider:
+    """Shared provider instance per (name, create_params, http settings).
+
+    Providers hold no per-game state, so engines and roles asking for the
+    same model with the same ``http`` block reuse one instance and its
+    pooled HTTP client.
+    """
+    key = (name, json.dumps(create_params, sort_keys=True), http)
+    with _instances_lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = _instances[key] = get_provider(name)(create_params, http=http)
+        return instance
+
+
+def build_role_provider(
+    config: Dict[str, Any],
+    role: str,
+    *,
+    db_path: Path,
+    provider: Optional[str] = None,
+) -> BaseLLMProvider:
+    """Instantiate the provider configured for ``role`` (narrator, summarizer...).
+
+    A role names one ``provider`` or an ordered ``providers`` list; a list is
+    served through a ``ProviderRouter`` using the role's ``routing`` block.
+    ``provider`` overrides the name from the config and disables routing.
+    ``structured_output`` asks the provider for schema-constrained JSON
+    (``true``) or plain JSON mode (``json``). When the role has
+    ``cache.enabled`` set, responses are served through the response cache.
+    Every provider call is counted in the metrics registry under its role.
+    ``max_concurrency`` (on a ``providers`` entry or the role) caps in-flight
+    calls to that provider across every engine in the process.
+
+    For a shared read-only config (see ``config_registry``) the wrapped
+    provider is built once and reused by every engine until the config is
+    reloaded.
+    """
+    if not isinstance(config, FrozenDict):
+        return _build_role_provider(config, role, db_path=db_path, provider=provider)
+    key = (id(config), role, provider, str(db_path))
+    with _role_providers_lock:
+        instance = _role_providers.get(key)
+        if instance is None:
+            instance = _role_providers[key] = _build_role_provider(
+                config, role, db_path=db_path, provider=provider
+            )
+            if id(config) not in _role_configs:
+                _role_configs[id(config)] = weakref.finalize(config, _forget_config, id(config))
+        return instance
+
+
+def _forget_config(config_id: int) -> None:
+    with _role_providers_lock:
+        _role_configs.pop(config_id, None)
+        for key in [key for key in _role_providers if key[0] == config_id]:
+            del _role_providers[key]
+
+
+def _build_role_provider(
+    config: Dict[str, Any],
+    role: str,
+    *,
+    db_path: Path,
+    provider: Optional[str] = None,
+) -> BaseLLMProvider:
+    http = clients.ClientSettings(**(config.get("http") or {}))
+    role_config = config["models"][role]
+    specs = role_config.get("providers") or [
+        {"provider": role_config["provider"], "create_params": role_config["create_params"]}
+    ]
+    if provider:
+        specs = [{**specs[0], "provider": provider}]
+
+    routing = role_config.get("routing") or {}
+    members = []
+    for spec in specs:
+        name = spec["provider"]
+        create_params = _role_create_params(config, role_config, name, spec["create_params"])
+        label = f"{name}:{create_params.get('model', '')}".rstrip(":")
+        instance_key = f"{name}:{json.dumps(create_params, sort_keys=True)}"
+        member_provider: BaseLLMProvider = InstrumentedProvider(
+            get_provider_instance(name, create_params, http), provider_name=label, role=role
+        )
+        max_concurrency = spec.get("max_concurrency", role_config.get("max_concurrency"))
+        if max_concurrency:
+            member_provider = LimitedProvider(
+                member_provider,
+                limit=get_limit(instance_key, max_concurrency),
+                provider_name=label,
+            )
+        members.append(
+            RouteMember(
+                name=label,
+                provider=member_provider,
+                breaker=get_breaker(instance_key, **(routing.get("breaker") or {})),
+            )
+        )
+    if len(members) == 1:
+        instance = members[0].provider
+    else:
+        instance = ProviderRouter(
+            members,
+            policy=routing.get("policy", "failover"),
+            hedge_delay_ms=routing.get("hedge_delay_ms", 1500),
+            max_workers=routing.get("max_workers", DEFAULT_HEDGE_WORKERS),
+        )
+    provider_name = "+".join(member.name for member in members)
+
+    cache_config = role_config.get("cache") or {}
+    if cache_config.get("enabled"):
+        instance = CachedLLMProvider(
+            instance,
+            provider_name=provider_name,
+            role=role,
+            cache=get_response_cache(db_path),
+            ttl_seconds=cache_config.get("ttl_seconds", 3600),
+            # Only narrations the engine can parse are worth replaying.
+            validate=_validate_narration if role == "narrator" else None,
+        )
+    return instance
+
+
+def _validate_narration(text: str) -> None:
+    payload, _ = loads_lenient(text)
+    validate_narration(payload)
+
+
+def _role_create_params(
+    config: Dict[str, Any],
+    role_config: Dict[str, Any],
+    provider_name: str,
+    create_params: Dict[str, Any],
+) -> Dict[str, Any]:
+    structured = role_config.get("structured_output")
+    if not structured:
+        return create_params
+    schema = None if structured == "json" else build_narration_schema(config["stats"])
+    return get_provider(provider_name).structured_output_params(create_params, schema)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from .base import BaseLLMProvider, LLMContext, LLMResponse, register_provider
+
+
+_WORDS = (
+    "lantern corridor whisper static echo signal harbor ember ledger mirror "
+    "tide orchard vault cipher compass thread glass hollow beacon"
+).split()
+
+
+class FakeProviderError(RuntimeError):
+    """Injected failure, raised at the configured ``failure_rate``."""
+
+
+@register_provider("fake")
+class FakeLLM(BaseLLMProvider):
+    """Deterministic offline provider for benchmarks and local runs.
+
+    Output depends only on ``seed`` and the prompts. Narrator calls (system
+    prompts that ask for JSON) get schema-valid narrator JSON; other roles
+    get plain prose. Recognised ``create_params``:
+
+    - ``latency_ms`` / ``jitter_ms``: simulated time to the full response.
+    - ``first_token_ms``: time to the first streamed chunk (default: a tenth of the latency).
+    - ``completion_tokens``: reported completion size (default 120).
+    - ``failure_rate``: share of calls that raise ``FakeProviderError``.
+    - ``seed``: varies the generated text.
+    """
+
+    def __init__(self, create_params: Dict[str, Any], **kwargs: Any) -> None:
+        super().__init__(create_params, **kwargs)
+        latency_ms = create_params.get("latency_ms", 0)
+        self.latency = latency_ms / 1000
+        self.jitter = create_params.get("jitter_ms", 0) / 1000
+        self.first_token = create_params.get("first_token_ms", latency_ms / 10) / 1000
+        self.completion_tokens = create_params.get("completion_tokens", 120)
+        self.failure_rate = create_params.get("failure_rate", 0.0)
+        self.seed = str(create_params.get("seed", 0))
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        rng = self._rng(system_prompt, user_prompt)
+        delay = self._delay(rng)
+        self._maybe_fail(rng)
+        time.sleep(delay)
+        return self._response(rng, system_prompt, user_prompt)
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        rng = self._rng(system_prompt, user_prompt)
+        delay = self._delay(rng)
+        self._maybe_fail(rng)
+        response = self._response(rng, system_prompt, user_prompt)
+        chunks = _chunks(response["text"])
+        first = min(self.first_token, delay)
+        time.sleep(first)
+        per_chunk = (delay - first) / len(chunks)
+        for idx, chunk in enumerate(chunks):
+            if idx:
+                time.sleep(per_chunk)
+            yield LLMResponse(text=chunk, usage={})
+        yield LLMResponse(text="", usage=response["usage"])
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        rng = self._rng(system_prompt, user_prompt)
+        delay = self._delay(rng)
+        self._maybe_fail(rng)
+        await asyncio.sleep(delay)
+        return self._response(rng, system_prompt, user_prompt)
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        rng = self._rng(system_prompt, user_prompt)
+        delay = self._delay(rng)
+        self._maybe_fail(rng)
+        response = self._response(rng, system_prompt, user_prompt)
+        chunks = _chunks(response["text"])
+        first = min(self.first_token, delay)
+        await asyncio.sleep(first)
+        per_chunk = (delay - first) / len(chunks)
+        for idx, chunk in enumerate(chunks):
+            if idx:
+                await asyncio.sleep(per_chunk)
+            yield LLMResponse(text=chunk, usage={})
+        yield LLMResponse(text="", usage=response["usage"])
+
+    def _rng(self, system_prompt: str, user_prompt: str) -> random.Random:
+        digest = hashlib.blake2b(
+            f"{self.seed}\0{system_prompt}\0{user_prompt}".encode("utf-8"), digest_size=8
+        ).digest()
+        return random.Random(int.from_bytes(digest, "big"))
+
+    def _delay(self, rng: random.Random) -> float:
+        return max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+
+    def _maybe_fail(self, rng: random.Random) -> None:
+        if self.failure_rate and rng.random() < self.failure_rate:
+            raise FakeProviderError("injected fake provider failure")
+
+    def _response(self, rng: random.Random, system_prompt: str, user_prompt: str) -> LLMResponse:
+        prose = " ".join(rng.choice(_WORDS) for _ in range(max(1, self.completion_tokens // 2)))
+        prose = prose[0].upper() + prose[1:] + "."
+        if "JSON" in system_prompt:
+            payload: Dict[str, Any] = {
+                "text": prose,
+                "stats": {},
+                "inventory_add": [rng.choice(_WORDS)] if rng.random() < 0.2 else [],
+                "inventory_remove": [],
+                "npc_rel": {},
+                "world_state": None,
+            }
+            text = json.dumps(payload, ensure_ascii=False)
+        else:
+            text = prose
+        # Roughly four characters per token, like the tokenizer fallback.
+        prompt_tokens = (len(system_prompt) + len(user_prompt)) // 4
+        return LLMResponse(
+            text=text,
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": prompt_tokens + self.completion_tokens,
+            },
+        )
+
+
+def _chunks(text: str) -> List[str]:
+    return [text[idx : idx + 16] for idx in range(0, len(text), 16)] or [""]
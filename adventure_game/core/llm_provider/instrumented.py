@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from .base import BaseLLMProvider, LLMContext, LLMResponse
+from ...utils.metrics import REGISTRY
+
+
+REQUESTS = REGISTRY.counter(
+    "adventure_llm_requests_total", "Provider calls by role, provider and outcome."
+)
+TOKENS = REGISTRY.counter(
+    "adventure_llm_tokens_total", "Tokens reported by providers (prompt, completion, cached)."
+)
+LATENCY = REGISTRY.histogram(
+    "adventure_llm_latency_seconds", "Provider call latency, to the last chunk when streaming."
+)
+FIRST_TOKEN = REGISTRY.histogram(
+    "adventure_llm_first_token_seconds", "Time to the first streamed chunk."
+)
+
+_TOKEN_KINDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+class InstrumentedProvider(BaseLLMProvider):
+    """Records per-provider call counts, latency and token usage."""
+
+    def __init__(self, inner: BaseLLMProvider, *, provider_name: str, role: str) -> None:
+        super().__init__(inner.create_params)
+        self.inner = inner
+        self.labels = {"provider": provider_name, "role": role}
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        start = time.perf_counter()
+        try:
+            response = self.inner.generate(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+        except Exception:
+            self._record("error", start)
+            raise
+        self._record("ok", start, response.get("usage"))
+        return response
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        start = time.perf_counter()
+        first_seen = False
+        usage: Dict[str, Any] = {}
+        try:
+            for chunk in self.inner.generate_stream(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            ):
+                if not first_seen and chunk.get("text"):
+                    first_seen = True
+                    FIRST_TOKEN.observe(time.perf_counter() - start, **self.labels)
+                usage = chunk.get("usage") or usage
+                yield chunk
+        except GeneratorExit:
+            # Abandoned by the consumer, e.g. the losing side of a hedge.
+            self._record("cancelled", start, usage)
+            raise
+        except Exception:
+            self._record("error", start)
+            raise
+        self._record("ok", start, usage)
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        start = time.perf_counter()
+        try:
+            response = await self.inner.agenerate(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+        except asyncio.CancelledError:
+            self._record("cancelled", start)
+            raise
+        except Exception:
+            self._record("error", start)
+            raise
+        self._record("ok", start, response.get("usage"))
+        return response
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        start = time.perf_counter()
+        first_seen = False
+        usage: Dict[str, Any] = {}
+        try:
+            async for chunk in self.inner.agenerate_stream(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            ):
+                if not first_seen and chunk.get("text"):
+                    first_seen = True
+                    FIRST_TOKEN.observe(time.perf_counter() - start, **self.labels)
+                usage = chunk.get("usage") or usage
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            self._record("cancelled", start, usage)
+            raise
+        except Exception:
+            self._record("error", start)
+            raise
+        self._record("ok", start, usage)
+
+    def _record(self, outcome: str, start: float, usage: Optional[Dict[str, Any]] = None) -> None:
+        REQUESTS.inc(outcome=outcome, **self.labels)
+        LATENCY.observe(time.perf_counter() - start, outcome=outcome, **self.labels)
+        for kind in _TOKEN_KINDS:
+            count = (usage or {}).get(kind)
+            if count:
+                TOKENS.inc(count, kind=kind.replace("_tokens", ""), **self.labels)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+
+from .base import BaseLLMProvider, LLMContext, LLMResponse
+from ...utils.metrics import REGISTRY
+
+
+QUEUE_WAIT = REGISTRY.histogram(
+    "adventure_llm_queue_wait_seconds", "Time spent waiting for a provider concurrency slot."
+)
+
+
+class ConcurrencyLimit:
+    """Caps in-flight calls to one provider, from threads and event loops alike.
+
+    Blocking callers wait on a condition; async callers park a future that
+    ``release`` hands the freed slot to, so waiting never blocks a loop.
+    """
+
+    def __init__(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.limit = limit
+        self._active = 0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._active
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit:
+                self._active += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._async_waiters.remove(waiter)
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted and not waiter[1].cancelled():
+                # The slot arrived just before the cancellation; pass it on.
+                # (A cancelled future is released by _grant instead.)
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if self._async_waiters:
+                # The slot passes straight to the waiter; _active is unchanged.
+                loop, future = self._async_waiters.popleft()
+                loop.call_soon_threadsafe(self._grant, future)
+                return
+            self._active -= 1
+            self._cond.notify()
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    @contextmanager
+    def held(self, labels: Dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        self.acquire()
+        QUEUE_WAIT.observe(time.perf_counter() - start, **labels)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aheld(self, labels: Dict[str, str]) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        await self.aacquire()
+        QUEUE_WAIT.observe(time.perf_counter() - start, **labels)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_limits: Dict[str, ConcurrencyLimit] = {}
+_limits_lock = threading.Lock()
+
+
+def get_limit(key: str, limit: int) -> ConcurrencyLimit:
+    """Process-wide limit per provider instance; the first configured size wins."""
+    with _limits_lock:
+        existing = _limits.get(key)
+        if existing is None:
+            existing = _limits[key] = ConcurrencyLimit(limit)
+        return existing
+
+
+class LimitedProvider(BaseLLMProvider):
+    """Holds a ``ConcurrencyLimit`` slot for the whole call, streams included."""
+
+    def __init__(self, inner: BaseLLMProvider, *, limit: ConcurrencyLimit, provider_name: str) -> None:
+        super().__init__(inner.create_params)
+        self.inner = inner
+        self.limit = limit
+        self.labels = {"provider": provider_name}
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        with self.limit.held(self.labels):
+            return self.inner.generate(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        with self.limit.held(self.labels):
+            yield from self.inner.generate_stream(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        async with self.limit.aheld(self.labels):
+            return await self.inner.agenerate(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        async with self.limit.aheld(self.labels):
+            async for chunk in self.inner.agenerate_stream(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            ):
+                yield chunk
+
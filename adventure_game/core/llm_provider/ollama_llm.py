@@ -1,69 +1,263 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
-import requests
+from . import clients
+from .base import BaseLLMProvider, LLMContext, LLMResponse, register_provider
+from ...utils.token_counter import count_tokens
 
-from .base import BaseLLMProvider, LLMResponse, register_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "http://localhost:11434"
+# Keeps the model loaded between turns; Ollama's own default is five minutes.
+DEFAULT_KEEP_ALIVE = "30m"
+# A single NDJSON line is one token delta or the final stats record; anything
+# this large means a broken stream, not a long answer.
+MAX_LINE_BYTES = 1 << 20
+
+# create_params keys passed through as Ollama ``options``.
+_OPTION_KEYS = ("temperature", "top_p", "top_k", "seed", "num_ctx", "stop", "repeat_penalty")
+
+
+class OllamaError(RuntimeError):
+    """Error reported by the Ollama server, in the HTTP status or mid-stream."""
 
 
 @register_provider("ollama")
 class OllamaLLM(BaseLLMProvider):
-    """Narrator backed by a local Ollama instance."""
+    """Narrator backed by a local Ollama instance, streamed from ``/api/chat``.
+
+    Recognised ``create_params``: ``model``, ``host`` (default
+    ``$OLLAMA_HOST`` or localhost), ``keep_alive``, ``max_tokens`` (sent as
+    ``num_predict``), the sampling options in ``_OPTION_KEYS``, a raw
+    ``options`` mapping and ``format`` (set by structured output).
+
+    A message-list ``context`` is sent between the system prompt and the
+    user prompt, and the final chunk returns it extended by this exchange.
+    Threaded into the next call, the whole earlier conversation is a prefix
+    Ollama already holds in its KV cache, so only the new prompt is evaluated.
+    """
 
     def __init__(
         self,
+        create_params: Dict[str, Any],
         *,
-        model: str = "llama3",
-        host: str = "http://localhost:11434",
-        **kwargs: Any,
+        http: clients.ClientSettings = clients.DEFAULT_SETTINGS,
     ) -> None:
-        super().__init__(**kwargs)
-        self.model = model
-        self.host = host.rstrip("/")
+        super().__init__(create_params, http=http)
+        self.model = create_params.get("model", "llama3")
+        self.host = (create_params.get("host") or os.getenv("OLLAMA_HOST") or DEFAULT_HOST).rstrip("/")
+        if "://" not in self.host:
+            self.host = f"http://{self.host}"
+        self.keep_alive = create_params.get("keep_alive", DEFAULT_KEEP_ALIVE)
+        options = {key: create_params[key] for key in _OPTION_KEYS if key in create_params}
+        if create_params.get("max_tokens") is not None:
+            options["num_predict"] = create_params["max_tokens"]
+        self.options = {**options, **(create_params.get("options") or {})}
+        self.format = create_params.get("format")
+
+    @classmethod
+    def structured_output_params(
+        cls, create_params: Dict[str, Any], schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        # Ollama takes either "json" or a JSON schema in ``format``.
+        return {**create_params, "format": schema if schema is not None else "json"}
 
     def generate(
         self,
         *,
         system_prompt: str,
         user_prompt: str,
-        context: Optional[str] = None,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        text_chunks: List[str] = []
+        usage: Dict[str, Any] = {}
+        next_context = None
+        for chunk in self.generate_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        ):
+            text_chunks.append(chunk["text"])
+            usage = chunk["usage"] or usage
+            next_context = chunk.get("context") or next_context
+        return LLMResponse(text="".join(text_chunks).strip(), usage=usage, context=next_context)
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        session = clients.get_http_session(self.host, self.http)
+        # Closing the response (also when the consumer stops early) drops the
+        # connection, which makes Ollama abort the generation.
+        with session.post(
+            f"{self.host}/api/chat",
+            json=self._request_body(system_prompt, user_prompt, context),
+            timeout=self.http.timeout,
+            stream=True,
+        ) as response:
+            if response.status_code >= 400:
+                raise OllamaError(_http_error(response.status_code, response.text))
+            decoder = LineDecoder()
+            exchange = _Exchange(system_prompt, user_prompt, context)
+            # chunk_size=None hands over bytes as they arrive instead of
+            # waiting for a fixed-size block.
+            for data in response.iter_content(chunk_size=None):
+                for line in decoder.feed(data):
+                    yield from map(exchange.track, _parse_line(line))
+            for line in decoder.flush():
+                yield from map(exchange.track, _parse_line(line))
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
     ) -> LLMResponse:
+        text_chunks: List[str] = []
+        usage: Dict[str, Any] = {}
+        next_context = None
+        async for chunk in self.agenerate_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        ):
+            text_chunks.append(chunk["text"])
+            usage = chunk["usage"] or usage
+            next_context = chunk.get("context") or next_context
+        return LLMResponse(text="".join(text_chunks).strip(), usage=usage, context=next_context)
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        client = clients.get_async_http_client(self.host, self.http)
+        async with client.stream(
+            "POST",
+            f"{self.host}/api/chat",
+            json=self._request_body(system_prompt, user_prompt, context),
+        ) as response:
+            if response.status_code >= 400:
+                body = (await response.aread()).decode("utf-8", "replace")
+                raise OllamaError(_http_error(response.status_code, body))
+            decoder = LineDecoder()
+            exchange = _Exchange(system_prompt, user_prompt, context)
+            async for data in response.aiter_bytes():
+                for line in decoder.feed(data):
+                    for chunk in _parse_line(line):
+                        yield exchange.track(chunk)
+            for line in decoder.flush():
+                for chunk in _parse_line(line):
+                    yield exchange.track(chunk)
+
+    def _request_body(
+        self, system_prompt: str, user_prompt: str, context: Optional[LLMContext]
+    ) -> Dict[str, Any]:
+        messages = [{"role": "system", "content": system_prompt}]
+        if isinstance(context, list):
+            messages.extend(context)
+        elif context:
+            messages.append({"role": "user", "content": context})
+        messages.append({"role": "user", "content": user_prompt})
         body: Dict[str, Any] = {
             "model": self.model,
-            "temperature": self.temperature,
-            "options": {"num_predict": self.max_tokens},
-            "prompt": _build_prompt(system_prompt, user_prompt, context),
+            "messages": messages,
+            "stream": True,
+            "keep_alive": self.keep_alive,
         }
+        if self.options:
+            body["options"] = self.options
+        if self.format:
+            body["format"] = self.format
+        return body
+
+
+class _Exchange:
+    """One chat call: collects the reply and completes the final chunk."""
+
+    def __init__(self, system_prompt: str, user_prompt: str, context: Optional[LLMContext]) -> None:
+        self.history = list(context) if isinstance(context, list) else []
+        self.user_prompt = user_prompt
+        # Everything before the new user message was the previous request plus
+        # its reply, which Ollama still holds in its KV cache; an estimate, as
+        # Ollama only reports the tokens it evaluated.
+        self.cached_tokens = (
+            count_tokens([system_prompt, *(message["content"] for message in self.history)])
+            if self.history
+            else 0
+        )
+        self.reply: List[str] = []
+
+    def track(self, chunk: LLMResponse) -> LLMResponse:
+        self.reply.append(chunk["text"])
+        if not chunk["usage"]:
+            return chunk
+        return LLMResponse(
+            text=chunk["text"],
+            usage={**chunk["usage"], "cached_tokens": self.cached_tokens},
+            context=[
+                *self.history,
+                {"role": "user", "content": self.user_prompt},
+                {"role": "assistant", "content": "".join(self.reply)},
+            ],
+        )
+
+
+class LineDecoder:
+    """Splits a byte stream into complete lines, holding at most one partial line."""
+
+    def __init__(self, max_line_bytes: int = MAX_LINE_BYTES) -> None:
+        self.max_line_bytes = max_line_bytes
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        self._buffer += data
+        *lines, rest = self._buffer.split(b"\n")
+        if len(rest) > self.max_line_bytes:
+            raise OllamaError(f"Ollama stream line exceeds {self.max_line_bytes} bytes")
+        self._buffer = bytearray(rest)
+        return [bytes(line) for line in lines if line.strip()]
+
+    def flush(self) -> List[bytes]:
+        rest, self._buffer = bytes(self._buffer), bytearray()
+        return [rest] if rest.strip() else []
+
+
+def _parse_line(line: bytes) -> Iterator[LLMResponse]:
+    try:
+        payload = json.loads(line)
+    except ValueError as exc:
+        raise OllamaError(f"Malformed line in Ollama stream: {line[:200]!r}") from exc
+    if payload.get("error"):
+        raise OllamaError(f"Ollama error: {payload['error']}")
+    if chunk := (payload.get("message") or {}).get("content"):
+        yield LLMResponse(text=chunk, usage={})
+    if payload.get("done"):
+        # The final record carries the counts at the top level.
+        prompt_tokens = payload.get("prompt_eval_count", 0)
+        completion_tokens = payload.get("eval_count", 0)
+        if payload.get("done_reason") == "length":
+            logger.warning("Ollama stopped at the num_predict limit")
+        yield LLMResponse(
+            text="",
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
 
-        response = requests.post(f"{self.host}/api/generate", json=body, timeout=60)
-        response.raise_for_status()
-
-        text_chunks: list[str] = []
-        token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
-        for line in response.iter_lines():
-            if not line:
-                continue
-            payload = json.loads(line)
-            if chunk := payload.get("response"):
-                text_chunks.append(chunk)
-            if "done" in payload and payload["done"] and "total_duration" in payload:
-                usage = payload.get("metrics", {})
-                token_usage = {
-                    "prompt_tokens": usage.get("prompt_eval_count", 0),
-                    "completion_tokens": usage.get("eval_count", 0),
-                    "total_tokens": usage.get("prompt_eval_count", 0)
-                    + usage.get("eval_count", 0),
-                }
-
-        return LLMResponse(text="".join(text_chunks).strip(), usage=token_usage)
-
-
-def _build_prompt(system_prompt: str, user_prompt: str, context: Optional[str]) -> str:
-    blocks = [system_prompt]
-    if context:
-        blocks.append(context)
-    blocks.append(user_prompt)
-    return "\n\n".join(blocks)
+def _http_error(status: int, body: str) -> str:
+    try:
+        message = json.loads(body).get("error") or body
+    except (ValueError, AttributeError):
+        message = body
+    return f"Ollama returned HTTP {status}: {message.strip()[:500]}"
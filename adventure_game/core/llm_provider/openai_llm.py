@@ -2,16 +2,13 @@ from __future__ import annotations
 
 import os
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
-from .base import BaseLLMProvider, LLMResponse, register_provider
+from . import clients
+from .base import BaseLLMProvider, LLMContext, LLMResponse, register_provider
 
 
-try:  # pragma: no cover - optional dependency
-    from openai import OpenAI
-except ImportError:  # pragma: no cover - fallback when openai not installed
-    OpenAI = None  # type: ignore[assignment]
-
+logger = logging.getLogger(__name__)
 
 @register_provider("openai")
 class OpenAILLM(BaseLLMProvider):
@@ -20,26 +17,41 @@ class OpenAILLM(BaseLLMProvider):
     def __init__(
         self,
         create_params: Dict[str, Any],
+        *,
+        http: clients.ClientSettings = clients.DEFAULT_SETTINGS,
     ) -> None:
-        super().__init__(create_params)
+        super().__init__(create_params, http=http)
         api_key = os.getenv("OPENAI_API_KEY")
         if api_key is None:
             raise ValueError("OPENAI_API_KEY is required for OpenAI provider")
-        if OpenAI is None:
-            raise ImportError("openai package is not installed")
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
+        self.base_url = os.getenv("OPENAI_BASE_URL")
+        self.client = clients.get_openai_client(
+            api_key=api_key, base_url=self.base_url, settings=self.http
+        )
+
+    @classmethod
+    def structured_output_params(
+        cls, create_params: Dict[str, Any], schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        if schema is None:
+            return {**create_params, "response_format": {"type": "json_object"}}
+        return {
+            **create_params,
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "narration", "strict": True, "schema": schema},
+            },
+        }
 
     def generate(
         self,
         *,
         system_prompt: str,
         user_prompt: str,
-        context: Optional[str] = None,
+        context: Optional[LLMContext] = None,
     ) -> LLMResponse:
-        messages = [{"role": "system", "content": system_prompt}]
-        if context:
-            messages.append({"role": "system", "content": context})
-        messages.append({"role": "user", "content": user_prompt})
+        messages = _build_messages(system_prompt, user_prompt, context)
 
         response = self.client.chat.completions.create(
             **self.create_params,
@@ -48,11 +60,101 @@ class OpenAILLM(BaseLLMProvider):
 
         choice = response.choices[0]
         content = choice.message.content or ""
-        usage: Dict[str, Any] = {
-            "prompt_tokens": response.usage.prompt_tokens,
-            "completion_tokens": response.usage.completion_tokens,
-            "total_tokens": response.usage.total_tokens,
-        }
-        res = LLMResponse(text=content, usage=usage)
-        logging.info(res)
-        return res
+        usage = _usage(response.usage)
+        logger.debug("OpenAI %s: %s", self.create_params.get("model"), usage)
+        return LLMResponse(text=content, usage=usage)
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        messages = _build_messages(system_prompt, user_prompt, context)
+
+        stream = self.client.chat.completions.create(
+            **self.create_params,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content or ""
+                    if delta:
+                        yield LLMResponse(text=delta, usage={})
+                if chunk.usage is not None:
+                    yield LLMResponse(text="", usage=_usage(chunk.usage))
+        finally:
+            # Releases the connection when the consumer stops early.
+            stream.close()
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        client = clients.get_async_openai_client(
+            api_key=self.api_key, base_url=self.base_url, settings=self.http
+        )
+        response = await client.chat.completions.create(
+            **self.create_params,
+            messages=_build_messages(system_prompt, user_prompt, context),
+        )
+        usage = _usage(response.usage)
+        logger.debug("OpenAI %s: %s", self.create_params.get("model"), usage)
+        return LLMResponse(text=response.choices[0].message.content or "", usage=usage)
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        client = clients.get_async_openai_client(
+            api_key=self.api_key, base_url=self.base_url, settings=self.http
+        )
+        stream = await client.chat.completions.create(
+            **self.create_params,
+            messages=_build_messages(system_prompt, user_prompt, context),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content or ""
+                    if delta:
+                        yield LLMResponse(text=delta, usage={})
+                if chunk.usage is not None:
+                    yield LLMResponse(text="", usage=_usage(chunk.usage))
+        finally:
+            # Releases the connection when the consumer stops early.
+            await stream.close()
+
+
+def _build_messages(
+    system_prompt: str, user_prompt: str, context: Optional[LLMContext]
+) -> List[Dict[str, str]]:
+    # The system prompt stays first and unchanged so OpenAI's automatic
+    # prompt caching can reuse it across turns.
+    messages = [{"role": "system", "content": system_prompt}]
+    if isinstance(context, str) and context:
+        messages.append({"role": "system", "content": context})
+    messages.append({"role": "user", "content": user_prompt})
+    return messages
+
+
+def _usage(usage: Any) -> Dict[str, Any]:
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+    }
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from .base import BaseLLMProvider, LLMContext, LLMResponse
+
+
+class ReplayMismatchError(RuntimeError):
+    """A replayed call did not match the recording at that position."""
+
+
+class RecordingProvider(BaseLLMProvider):
+    """Appends every call's prompts and final response to ``calls``.
+
+    Streams are recorded once they finish, as the joined text. Calls from
+    several threads (the background summarizer) are safe.
+    """
+
+    def __init__(self, inner: BaseLLMProvider, *, role: str, calls: List[Dict[str, Any]]) -> None:
+        super().__init__(inner.create_params)
+        self.inner = inner
+        self.role = role
+        self.calls = calls
+        self._lock = threading.Lock()
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        response = self.inner.generate(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        )
+        self._record(system_prompt, user_prompt, context, response)
+        return response
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        chunks: List[str] = []
+        usage: Dict[str, Any] = {}
+        next_context = None
+        for chunk in self.inner.generate_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        ):
+            chunks.append(chunk["text"])
+            usage = chunk.get("usage") or usage
+            next_context = chunk.get("context") or next_context
+            yield chunk
+        self._record(
+            system_prompt,
+            user_prompt,
+            context,
+            LLMResponse(text="".join(chunks), usage=usage, context=next_context),
+        )
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        response = await self.inner.agenerate(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        )
+        self._record(system_prompt, user_prompt, context, response)
+        return response
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        chunks: List[str] = []
+        usage: Dict[str, Any] = {}
+        next_context = None
+        async for chunk in self.inner.agenerate_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        ):
+            chunks.append(chunk["text"])
+            usage = chunk.get("usage") or usage
+            next_context = chunk.get("context") or next_context
+            yield chunk
+        self._record(
+            system_prompt,
+            user_prompt,
+            context,
+            LLMResponse(text="".join(chunks), usage=usage, context=next_context),
+        )
+
+    def _record(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext],
+        response: LLMResponse,
+    ) -> None:
+        with self._lock:
+            self.calls.append(
+                {
+                    "role": self.role,
+                    "system_prompt": system_prompt,
+                    "user_prompt": user_prompt,
+                    "context": context,
+                    "text": response["text"],
+                    "usage": response.get("usage") or {},
+                    "next_context": response.get("context"),
+                }
+            )
+
+
+class ReplayProvider(BaseLLMProvider):
+    """Serves one role's recorded calls back in order, with no model behind it.
+
+    Each call must send exactly the prompts recorded at its position;
+    anything else raises ``ReplayMismatchError`` and is kept in
+    ``mismatches``, since some callers swallow provider errors.
+    """
+
+    def __init__(self, calls: List[Dict[str, Any]], *, role: str) -> None:
+        super().__init__({})
+        self.calls = calls
+        self.role = role
+        self.mismatches: List[str] = []
+        self._position = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return len(self.calls) - self._position
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        call = self._next(system_prompt, user_prompt, context)
+        return LLMResponse(text=call["text"], usage=dict(call["usage"]), context=call.get("next_context"))
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        call = self._next(system_prompt, user_prompt, context)
+        yield LLMResponse(text=call["text"], usage={})
+        yield LLMResponse(text="", usage=dict(call["usage"]), context=call.get("next_context"))
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        return self.generate(system_prompt=system_prompt, user_prompt=user_prompt, context=context)
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        for chunk in self.generate_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, context=context
+        ):
+            yield chunk
+
+    def _next(
+        self, system_prompt: str, user_prompt: str, context: Optional[LLMContext]
+    ) -> Dict[str, Any]:
+        with self._lock:
+            position = self._position
+            if position >= len(self.calls):
+                message = f"{self.role} call #{position} was never recorded"
+            else:
+                call = self.calls[position]
+                differs = [
+                    name
+                    for name, value in (
+                        ("system_prompt", system_prompt),
+                        ("user_prompt", user_prompt),
+                        ("context", context),
+                    )
+                    if call.get(name) != value
+                ]
+                if not differs:
+                    self._position += 1
+                    return call
+                message = f"{self.role} call #{position} differs from the recording in {', '.join(differs)}"
+            self.mismatches.append(message)
+        raise ReplayMismatchError(message)
@@ -0,0 +1,445 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .base import BaseLLMProvider, LLMContext, LLMResponse
+from ...utils.metrics import REGISTRY
+
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("failover", "hedge")
+
+ROUTER_EVENTS = REGISTRY.counter(
+    "adventure_router_events_total", "Hedged and failed-over provider calls."
+)
+
+# Threads per router for racing hedged calls; ``routing.max_workers``.
+DEFAULT_HEDGE_WORKERS = 16
+
+
+class CircuitBreaker:
+    """Stops sending traffic to a provider after repeated failures.
+
+    After ``failure_threshold`` consecutive errors the breaker opens for
+    ``cooldown_seconds``; every further failure while half-open doubles the
+    cooldown, up to ``max_cooldown_seconds``. A success closes it again.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+        max_cooldown_seconds: float = 300.0,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            return time.monotonic() >= self._open_until
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trips = 0
+            self._open_until = 0.0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.failure_threshold:
+                return
+            cooldown = min(self.cooldown_seconds * 2**self._trips, self.max_cooldown_seconds)
+            self._trips += 1
+            self._open_until = time.monotonic() + cooldown
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if time.monotonic() < self._open_until:
+                return "open"
+            return "half_open" if self._trips else "closed"
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(key: str, **settings: Any) -> CircuitBreaker:
+    """Process-wide breaker per provider instance, shared by every engine."""
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(**settings)
+        return breaker
+
+
+@dataclass
+class RouteMember:
+    name: str
+    provider: BaseLLMProvider
+    breaker: CircuitBreaker
+
+
+class ProviderRouter(BaseLLMProvider):
+    """Serves one role from an ordered list of providers.
+
+    ``failover`` moves to the next provider when a call fails before any
+    output arrived; it runs on the caller's thread. ``hedge`` additionally
+    starts the next provider when the current ones have not produced a first
+    chunk within ``hedge_delay_ms``, and keeps whichever answers first. A
+    blocking call cannot be raced from the thread waiting on it, so hedged
+    attempts run on the router's own pool of ``max_workers`` threads.
+    """
+
+    def __init__(
+        self,
+        members: List[RouteMember],
+        *,
+        policy: str = "failover",
+        hedge_delay_ms: float = 1500,
+        max_workers: int = DEFAULT_HEDGE_WORKERS,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown routing policy '{policy}'. Expected one of {POLICIES}")
+        super().__init__(members[0].provider.create_params)
+        self.members = members
+        self.policy = policy
+        self.hedge_delay = hedge_delay_ms / 1000 if policy == "hedge" else None
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, Any] = {
+            "calls": 0,
+            "hedges": 0,
+            "failovers": 0,
+            "wins": {member.name: 0 for member in members},
+            "errors": {member.name: 0 for member in members},
+        }
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        def call(provider: BaseLLMProvider) -> Iterator[LLMResponse]:
+            yield provider.generate(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+
+        for response in self._race(call):
+            return response
+        raise RuntimeError("provider returned no response")
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        def call(provider: BaseLLMProvider) -> Iterator[LLMResponse]:
+            return provider.generate_stream(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+
+        yield from self._race(call)
+
+    async def agenerate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        async def call(provider: BaseLLMProvider) -> AsyncIterator[LLMResponse]:
+            yield await provider.agenerate(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+
+        stream = self._arace(call)
+        try:
+            async for response in stream:
+                return response
+        finally:
+            await stream.aclose()
+        raise RuntimeError("provider returned no response")
+
+    async def agenerate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> AsyncIterator[LLMResponse]:
+        def call(provider: BaseLLMProvider) -> AsyncIterator[LLMResponse]:
+            return provider.agenerate_stream(
+                system_prompt=system_prompt, user_prompt=user_prompt, context=context
+            )
+
+        async for chunk in self._arace(call):
+            yield chunk
+
+    def health(self) -> Dict[str, str]:
+        return {member.name: member.breaker.state for member in self.members}
+
+    def _race(
+        self, call: Callable[[BaseLLMProvider], Iterator[LLMResponse]]
+    ) -> Iterator[LLMResponse]:
+        # Healthy providers first, in configured order; when every breaker is
+        # open, try them all anyway rather than failing outright.
+        candidates = [m for m in self.members if m.breaker.allow()] or list(self.members)
+        self._bump("calls")
+        if self.hedge_delay is None or len(candidates) == 1:
+            yield from self._failover(call, candidates)
+            return
+
+        executor = self._hedge_executor()
+        events: "queue.Queue[Tuple[int, str, Any]]" = queue.Queue()
+        pumps: List[_Pump] = []
+
+        def launch() -> bool:
+            if len(pumps) >= len(candidates):
+                return False
+            idx = len(pumps)
+            pumps.append(_Pump(idx, candidates[idx].provider, call, events, executor))
+            return True
+
+        launch()
+        winner: Optional[int] = None
+        active = 1
+        last_error: Optional[BaseException] = None
+        try:
+            while True:
+                timeout = self.hedge_delay if winner is None and len(pumps) < len(candidates) else None
+                try:
+                    idx, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    # Nobody has produced anything yet: hedge with the next provider.
+                    if launch():
+                        active += 1
+                        self._bump("hedges")
+                    continue
+
+                if winner is not None and idx != winner:
+                    continue
+                member = candidates[idx]
+                if kind == "chunk":
+                    if winner is None:
+                        winner = idx
+                        for pump in pumps:
+                            if pump.idx != idx:
+                                pump.cancel()
+                        member.breaker.record_success()
+                        self._count("wins", member.name)
+                    yield payload
+                elif kind == "done":
+                    member.breaker.record_success()
+                    if winner is None:
+                        # Finished without output; nothing left to wait for.
+                        self._count("wins", member.name)
+                    return
+                else:
+                    member.breaker.record_failure()
+                    self._count("errors", member.name)
+                    logger.warning("Provider %s failed: %s", member.name, payload)
+                    if winner is not None:
+                        # Output was already delivered; cannot switch mid-stream.
+                        raise payload
+                    last_error = payload
+                    active -= 1
+                    if launch():
+                        active += 1
+                        self._bump("failovers")
+                    elif active == 0:
+                        raise last_error
+        finally:
+            for pump in pumps:
+                pump.cancel()
+
+    def _failover(
+        self,
+        call: Callable[[BaseLLMProvider], Iterator[LLMResponse]],
+        candidates: List[RouteMember],
+    ) -> Iterator[LLMResponse]:
+        """Try ``candidates`` in order on the caller's thread."""
+        last_error: Optional[BaseException] = None
+        for position, member in enumerate(candidates):
+            if position:
+                self._bump("failovers")
+            delivered = False
+            try:
+                with closing(call(member.provider)) as stream:
+                    for chunk in stream:
+                        if not delivered:
+                            delivered = True
+                            member.breaker.record_success()
+                            self._count("wins", member.name)
+                        yield chunk
+            except Exception as exc:
+                member.breaker.record_failure()
+                self._count("errors", member.name)
+                logger.warning("Provider %s failed: %s", member.name, exc)
+                if delivered:
+                    # Output was already delivered; cannot switch mid-stream.
+                    raise
+                last_error = exc
+                continue
+            if not delivered:
+                # Finished without output.
+                member.breaker.record_success()
+                self._count("wins", member.name)
+            return
+        assert last_error is not None
+        raise last_error
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="llm-hedge"
+                )
+            return self._executor
+
+    async def _arace(
+        self, call: Callable[[BaseLLMProvider], AsyncIterator[LLMResponse]]
+    ) -> AsyncIterator[LLMResponse]:
+        """``_race`` for the event loop: same policy, with tasks instead of pumps."""
+        candidates = [m for m in self.members if m.breaker.allow()] or list(self.members)
+        events: "asyncio.Queue[Tuple[int, str, Any]]" = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+        self._bump("calls")
+
+        async def pump(idx: int) -> None:
+            try:
+                async for chunk in call(candidates[idx].provider):
+                    events.put_nowait((idx, "chunk", chunk))
+                events.put_nowait((idx, "done", None))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                events.put_nowait((idx, "error", exc))
+
+        def launch() -> bool:
+            if len(tasks) >= len(candidates):
+                return False
+            tasks.append(asyncio.create_task(pump(len(tasks))))
+            return True
+
+        launch()
+        winner: Optional[int] = None
+        active = 1
+        last_error: Optional[BaseException] = None
+        try:
+            while True:
+                timeout = self.hedge_delay if winner is None and len(tasks) < len(candidates) else None
+                try:
+                    idx, kind, payload = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    if launch():
+                        active += 1
+                        self._bump("hedges")
+                    continue
+
+                if winner is not None and idx != winner:
+                    continue
+                member = candidates[idx]
+                if kind == "chunk":
+                    if winner is None:
+                        winner = idx
+                        for other, task in enumerate(tasks):
+                            if other != idx:
+                                task.cancel()
+                        member.breaker.record_success()
+                        self._count("wins", member.name)
+                    yield payload
+                elif kind == "done":
+                    member.breaker.record_success()
+                    if winner is None:
+                        self._count("wins", member.name)
+                    return
+                else:
+                    member.breaker.record_failure()
+                    self._count("errors", member.name)
+                    logger.warning("Provider %s failed: %s", member.name, payload)
+                    if winner is not None:
+                        raise payload
+                    last_error = payload
+                    active -= 1
+                    if launch():
+                        active += 1
+                        self._bump("failovers")
+                    elif active == 0:
+                        raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _bump(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+        if key != "calls":
+            ROUTER_EVENTS.inc(event=key.rstrip("s"))
+
+    def _count(self, key: str, name: str) -> None:
+        with self._stats_lock:
+            self.stats[key][name] += 1
+
+
+class _Pump:
+    """Drains one provider call on ``executor`` into the shared event queue."""
+
+    def __init__(
+        self,
+        idx: int,
+        provider: BaseLLMProvider,
+        call: Callable[[BaseLLMProvider], Iterator[LLMResponse]],
+        events: "queue.Queue[Tuple[int, str, Any]]",
+        executor: ThreadPoolExecutor,
+    ) -> None:
+        self.idx = idx
+        self._cancelled = threading.Event()
+        executor.submit(self._run, provider, call, events)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def _run(
+        self,
+        provider: BaseLLMProvider,
+        call: Callable[[BaseLLMProvider], Iterator[LLMResponse]],
+        events: "queue.Queue[Tuple[int, str, Any]]",
+    ) -> None:
+        stream = None
+        try:
+            stream = call(provider)
+            for chunk in stream:
+                if self._cancelled.is_set():
+                    return
+                events.put((self.idx, "chunk", chunk))
+            events.put((self.idx, "done", None))
+        except Exception as exc:
+            events.put((self.idx, "error", exc))
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config_registry import load_config
+from .game_engine import generate_hidden_lore, generate_intro
+from .llm_provider.factory import build_role_provider
+from ..models.db_models import LoreBundleRepository
+from ..models.state import GameState
+
+
+logger = logging.getLogger(__name__)
+
+
+class PrewarmWorker:
+    """Keeps a queue of ready lore/intro bundles for one game config.
+
+    New games pop a bundle instead of waiting on the lore generator and the
+    intro narration; the worker refills the queue in the background. With a
+    ``config_path`` the config is re-read for every bundle, so hot reloads
+    reach prewarming, and bundles built from an older version are dropped.
+    """
+
+    def __init__(
+        self,
+        *,
+        config: Dict[str, Any],
+        db_path: Path,
+        depth: int = 2,
+        concurrency: int = 1,
+        poll_seconds: float = 30.0,
+        provider: Optional[str] = None,
+        config_path: Optional[Path] = None,
+    ) -> None:
+        self.config = config
+        self.config_path = config_path
+        self.db_path = db_path
+        self.provider_override = provider
+        self.game_name = config["game_name"]
+        self.depth = depth
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = poll_seconds
+        self.repository = LoreBundleRepository(db_path)
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_config(
+        cls, config_path: Path, db_path: Path, *, provider: Optional[str] = None
+    ) -> "PrewarmWorker":
+        config = load_config(config_path)
+        settings = config.get("prewarm", {})
+        return cls(
+            config=config,
+            db_path=db_path,
+            depth=settings.get("depth", 0),
+            concurrency=settings.get("concurrency", 1),
+            provider=provider,
+            config_path=config_path,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.depth > 0
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix=f"prewarm-{self.game_name}"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name=f"prewarm-{self.game_name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        version = config_version(self._current_config())
+        bundle = self.repository.pop(self.game_name, version)
+        self._wake.set()
+        return bundle
+
+    def _current_config(self) -> Dict[str, Any]:
+        if self.config_path is not None:
+            self.config = load_config(self.config_path)
+        return self.config
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                discarded = self.repository.discard_stale(
+                    self.game_name, config_version(self._current_config())
+                )
+            except Exception:
+                logger.exception("Checking prewarmed bundles for %s failed", self.game_name)
+            else:
+                if discarded:
+                    logger.info(
+                        "Dropped %d bundles built from an older %s config", discarded, self.game_name
+                    )
+            with self._lock:
+                missing = self.depth - self.repository.count(self.game_name) - self._in_flight
+                to_start = max(0, min(missing, self.concurrency - self._in_flight))
+                self._in_flight += to_start
+            for _ in range(to_start):
+                self._executor.submit(self._fill_one)
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def _fill_one(self) -> None:
+        succeeded = False
+        try:
+            self.repository.push(self.game_name, self.build_bundle())
+            succeeded = True
+        except Exception:
+            logger.exception("Prewarming a bundle for %s failed", self.game_name)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        # After a failure the next attempt waits for the poll interval.
+        if succeeded:
+            self._wake.set()
+
+    def build_bundle(self) -> Dict[str, Any]:
+        config = self._current_config()
+        lore_generator = build_role_provider(
+            config, "lore_generator", db_path=self.db_path, provider=self.provider_override
+        )
+        narrator = build_role_provider(
+            config, "narrator", db_path=self.db_path, provider=self.provider_override
+        )
+
+        # A bundle is only worth keeping with real lore; the seed fallback is
+        # what a new game gets anyway, so a failure is left to the next attempt.
+        hidden_lore = generate_hidden_lore(config, lore_generator, fallback=False)
+        state = GameState.new(config["stats"])
+        intro, tokens = generate_intro(config, narrator, state, hidden_lore)
+        return {
+            "hidden_lore": hidden_lore,
+            "state": state.to_dict(include_log=False, include_lore=False),
+            "intro": intro,
+            "tokens": tokens,
+            "config_version": config_version(config),
+        }
+
+
+def config_version(config: Dict[str, Any]) -> str:
+    """Digest of a config's content; unlike registry versions, the same in every process."""
+    payload = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
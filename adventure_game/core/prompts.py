@@ -1,11 +1,32 @@
 from __future__ import annotations
 
+import json
+from functools import lru_cache
 from textwrap import dedent
-from typing import Any, Dict, List
+from typing import Any, Dict, Sequence, Tuple
+
+from ..models.state import TurnLogEntry
+
+
+# Player-visible state the narrator works with; lore, log and summaries are
+# sent through their own prompt blocks.
+STATE_FIELDS = ("world_state", "stats", "inventory", "npc_rel")
 
 
 def build_system_prompt(config: Dict[str, Any], hidden_lore: str) -> str:
-    genre = config.get("genre", "mystery")
+    """Static narrator prefix; memoized so it is byte-identical across turns."""
+    return _build_system_prompt(
+        config.get("genre", "mystery"),
+        config["language"],
+        tuple(config["stats"]),
+        hidden_lore,
+    )
+
+
+@lru_cache(maxsize=256)
+def _build_system_prompt(
+    genre: str, language: str, stats: Tuple[str, ...], hidden_lore: str
+) -> str:
     anti_leak_rules = dedent(
         """
         Anti-Leak Directives:
@@ -14,7 +35,7 @@ def build_system_prompt(config: Dict[str, Any], hidden_lore: str) -> str:
         3. Maintain tone and continuity with the active genre.
         """
     ).strip()
-    stats_str = ", ".join(config["stats"])
+    stats_str = ", ".join(stats)
     game_rules = dedent(
         """
         Game Rules:
@@ -32,41 +53,121 @@ def build_system_prompt(config: Dict[str, Any], hidden_lore: str) -> str:
         {anti_leak_rules}
 
         Respond with immersive narration, 2-3 concise paragraphs max.
-        Respond in the {config['language']} language.
+        Respond in the {language} language.
         Always suggest the player choices and update world state logically.
         If the player attempts impossible actions, narrate the failure.
         Respond in JSON format that can be parsed by python `json` module with the following keys:
         - text: the narration to be displayed to the player
-        - stats: the updated player stats
-        - inventory: the updated player inventory
-        - npc_rel: the updated NPC relationships
-        - world_state: the updated world state
+        - stats: only the stats that changed, with their new values
+        - inventory_add: items the player gained this turn
+        - inventory_remove: items the player lost this turn
+        - npc_rel: only the NPC relationships that changed, with their new values
+        - world_state: the new world state, or omit it if unchanged
+        Omit keys (or leave them empty) when nothing changed.
         """
     ).strip()
 
 
+def build_narration_schema(stats: Sequence[str]) -> Dict[str, Any]:
+    """JSON schema of a narrator response, for providers with structured output.
+
+    Written for strict mode: every key is required, and "unchanged" is
+    expressed as null or an empty list. ``text`` comes first so it streams first.
+    """
+    string_list = {"type": "array", "items": {"type": "string"}}
+    return {
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["text", "stats", "inventory_add", "inventory_remove", "npc_rel", "world_state"],
+        "properties": {
+            "text": {"type": "string"},
+            "stats": {
+                "type": "object",
+                "additionalProperties": False,
+                "required": list(stats),
+                "properties": {stat: {"type": ["integer", "null"]} for stat in stats},
+            },
+            "inventory_add": string_list,
+            "inventory_remove": string_list,
+            "npc_rel": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "additionalProperties": False,
+                    "required": ["name", "relation"],
+                    "properties": {"name": {"type": "string"}, "relation": {"type": "string"}},
+                },
+            },
+            "world_state": {"type": ["string", "null"]},
+        },
+    }
+
+
+def build_lore_system_prompt(config: Dict[str, Any]) -> str:
+    return f"You craft hidden lore for a narrative game in the {config['language']} language."
+
+
+def build_lore_prompt(config: Dict[str, Any], seed: str) -> str:
+    story_size = config["story_size"]
+    npcs = config["npcs"]
+    items = config["items"]
+    return (
+        f"Expand the following seed into a rich hidden lore and story of ({story_size} words).\n"
+        f"The story must focus on the protagonist (the user)'s journey.\n"
+        f"The story should have a plot twist.\n"
+        f"The story should include a maximum of {npcs} NPCs and {items} items.\n"
+        f"The story must have a final boss, and the player must defeat it to win.\n"
+        "Focus on mood, mystery, and stakes.\n"
+        f"Seed: {seed}"
+    )
+
+
+def encode_state(game_state: Dict[str, Any]) -> str:
+    """Minified, deterministic JSON of the narrator-facing state fields."""
+    return json.dumps(
+        {key: game_state[key] for key in STATE_FIELDS if key in game_state},
+        separators=(",", ":"),
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+
+
+def diff_state(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Narrator-facing fields whose value differs from ``previous``."""
+    return {
+        key: current[key]
+        for key in STATE_FIELDS
+        if key in current and previous.get(key) != current[key]
+    }
+
+
 def build_user_prompt(
     *,
     player_input: str,
     game_state: Dict[str, Any],
-    log_history: List[Dict[str, Any]],
+    log_history: Sequence[TurnLogEntry],
     summary: str | None,
+    changes_only: bool = False,
 ) -> str:
     log_excerpt = "\n".join(
-        f"Turn {entry['turn']}: Player -> {entry['player']} | Narrator -> {entry['narrator']}"
-        for entry in log_history[-3:]
+        f"Turn {entry.turn}: Player -> {entry.player} | Narrator -> {entry.narrator}"
+        for entry in log_history
     )
     summary_block = summary or "No summary yet."
-    return dedent(
-        f"""
-        Player action: {player_input}
-        Current state: {game_state}
-        Recent history:\n{log_excerpt if log_excerpt else 'None yet.'}
-        Compact summary: {summary_block}
-
-        Provide the next narration beat.
-        """
-    ).strip()
+    state_label = "State changes since last turn" if changes_only else "Current state"
+    # Slowest-changing blocks first so consecutive turns share a long prefix.
+    # Joined line by line: dedent() leaves the indentation in place as soon as
+    # an interpolated block spans several lines.
+    return "\n".join(
+        [
+            f"Compact summary: {summary_block}",
+            f"Recent history:\n{log_excerpt if log_excerpt else 'None yet.'}",
+            f"{state_label}: {encode_state(game_state)}",
+            f"Player action: {player_input}",
+            "",
+            "Provide the next narration beat.",
+        ]
+    )
 
 
 def build_intro_prompt(
@@ -83,7 +184,7 @@ def build_intro_prompt(
         Weave subtle hints inspired by the hidden lore without revealing secrets:
         {hidden_lore}
 
-        Current world state details for grounding: {game_state}
+        Current world state details for grounding: {encode_state(game_state)}
 
         Conclude with an inviting cue that encourages the player to make their first move.
         """
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class NarrationTextStream:
+    """Incrementally extract the top-level ``text`` value from partial JSON.
+
+    The narrator answers with a JSON object; ``feed`` accepts raw chunks as
+    they stream in and returns the newly decoded part of the ``text`` string
+    so it can be shown before the object is complete.
+    """
+
+    def __init__(self, key: str = "text") -> None:
+        self.key = key
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_string: str | None = None
+        self._awaiting_value = False
+        self._in_value = False
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        if self._done or not chunk:
+            return ""
+        self._buffer += chunk
+        if self._in_value:
+            return self._read_value()
+        return self._scan()
+
+    def _scan(self) -> str:
+        buf = self._buffer
+        while self._pos < len(buf):
+            ch = buf[self._pos]
+            if self._in_string:
+                if ch == "\\":
+                    if self._pos + 1 >= len(buf):
+                        return ""
+                    self._pos += 2
+                    continue
+                if ch == '"':
+                    self._in_string = False
+                    self._last_string = buf[self._string_start : self._pos]
+                self._pos += 1
+                continue
+
+            if ch == '"':
+                if self._awaiting_value:
+                    self._awaiting_value = False
+                    self._in_value = True
+                    self._pos += 1
+                    return self._read_value()
+                self._in_string = True
+                self._string_start = self._pos + 1
+            elif ch == ":":
+                self._awaiting_value = self._depth == 1 and self._last_string == self.key
+                self._last_string = None
+            elif not ch.isspace():
+                self._awaiting_value = False
+                self._last_string = None
+                if ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+            self._pos += 1
+        return ""
+
+    def _read_value(self) -> str:
+        buf = self._buffer
+        out: list[str] = []
+        while self._pos < len(buf):
+            ch = buf[self._pos]
+            if ch == '"':
+                self._done = True
+                self._in_value = False
+                break
+            if ch != "\\":
+                out.append(ch)
+                self._pos += 1
+                continue
+            if self._pos + 1 >= len(buf):
+                break
+            esc = buf[self._pos + 1]
+            if esc == "u":
+                if self._pos + 6 > len(buf):
+                    break
+                code = _hex4(buf[self._pos + 2 : self._pos + 6])
+                width = 6
+                if code is not None and 0xD800 <= code < 0xDC00:
+                    # Surrogate pair: wait for the low half before emitting.
+                    if self._pos + 12 > len(buf):
+                        break
+                    low = _hex4(buf[self._pos + 8 : self._pos + 12])
+                    if buf[self._pos + 6 : self._pos + 8] == "\\u" and low is not None and 0xDC00 <= low < 0xE000:
+                        code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    else:
+                        code = None
+                    width = 12
+                if code is None or 0xD800 <= code < 0xE000:
+                    # Not a valid escape: stop streaming and leave the text
+                    # to the parse of the complete response.
+                    self._done = True
+                    self._in_value = False
+                    break
+                out.append(chr(code))
+                self._pos += width
+            else:
+                out.append(_ESCAPES.get(esc, esc))
+                self._pos += 2
+        return "".join(out)
+
+
+def _hex4(digits: str) -> int | None:
+    """The value of a four-digit ``\\u`` escape, or ``None`` if it is not hex."""
+    if len(digits) != 4 or any(ch not in "0123456789abcdefABCDEF" for ch in digits):
+        return None
+    return int(digits, 16)
@@ -1,41 +1,198 @@
 from __future__ import annotations
 
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 from .llm_provider.base import BaseLLMProvider
+from ..models.state import TurnLogEntry
+from ..utils.metrics import REGISTRY
+from ..utils.token_counter import count_tokens
+
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CHECKS = REGISTRY.counter(
+    "adventure_summarizer_checks_total", "Summary triggers evaluated; result=hit when one fired."
+)
+SUMMARY_CALLS = REGISTRY.counter(
+    "adventure_summarizer_calls_total", "Summarizer LLM calls by prompt kind and outcome."
+)
+
+# Shared across engines so hundreds of sessions don't each own a thread.
+_SUMMARY_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="summarizer")
+
+RECAP_PROMPT = (
+    "Summarize the session so far into a concise yet vivid recap. "
+    "Keep it under 120 words and preserve mysteries."
+)
+ROLLING_PROMPT = (
+    "Update the recap of an ongoing adventure with the new turns. "
+    "Keep it under 120 words, keep what still matters from the previous recap "
+    "and preserve mysteries."
+)
+ARC_PROMPT = (
+    "Condense these chapter recaps of an ongoing adventure into one story-arc "
+    "recap. Keep it under 150 words and preserve open threads and mysteries."
+)
+
+
+def empty_summary_tree() -> Dict[str, Any]:
+    return {
+        "arc": None,
+        "chapters": [],
+        "current": None,
+        "current_turns": 0,
+        "through_turn": 0,
+        "history_tokens": 0,
+    }
 
 
 class LogSummarizer:
-    """Summarize adventure logs to keep context tight."""
+    """Summarize adventure logs to keep context tight.
+
+    In incremental mode only the previous recap and the turns it hasn't seen
+    are sent, so each call stays the same size however long the game runs.
+    With ``chapter_turns`` set, recaps are sealed into chapters every that
+    many turns and chapters are folded into an arc recap past ``max_chapters``.
+    """
 
     def __init__(
         self,
         provider: BaseLLMProvider,
         *,
-        threshold_tokens: int = 1500,
         min_turns: int = 5,
+        incremental: bool = True,
+        chapter_turns: Optional[int] = None,
+        max_chapters: int = 5,
     ) -> None:
         self.provider = provider
-        self.threshold_tokens = threshold_tokens
         self.min_turns = min_turns
+        self.incremental = incremental
+        self.chapter_turns = chapter_turns
+        self.max_chapters = max_chapters
+
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "calls": 0,
+            "input_tokens": 0,
+            "full_transcript_tokens": 0,
+            "saved_tokens": 0,
+        }
+
+    def should_summarize(
+        self,
+        *,
+        prompt_tokens: int,
+        budget: int,
+        turn_count: int,
+        max_turns: Optional[int] = None,
+    ) -> bool:
+        """Compact once the next narrator prompt would exceed its token budget.
+
+        Short turns may never reach the budget, so ``max_turns`` log entries
+        trigger a summary as well.
+        """
+        full = prompt_tokens >= budget or (max_turns is not None and turn_count >= max_turns)
+        hit = full and turn_count >= self.min_turns
+        SUMMARY_CHECKS.inc(result="hit" if hit else "miss")
+        return hit
 
-    def should_summarize(self, *, total_tokens: int, turn_count: int) -> bool:
-        return total_tokens >= self.threshold_tokens and turn_count >= self.min_turns
+    def submit(
+        self, log: List[TurnLogEntry], tree: Optional[Dict[str, Any]] = None
+    ) -> Future[Dict[str, Any]]:
+        """Summarize a snapshot of ``log`` on the background executor."""
+        return _SUMMARY_EXECUTOR.submit(self.summarize, list(log), dict(tree or {}))
 
-    def summarize(self, log: List[Dict[str, Any]]) -> str:
-        transcript = "\n".join(
-            f"Turn {entry['turn']} - Player: {entry['player']} | Narrator: {entry['narrator']}"
-            for entry in log
+    def summarize(
+        self, log: List[TurnLogEntry], tree: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Fold ``log`` into the summary ``tree`` and return the updated tree.
+
+        A failed recap call raises, leaving the caller's tree as it was, so
+        the turns stay in the log for the next attempt.
+        """
+        tree = {**empty_summary_tree(), **(tree or {})}
+        tree["chapters"] = list(tree["chapters"])
+        new_entries = [e for e in log if e.turn > tree["through_turn"]]
+        if not new_entries:
+            return tree
+
+        transcript = _transcript(new_entries)
+        tree["history_tokens"] += count_tokens([transcript])
+        if self.incremental and tree["current"]:
+            user_prompt = f"Previous recap: {tree['current']}\n\nNew turns:\n{transcript}"
+            tree["current"] = self._call(ROLLING_PROMPT, user_prompt, kind="rolling")
+        elif self.incremental:
+            tree["current"] = self._call(RECAP_PROMPT, transcript, kind="recap")
+        else:
+            # Legacy mode: re-summarize the whole in-memory log every time.
+            tree["current"] = self._call(RECAP_PROMPT, _transcript(log), kind="full")
+        tree["current_turns"] += len(new_entries)
+        tree["through_turn"] = new_entries[-1].turn
+
+        with self._stats_lock:
+            # What re-sending the whole transcript would have cost instead.
+            self.stats["full_transcript_tokens"] += tree["history_tokens"] + count_tokens(
+                [RECAP_PROMPT]
+            )
+            self.stats["saved_tokens"] = max(
+                0, self.stats["full_transcript_tokens"] - self.stats["input_tokens"]
+            )
+
+        if self.chapter_turns and tree["current_turns"] >= self.chapter_turns:
+            tree["chapters"].append(tree["current"])
+            tree["current"] = None
+            tree["current_turns"] = 0
+            if len(tree["chapters"]) > self.max_chapters:
+                try:
+                    self._fold_into_arc(tree)
+                except Exception as exc:
+                    # The chapters are kept and folded when the next one is sealed.
+                    logger.warning("Folding chapters into the arc failed: %s", exc)
+        return tree
+
+    def _fold_into_arc(self, tree: Dict[str, Any]) -> None:
+        blocks = [f"Story so far: {tree['arc']}"] if tree["arc"] else []
+        blocks.extend(
+            f"Chapter {idx}: {chapter}" for idx, chapter in enumerate(tree["chapters"], start=1)
         )
+        user_prompt = "\n".join(blocks)
+        tree["arc"] = self._call(ARC_PROMPT, user_prompt, kind="arc")
+        tree["chapters"] = []
+
+    def _call(self, system_prompt: str, user_prompt: str, *, kind: str) -> str:
+        with self._stats_lock:
+            self.stats["calls"] += 1
+            self.stats["input_tokens"] += count_tokens([system_prompt, user_prompt])
         try:
             response = self.provider.generate(
-                system_prompt=(
-                    "Summarize the session so far into a concise yet vivid recap. "
-                    "Keep it under 120 words and preserve mysteries."
-                ),
-                user_prompt=transcript,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
                 context=None,
             )
-            return response["text"].strip()
         except Exception:
-            return transcript[-300:]
+            SUMMARY_CALLS.inc(kind=kind, outcome="error")
+            raise
+        SUMMARY_CALLS.inc(kind=kind, outcome="ok")
+        return response["text"].strip()
+
+
+def render_summary(tree: Dict[str, Any]) -> Optional[str]:
+    """Flatten a summary tree into the text handed to the narrator."""
+    blocks: List[str] = []
+    if tree.get("arc"):
+        blocks.append(f"Story so far: {tree['arc']}")
+    for idx, chapter in enumerate(tree.get("chapters", []), start=1):
+        blocks.append(f"Chapter {idx}: {chapter}")
+    if tree.get("current"):
+        blocks.append(f"Latest: {tree['current']}" if blocks else tree["current"])
+    return "\n".join(blocks) or None
+
+
+def _transcript(log: List[TurnLogEntry]) -> str:
+    return "\n".join(
+        f"Turn {entry.turn} - Player: {entry.player} | Narrator: {entry.narrator}"
+        for entry in log
+    )
@@ -1,64 +1,471 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import sqlite3
+import threading
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
+from .state import GameState, TurnLogEntry, dumps, loads
+
+
+SCHEMA_VERSION = 2
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS game_state (
     slot TEXT PRIMARY KEY,
     state_json TEXT NOT NULL,
     summary TEXT,
+    log_from INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
     created_at REAL NOT NULL,
     updated_at REAL NOT NULL
 );
+CREATE TABLE IF NOT EXISTS game_lore (
+    slot TEXT PRIMARY KEY,
+    hidden_lore TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turn_log (
+    slot TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    narrator TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (slot, turn)
+);
+CREATE TABLE IF NOT EXISTS slot_lease (
+    slot TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+BUNDLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lore_bundle (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_name TEXT NOT NULL,
+    bundle_json TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lore_bundle_game ON lore_bundle (game_name, id);
 """
 
+# Keys stored outside the per-turn state row (pre-split saves kept them inline).
+_SPLIT_KEYS = ("log", "hidden_lore")
+
+
+class _SharedConnection:
+    def __init__(self, db_path: Path) -> None:
+        # Autocommit mode: transactions are opened explicitly in ``transaction``.
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.lock = threading.RLock()
+        self.initialized: set[str] = set()
+
+
+_connections: Dict[str, _SharedConnection] = {}
+_connections_lock = threading.Lock()
+
+
+def _shared(db_path: Path) -> _SharedConnection:
+    # Per process: a connection inherited across fork must not be reused.
+    key = f"{os.getpid()}:{Path(db_path).resolve()}"
+    with _connections_lock:
+        shared = _connections.get(key)
+        if shared is None:
+            shared = _connections[key] = _SharedConnection(db_path)
+        return shared
+
+
+@contextmanager
+def connection(db_path: Path) -> Iterator[sqlite3.Connection]:
+    """The process-wide WAL connection for ``db_path``, held exclusively."""
+    shared = _shared(db_path)
+    with shared.lock:
+        yield shared.conn
+
+
+@contextmanager
+def transaction(db_path: Path) -> Iterator[sqlite3.Connection]:
+    """Run the block in one ``BEGIN IMMEDIATE`` transaction on the shared connection."""
+    shared = _shared(db_path)
+    with shared.lock:
+        if shared.conn.in_transaction:
+            # Nested use joins the outer transaction.
+            yield shared.conn
+            return
+        shared.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield shared.conn
+            shared.conn.execute("COMMIT")
+        except BaseException:
+            # Also when COMMIT itself failed (e.g. busy): the shared
+            # connection must not be left inside the transaction.
+            if shared.conn.in_transaction:
+                shared.conn.execute("ROLLBACK")
+            raise
+
+
+def ensure_schema(db_path: Path, name: str, script: str) -> None:
+    """Create ``script``'s tables once per process and database."""
+    shared = _shared(db_path)
+    with shared.lock:
+        if name in shared.initialized:
+            return
+        shared.conn.executescript(script)
+        shared.initialized.add(name)
+
+
+class StaleStateError(RuntimeError):
+    """A save lost the race: the slot was written elsewhere since it was loaded."""
+
+    def __init__(self, slots: Sequence[str]) -> None:
+        super().__init__(
+            "This game was updated by another session; reload to continue. "
+            f"(stale: {', '.join(slots)})"
+        )
+        self.slots = list(slots)
+
+
+def slot_key(game_name: str, slot: str) -> str:
+    """Storage key of a player's slot; every game keeps its own saves."""
+    return f"{game_name}:{slot}"
+
 
 class GameStateRepository:
+    """Persists game slots.
+
+    The per-turn write only upserts the small mutable state row. Hidden lore
+    is stored once per slot and turns are appended to ``turn_log``; the row's
+    ``log_from`` marks which turns are still part of the in-memory log.
+
+    Saves are compare-and-swap on the row's ``version``: a save only lands if
+    the row is still at the version this repository last loaded or wrote, so
+    a worker holding an outdated copy of a game gets ``StaleStateError``
+    instead of overwriting newer turns. ``acquire_lease`` serializes turns on
+    a slot across processes sharing the database.
+    """
+
     def __init__(self, db_path: Path) -> None:
         self.db_path = db_path
+        self._persisted_turn: Dict[str, int] = {}
+        self._lore_digest: Dict[str, str] = {}
+        # Row version each slot was last loaded or saved at by this process.
+        self._versions: Dict[str, int] = {}
         self._ensure_schema()
 
     def _ensure_schema(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(SCHEMA)
-            conn.commit()
+        shared = _shared(self.db_path)
+        with shared.lock:
+            if "game_state" in shared.initialized:
+                return
+            shared.conn.executescript(SCHEMA)
+            with transaction(self.db_path) as conn:
+                _migrate(conn)
+            shared.initialized.add("game_state")
 
-    def load(self, slot: str) -> Optional[Dict[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT state_json, summary FROM game_state WHERE slot = ?", (slot,)
-            )
-            row = cursor.fetchone()
+    def load(
+        self, slot: str, *, stat_names: Sequence[str] = ()
+    ) -> Optional[Tuple[GameState, Optional[str]]]:
+        """The slot's state and rendered summary, or None for a new slot."""
+        with connection(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT state_json, summary, log_from, version FROM game_state WHERE slot = ?",
+                (slot,),
+            ).fetchone()
             if not row:
+                # Deleted elsewhere, perhaps to start over: nothing cached
+                # about the old game may leak into the next one.
+                self.forget(slot)
                 return None
-            state = json.loads(row[0])
-            state["summary"] = row[1]
-            return state
+            lore = conn.execute(
+                "SELECT hidden_lore FROM game_lore WHERE slot = ?", (slot,)
+            ).fetchone()
+            log_rows = conn.execute(
+                "SELECT turn, player, narrator FROM turn_log WHERE slot = ? AND turn >= ? ORDER BY turn",
+                (slot, row[2]),
+            ).fetchall()
+
+        state = GameState.from_dict(loads(row[0]), stat_names)
+        if lore:
+            state.hidden_lore = lore[0]
+            self._lore_digest[slot] = _digest(lore[0])
+        state.log = [TurnLogEntry(*log_row) for log_row in log_rows]
+        if log_rows:
+            self._persisted_turn[slot] = log_rows[-1][0]
+        self._versions[slot] = row[3]
+        return state, row[1]
+
+    def is_current(self, slot: str) -> bool:
+        """Whether the stored slot is still at the version this process last saw."""
+        with connection(self.db_path) as conn:
+            row = conn.execute("SELECT version FROM game_state WHERE slot = ?", (slot,)).fetchone()
+        return (row[0] if row else None) == self._versions.get(slot)
+
+    def load_history(
+        self, slot: str, *, before: Optional[int] = None, limit: int = 20
+    ) -> List[TurnLogEntry]:
+        """Up to ``limit`` turns older than ``before``, oldest first."""
+        with connection(self.db_path) as conn:
+            # Walks the (slot, turn) primary key backwards; no table scan.
+            rows = conn.execute(
+                "SELECT turn, player, narrator FROM turn_log WHERE slot = ? AND turn < ? ORDER BY turn DESC LIMIT ?",
+                (slot, before if before is not None else 2**62, limit),
+            ).fetchall()
+        return [TurnLogEntry(*row) for row in reversed(rows)]
 
     def save(
         self,
         slot: str,
         *,
-        game_state: Dict[str, Any],
+        game_state: GameState,
         summary: Optional[str],
     ) -> None:
-        payload = json.dumps(game_state)
+        self.save_many([(slot, game_state, summary)])
+
+    def save_many(
+        self,
+        items: List[Tuple[str, GameState, Optional[str]]],
+        *,
+        backlog: Optional[Dict[str, List[TurnLogEntry]]] = None,
+    ) -> None:
+        """Persist several slots in a single transaction.
+
+        ``backlog`` holds, per slot, turns that already left the in-memory log
+        but were never written; they are appended without moving ``log_from``.
+        Stale slots are skipped and reported by a ``StaleStateError`` raised
+        once the others are committed.
+        """
+        backlog = backlog or {}
+        stale: List[str] = []
+        versions = {slot: self._versions.get(slot) for slot, _, _ in items}
+        try:
+            with transaction(self.db_path) as conn:
+                for slot, game_state, summary in items:
+                    if not self._write(conn, slot, game_state, summary, backlog.get(slot, ())):
+                        stale.append(slot)
+        except BaseException:
+            # The write-skipping caches may now be ahead of the database.
+            for slot, _, _ in items:
+                self._persisted_turn.pop(slot, None)
+                self._lore_digest.pop(slot, None)
+            # Rolled back, so the rows are still at the versions we started from.
+            for slot, version in versions.items():
+                if version is None:
+                    self._versions.pop(slot, None)
+                else:
+                    self._versions[slot] = version
+            raise
+        if stale:
+            raise StaleStateError(stale)
+
+    def _write(
+        self,
+        conn: sqlite3.Connection,
+        slot: str,
+        game_state: GameState,
+        summary: Optional[str],
+        backlog: Sequence[TurnLogEntry] = (),
+    ) -> bool:
         now = time.time()
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
+        log = game_state.log
+
+        # The version check comes first so a stale save writes nothing at all.
+        payload = dumps(game_state.to_dict(include_log=False, include_lore=False))
+        log_from = log[0].turn if log else 0
+        expected = self._versions.get(slot)
+        if expected is None:
+            cursor = conn.execute(
+                """
+                INSERT INTO game_state (slot, state_json, summary, log_from, version, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT(slot) DO NOTHING
+                """,
+                (slot, payload, summary, log_from, now, now),
+            )
+        else:
+            cursor = conn.execute(
                 """
-                INSERT INTO game_state (slot, state_json, summary, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?)
+                UPDATE game_state
+                SET state_json = ?, summary = ?, log_from = ?, version = version + 1, updated_at = ?
+                WHERE slot = ? AND version = ?
+                """,
+                (payload, summary, log_from, now, slot, expected),
+            )
+        if cursor.rowcount == 0:
+            return False
+        self._versions[slot] = (expected or 0) + 1
+
+        hidden_lore = game_state.hidden_lore
+        if hidden_lore is not None:
+            digest = _digest(hidden_lore)
+            if self._lore_digest.get(slot) != digest:
+                conn.execute(
+                    """
+                    INSERT INTO game_lore (slot, hidden_lore) VALUES (?, ?)
+                    ON CONFLICT(slot) DO UPDATE SET hidden_lore = excluded.hidden_lore
+                    """,
+                    (slot, hidden_lore),
+                )
+                self._lore_digest[slot] = digest
+
+        persisted_turn = self._persisted_turn.get(slot, -1)
+        new_entries = [entry for entry in [*backlog, *log] if entry.turn > persisted_turn]
+        if new_entries:
+            conn.executemany(
+                "INSERT OR IGNORE INTO turn_log (slot, turn, player, narrator, created_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (slot, entry.turn, entry.player, entry.narrator, now)
+                    for entry in new_entries
+                ],
+            )
+            self._persisted_turn[slot] = new_entries[-1].turn
+        return True
+
+    def acquire_lease(self, slot: str, owner: str, ttl_seconds: float) -> bool:
+        """Take or extend ``owner``'s lease on ``slot``; False while another owner holds it."""
+        now = time.time()
+        with transaction(self.db_path) as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO slot_lease (slot, owner, expires_at) VALUES (?, ?, ?)
                 ON CONFLICT(slot) DO UPDATE SET
-                    state_json = excluded.state_json,
-                    summary = excluded.summary,
-                    updated_at = excluded.updated_at
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE slot_lease.owner = excluded.owner OR slot_lease.expires_at < ?
                 """,
-                (slot, payload, summary, now, now),
+                (slot, owner, now + ttl_seconds, now),
+            )
+            return cursor.rowcount > 0
+
+    def release_lease(self, slot: str, owner: str) -> None:
+        with transaction(self.db_path) as conn:
+            conn.execute("DELETE FROM slot_lease WHERE slot = ? AND owner = ?", (slot, owner))
+
+    def rename(self, old: str, new: str) -> bool:
+        """Move a slot's rows to another key, unless ``new`` is already taken."""
+        with transaction(self.db_path) as conn:
+            if conn.execute("SELECT 1 FROM game_state WHERE slot = ?", (new,)).fetchone():
+                return False
+            cursor = conn.execute("UPDATE game_state SET slot = ? WHERE slot = ?", (new, old))
+            if cursor.rowcount == 0:
+                return False
+            conn.execute("UPDATE game_lore SET slot = ? WHERE slot = ?", (new, old))
+            conn.execute("UPDATE turn_log SET slot = ? WHERE slot = ?", (new, old))
+        self.forget(old)
+        return True
+
+    def delete(self, slot: str) -> None:
+        with transaction(self.db_path) as conn:
+            conn.execute("DELETE FROM game_state WHERE slot = ?", (slot,))
+            conn.execute("DELETE FROM game_lore WHERE slot = ?", (slot,))
+            conn.execute("DELETE FROM turn_log WHERE slot = ?", (slot,))
+            conn.execute("DELETE FROM slot_lease WHERE slot = ?", (slot,))
+        self.forget(slot)
+
+    def forget(self, slot: str) -> None:
+        """Drop what this repository remembers about a slot's stored rows."""
+        for cache in (self._persisted_turn, self._lore_digest, self._versions):
+            cache.pop(slot, None)
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Upgrade databases written before lore and log had their own tables
+    (version 1) and before saves were versioned (version 2)."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(game_state)")}
+    if "log_from" not in columns:
+        conn.execute("ALTER TABLE game_state ADD COLUMN log_from INTEGER NOT NULL DEFAULT 0")
+    if "version" not in columns:
+        conn.execute("ALTER TABLE game_state ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    if version < 1:
+        _split_lore_and_log(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _split_lore_and_log(conn: sqlite3.Connection) -> None:
+    now = time.time()
+    for slot, state_json in conn.execute("SELECT slot, state_json FROM game_state").fetchall():
+        state = json.loads(state_json)
+        if not any(key in state for key in _SPLIT_KEYS):
+            continue
+        log = state.pop("log", [])
+        for idx, entry in enumerate(log):
+            conn.execute(
+                "INSERT OR IGNORE INTO turn_log (slot, turn, player, narrator, created_at) VALUES (?, ?, ?, ?, ?)",
+                (slot, entry.get("turn", idx), entry.get("player", ""), entry.get("narrator", ""), now),
+            )
+        hidden_lore = state.pop("hidden_lore", None)
+        if hidden_lore is not None:
+            conn.execute(
+                "INSERT OR REPLACE INTO game_lore (slot, hidden_lore) VALUES (?, ?)",
+                (slot, hidden_lore),
             )
-            conn.commit()
+        conn.execute(
+            "UPDATE game_state SET state_json = ?, log_from = ? WHERE slot = ?",
+            (json.dumps(state), log[0].get("turn", 0) if log else 0, slot),
+        )
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class LoreBundleRepository:
+    """Pre-generated hidden lore and intro bundles, queued per game."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        ensure_schema(self.db_path, "lore_bundle", BUNDLE_SCHEMA)
+
+    def count(self, game_name: str) -> int:
+        with connection(self.db_path) as conn:
+            cursor = conn.execute(
+                "SELECT COUNT(*) FROM lore_bundle WHERE game_name = ?", (game_name,)
+            )
+            return cursor.fetchone()[0]
+
+    def discard_stale(self, game_name: str, config_version: str) -> int:
+        """Drop bundles built from another version of the game's config."""
+        with transaction(self.db_path) as conn:
+            return _discard_stale(conn, game_name, config_version)
+
+    def push(self, game_name: str, bundle: Dict[str, Any]) -> None:
+        with transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO lore_bundle (game_name, bundle_json, created_at) VALUES (?, ?, ?)",
+                (game_name, json.dumps(bundle), time.time()),
+            )
+
+    def pop(self, game_name: str, config_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        # IMMEDIATE so two workers can never claim the same bundle.
+        with transaction(self.db_path) as conn:
+            if config_version is not None:
+                _discard_stale(conn, game_name, config_version)
+            row = conn.execute(
+                "SELECT id, bundle_json FROM lore_bundle WHERE game_name = ? ORDER BY id LIMIT 1",
+                (game_name,),
+            ).fetchone()
+            if row:
+                conn.execute("DELETE FROM lore_bundle WHERE id = ?", (row[0],))
+        return json.loads(row[1]) if row else None
+
+
+def _discard_stale(conn: sqlite3.Connection, game_name: str, config_version: str) -> int:
+    cursor = conn.execute(
+        """
+        DELETE FROM lore_bundle
+        WHERE game_name = ? AND json_extract(bundle_json, '$.config_version') IS NOT ?
+        """,
+        (game_name, config_version),
+    )
+    return cursor.rowcount
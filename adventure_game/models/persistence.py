@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .db_models import GameStateRepository, StaleStateError
+from .state import GameState, TurnLogEntry
+
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("sync", "batched")
+
+
+class SyncPersister:
+    """Writes every save straight to SQLite before the turn returns."""
+
+    def __init__(self, repository: GameStateRepository) -> None:
+        self.repository = repository
+
+    def save(self, slot: str, *, game_state: GameState, summary: Optional[str]) -> None:
+        self.repository.save(slot, game_state=game_state, summary=summary)
+
+    def load(
+        self, slot: str, *, stat_names: Sequence[str] = ()
+    ) -> Optional[Tuple[GameState, Optional[str]]]:
+        return self.repository.load(slot, stat_names=stat_names)
+
+    def is_current(self, slot: str) -> bool:
+        return self.repository.is_current(slot)
+
+    def discard(self, slot: str) -> None:
+        pass
+
+    def flush(self, slot: Optional[str] = None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass
+class _PendingWrite:
+    game_state: GameState
+    summary: Optional[str]
+    # Turns trimmed from the in-memory log before they were ever flushed.
+    backlog: List[TurnLogEntry] = field(default_factory=list)
+
+
+class WriteBehindPersister(SyncPersister):
+    """Queues dirty slots and flushes them in batched transactions.
+
+    A background thread writes every ``flush_interval`` seconds, or sooner
+    once ``batch_size`` slots are dirty. Anything still queued is lost if
+    the process dies before the next flush; ``close`` flushes on shutdown.
+    A save the background flush rejected as stale is reported by raising
+    its ``StaleStateError`` from the next ``save`` of that slot.
+    """
+
+    def __init__(
+        self,
+        repository: GameStateRepository,
+        *,
+        flush_interval: float = 0.5,
+        batch_size: int = 64,
+    ) -> None:
+        super().__init__(repository)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._pending: Dict[str, _PendingWrite] = {}
+        self._stale: Dict[str, StaleStateError] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def save(self, slot: str, *, game_state: GameState, summary: Optional[str]) -> None:
+        # Snapshot now: the engine keeps mutating its state after we return.
+        snapshot = game_state.snapshot()
+        with self._lock:
+            error = self._stale.pop(slot, None)
+            if error is not None:
+                raise error
+            previous = self._pending.get(slot)
+            backlog: List[TurnLogEntry] = []
+            if previous is not None:
+                first_turn = snapshot.log[0].turn if snapshot.log else None
+                backlog = [
+                    entry
+                    for entry in previous.backlog + previous.game_state.log
+                    if first_turn is None or entry.turn < first_turn
+                ]
+            self._pending[slot] = _PendingWrite(snapshot, summary, backlog)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def load(
+        self, slot: str, *, stat_names: Sequence[str] = ()
+    ) -> Optional[Tuple[GameState, Optional[str]]]:
+        self.flush(slot)
+        return self.repository.load(slot, stat_names=stat_names)
+
+    def is_current(self, slot: str) -> bool:
+        with self._lock:
+            if slot in self._pending:
+                # Ours is the newest copy; a conflicting write fails when flushed.
+                return True
+        return self.repository.is_current(slot)
+
+    def discard(self, slot: str) -> None:
+        with self._lock:
+            self._pending.pop(slot, None)
+            self._stale.pop(slot, None)
+
+    def flush(self, slot: Optional[str] = None) -> None:
+        with self._flush_lock:
+            with self._lock:
+                if slot is None:
+                    batch, self._pending = self._pending, {}
+                elif slot in self._pending:
+                    batch = {slot: self._pending.pop(slot)}
+                else:
+                    return
+            if not batch:
+                return
+            self.repository.save_many(
+                [(name, write.game_state, write.summary) for name, write in batch.items()],
+                backlog={name: write.backlog for name, write in batch.items() if write.backlog},
+            )
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except StaleStateError as exc:
+                logger.warning("Write-behind flush dropped stale saves: %s", ", ".join(exc.slots))
+                with self._lock:
+                    for slot in exc.slots:
+                        self._stale[slot] = exc
+            except Exception:
+                logger.exception("Write-behind flush failed")
+
+
+_persisters: Dict[Tuple[str, str], SyncPersister] = {}
+_persisters_lock = threading.Lock()
+
+
+def get_persister(
+    db_path: Path,
+    *,
+    durability: str = "sync",
+    flush_interval_ms: int = 500,
+    batch_size: int = 64,
+) -> SyncPersister:
+    """Process-wide persister per database and durability mode."""
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode '{durability}'. Expected one of {DURABILITY_MODES}")
+    key = (str(Path(db_path).resolve()), durability)
+    with _persisters_lock:
+        persister = _persisters.get(key)
+        if persister is None:
+            repository = GameStateRepository(db_path)
+            if durability == "batched":
+                persister = WriteBehindPersister(
+                    repository,
+                    flush_interval=flush_interval_ms / 1000,
+                    batch_size=batch_size,
+                )
+            else:
+                persister = SyncPersister(repository)
+            _persisters[key] = persister
+        return persister
+
+
+class SlotBusyError(RuntimeError):
+    """Another worker kept a slot's lease longer than we were willing to wait."""
+
+
+class SlotLeases:
+    """Serializes turns on a slot across processes sharing one database.
+
+    A lease is a ``slot_lease`` row owned by one process and expiring after
+    ``ttl_seconds``, so a crashed worker only blocks its slots briefly.
+    Correctness does not rest on the lease alone: a save from a worker
+    whose lease ran out is still rejected by the repository's version check.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        ttl_seconds: float = 90.0,
+        wait_seconds: float = 30.0,
+        poll_seconds: float = 0.02,
+    ) -> None:
+        self.repository = GameStateRepository(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        self._token = uuid.uuid4().hex[:8]
+
+    @property
+    def owner(self) -> str:
+        # Includes the pid so workers forked after start-up never share an owner.
+        return f"{socket.gethostname()}:{os.getpid()}:{self._token}"
+
+    def acquire(self, slot: str) -> None:
+        deadline = time.monotonic() + self.wait_seconds
+        while not self.repository.acquire_lease(slot, self.owner, self.ttl_seconds):
+            if time.monotonic() >= deadline:
+                raise SlotBusyError("This game is busy in another session; try again shortly.")
+            time.sleep(self.poll_seconds)
+
+    async def aacquire(self, slot: str) -> None:
+        deadline = time.monotonic() + self.wait_seconds
+        while not await asyncio.to_thread(
+            self.repository.acquire_lease, slot, self.owner, self.ttl_seconds
+        ):
+            if time.monotonic() >= deadline:
+                raise SlotBusyError("This game is busy in another session; try again shortly.")
+            await asyncio.sleep(self.poll_seconds)
+
+    def release(self, slot: str) -> None:
+        self.repository.release_lease(slot, self.owner)
+
+
+def delete_slot(db_path: Path, slot: str) -> None:
+    """Drop a slot everywhere: queued writes first, then the stored rows."""
+    persisters = _persisters_for(db_path)
+    for persister in persisters:
+        persister.discard(slot)
+        persister.flush()
+    # Through every live repository, so none keeps turn or version caches
+    # for the deleted game into the next one on the same slot.
+    for repository in _repositories_for(db_path, persisters):
+        repository.delete(slot)
+
+
+def rename_slot(db_path: Path, old: str, new: str) -> bool:
+    """Move a stored slot to a new key, e.g. a save from before game namespacing."""
+    persisters = _persisters_for(db_path)
+    for persister in persisters:
+        persister.flush(old)
+    repositories = _repositories_for(db_path, persisters)
+    renamed = repositories[0].rename(old, new)
+    for repository in repositories[1:]:
+        repository.forget(old)
+    return renamed
+
+
+def _persisters_for(db_path: Path) -> List[SyncPersister]:
+    resolved = str(Path(db_path).resolve())
+    with _persisters_lock:
+        return [p for (path, _), p in _persisters.items() if path == resolved]
+
+
+def _repositories_for(db_path: Path, persisters: List[SyncPersister]) -> List[GameStateRepository]:
+    return [p.repository for p in persisters] or [GameStateRepository(db_path)]
+
+
+@atexit.register
+def close_all() -> None:
+    with _persisters_lock:
+        persisters = list(_persisters.values())
+    for persister in persisters:
+        try:
+            persister.close()
+        except Exception:
+            logger.exception("Final flush failed")
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field
+from numbers import Real
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - fallback to the stdlib codec
+    orjson = None  # type: ignore[assignment]
+
+
+def dumps(obj: Any) -> str:
+    """Compact JSON; uses orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(text: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+class NarrationSchemaError(ValueError):
+    """The narrator's JSON does not match the expected response shape."""
+
+
+_interned_names: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern_names(names: Sequence[str]) -> Tuple[str, ...]:
+    key = tuple(names)
+    return _interned_names.setdefault(key, key)
+
+
+class Stats(MutableMapping):
+    """Numeric player stats.
+
+    Stat names live in a tuple shared by every session of a game, so each
+    instance only carries its list of values.
+    """
+
+    __slots__ = ("_names", "_values")
+
+    def __init__(self, names: Sequence[str], values: Optional[Sequence[Real]] = None) -> None:
+        self._names = _intern_names(names)
+        self._values: List[Real] = list(values) if values is not None else [100] * len(names)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Real], names: Sequence[str] = ()) -> "Stats":
+        ordered = list(names) + [name for name in data if name not in names]
+        return cls(ordered, [data.get(name, 100) for name in ordered])
+
+    def __getitem__(self, name: str) -> Real:
+        try:
+            return self._values[self._names.index(name)]
+        except ValueError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name: str, value: Real) -> None:
+        try:
+            self._values[self._names.index(name)] = value
+        except ValueError:
+            self._names = _intern_names(self._names + (name,))
+            self._values.append(value)
+
+    def __delitem__(self, name: str) -> None:
+        try:
+            idx = self._names.index(name)
+        except ValueError:
+            raise KeyError(name) from None
+        self._names = _intern_names(self._names[:idx] + self._names[idx + 1 :])
+        del self._values[idx]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __repr__(self) -> str:
+        return f"Stats({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Real]:
+        return dict(zip(self._names, self._values))
+
+    def copy(self) -> "Stats":
+        return Stats(self._names, self._values)
+
+
+@dataclass(slots=True, frozen=True)
+class TurnLogEntry:
+    turn: int
+    player: str
+    narrator: str
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], default_turn: int = 0) -> "TurnLogEntry":
+        turn = data.get("turn")
+        return cls(
+            turn=turn if isinstance(turn, int) else default_turn,
+            player=data.get("player", ""),
+            narrator=data.get("narrator", ""),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"turn": self.turn, "player": self.player, "narrator": self.narrator}
+
+
+@dataclass(slots=True)
+class GameState:
+    stats: Stats
+    world_state: str = "beginning"
+    inventory: List[str] = field(default_factory=list)
+    npc_rel: Dict[str, Any] = field(default_factory=dict)
+    log: List[TurnLogEntry] = field(default_factory=list)
+    summary_tree: Optional[Dict[str, Any]] = None
+    hidden_lore: Optional[str] = None
+
+    @classmethod
+    def new(cls, stat_names: Sequence[str]) -> "GameState":
+        return cls(stats=Stats(stat_names))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], stat_names: Sequence[str] = ()) -> "GameState":
+        return cls(
+            stats=Stats.from_dict(data.get("stats") or {}, stat_names),
+            world_state=data.get("world_state") or "beginning",
+            inventory=[str(item) for item in data.get("inventory") or []],
+            npc_rel=dict(data.get("npc_rel") or {}),
+            log=[
+                TurnLogEntry.from_dict(entry, default_turn=idx)
+                for idx, entry in enumerate(data.get("log") or [], start=1)
+            ],
+            summary_tree=data.get("summary_tree"),
+            hidden_lore=data.get("hidden_lore"),
+        )
+
+    def to_dict(self, *, include_log: bool = True, include_lore: bool = True) -> Dict[str, Any]:
+        data = self.narrator_view()
+        if self.summary_tree is not None:
+            data["summary_tree"] = self.summary_tree
+        if include_log:
+            data["log"] = [entry.to_dict() for entry in self.log]
+        if include_lore and self.hidden_lore is not None:
+            data["hidden_lore"] = self.hidden_lore
+        return data
+
+    def narrator_view(self) -> Dict[str, Any]:
+        """Fresh copies of the fields the narrator sees."""
+        return {
+            "world_state": self.world_state,
+            "stats": self.stats.to_dict(),
+            "inventory": list(self.inventory),
+            "npc_rel": dict(self.npc_rel),
+        }
+
+    def snapshot(self) -> "GameState":
+        """Copy that is safe to hand to another thread.
+
+        Log entries are immutable and the lore is a string, so only the
+        containers are copied.
+        """
+        tree = self.summary_tree
+        return GameState(
+            stats=self.stats.copy(),
+            world_state=self.world_state,
+            inventory=list(self.inventory),
+            npc_rel=dict(self.npc_rel),
+            log=list(self.log),
+            summary_tree={**tree, "chapters": list(tree.get("chapters", []))} if tree else tree,
+            hidden_lore=self.hidden_lore,
+        )
+
+
+def validate_narration(payload: Any) -> Dict[str, Any]:
+    """Check and normalise a narrator response; raises ``NarrationSchemaError``."""
+    if not isinstance(payload, dict):
+        raise NarrationSchemaError("narrator response must be a JSON object")
+    text = payload.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise NarrationSchemaError("'text' must be a non-empty string")
+
+    clean: Dict[str, Any] = {"text": text}
+    npc_rel = payload.get("npc_rel")
+    if isinstance(npc_rel, list):
+        # Structured-output form: [{"name": ..., "relation": ...}]
+        try:
+            npc_rel = {entry["name"]: entry["relation"] for entry in npc_rel}
+        except (KeyError, TypeError):
+            raise NarrationSchemaError("'npc_rel' entries need 'name' and 'relation'") from None
+    for key, value in (("stats", payload.get("stats")), ("npc_rel", npc_rel)):
+        if value in (None, ""):
+            continue
+        if not isinstance(value, dict):
+            raise NarrationSchemaError(f"'{key}' must be an object")
+        # null means "unchanged".
+        clean[key] = {name: item for name, item in value.items() if item is not None}
+    if "stats" in clean:
+        clean["stats"] = {name: _number(name, value) for name, value in clean["stats"].items()}
+    for key in ("inventory", "inventory_add", "inventory_remove"):
+        value = payload.get(key)
+        if value is None:
+            continue
+        if not isinstance(value, list):
+            raise NarrationSchemaError(f"'{key}' must be a list")
+        clean[key] = [str(item) for item in value]
+    world_state = payload.get("world_state")
+    if world_state not in (None, ""):
+        if not isinstance(world_state, str):
+            raise NarrationSchemaError("'world_state' must be a string")
+        clean["world_state"] = world_state
+    return clean
+
+
+def _number(name: str, value: Any) -> Real:
+    if isinstance(value, Real) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value) if "." in value else int(value)
+        except ValueError:
+            pass
+    raise NarrationSchemaError(f"stat '{name}' must be a number, got {value!r}")
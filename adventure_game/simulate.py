@@ -0,0 +1,348 @@
+"""Batch simulation and deterministic replay of scripted games, without the web UI.
+
+    python -m adventure_game.simulate run configs/5d_spacetime_romance.yaml script.jsonl \\
+        --workers 8 --record runs.jsonl
+    python -m adventure_game.simulate replay runs.jsonl
+
+The script is JSONL with one game per line, ``{"id": "g1", "actions": [...]}``
+(a bare JSON list of actions also works). ``run`` plays every game through
+``GameEngine`` on a thread or process pool and reports throughput; with
+``--record`` it writes every prompt/response pair and each turn's outcome.
+``replay`` plays a recording again with every role served from the recorded
+calls, so no model is called, and fails unless narration and final state
+match bit for bit.
+
+So that a game plays out the same way twice, a summary started after one
+turn is always applied before the next (the web app applies it whenever it
+happens to be ready). Replays also need the same tokenizer as the recording,
+since it decides when summaries start.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .core.config_registry import load_config
+from .core.game_engine import GameEngine
+from .core.llm_provider import base as provider_base
+from .core.llm_provider.recording import RecordingProvider, ReplayProvider
+
+
+logger = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+
+
+class SimulatedEngine(GameEngine):
+    """Engine whose provider calls are recorded or replayed.
+
+    ``recorder`` collects every call made for this game; ``replay`` maps each
+    role to a ``ReplayProvider`` that replaces the configured one.
+    """
+
+    def __init__(
+        self,
+        *,
+        recorder: Optional[List[Dict[str, Any]]] = None,
+        replay: Optional[Dict[str, ReplayProvider]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.recorder = recorder
+        self.replay = replay
+        super().__init__(**kwargs)
+
+    def _instantiate_provider(self, name: str) -> provider_base.BaseLLMProvider:
+        if self.replay is not None:
+            return self.replay[name]
+        provider = super()._instantiate_provider(name)
+        if self.recorder is not None:
+            provider = RecordingProvider(provider, role=name, calls=self.recorder)
+        return provider
+
+    def _apply_pending_summary(self) -> None:
+        if self._pending_summary is not None:
+            wait([self._pending_summary.future])
+        super()._apply_pending_summary()
+
+    def settle(self) -> None:
+        """Apply the last summary, so it is recorded and part of the final state, and save."""
+        self._apply_pending_summary()
+        self.flush()
+
+
+def load_script(path: Path) -> List[Dict[str, Any]]:
+    games = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, list):
+                entry = {"actions": entry}
+            actions = entry.get("actions")
+            if not isinstance(actions, list) or not all(isinstance(a, str) for a in actions):
+                raise ValueError(f"{path}:{lineno}: expected a list of action strings")
+            games.append({"id": str(entry.get("id", f"game-{len(games) + 1}")), "actions": actions})
+    return games
+
+
+def play_game(
+    config_path: Path,
+    db_path: Path,
+    game: Dict[str, Any],
+    *,
+    provider: Optional[str] = None,
+    record: bool = False,
+    replay_calls: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Play one scripted game; module level so process pools can pickle it."""
+    recorder: Optional[List[Dict[str, Any]]] = [] if record else None
+    replay: Optional[Dict[str, ReplayProvider]] = None
+    if replay_calls is not None:
+        replay = {
+            role: ReplayProvider([call for call in replay_calls if call["role"] == role], role=role)
+            for role in load_config(config_path)["models"]
+        }
+
+    outcome: Dict[str, Any] = {"kind": "game", "id": game["id"], "actions": game["actions"], "turns": []}
+    latencies: List[float] = []
+    start = time.perf_counter()
+    try:
+        engine = SimulatedEngine(
+            recorder=recorder,
+            replay=replay,
+            config_path=config_path,
+            db_path=db_path,
+            provider=provider,
+            slot=f"sim-{game['id']}",
+        )
+        outcome["intro"] = engine.state.log[0].narrator if engine.state.log else ""
+        for action in game["actions"]:
+            turn_start = time.perf_counter()
+            turn: Dict[str, Any] = {"turn": engine.turn + 1, "action": action}
+            try:
+                turn["narration"] = engine.process_turn(action)["narration"]
+            except (ValueError, RuntimeError) as exc:
+                turn["error"] = str(exc)
+            latencies.append(time.perf_counter() - turn_start)
+            outcome["turns"].append(turn)
+        engine.settle()
+        outcome["state_sha256"] = state_digest(engine)
+    except Exception as exc:
+        logger.exception("Game %s failed", game["id"])
+        outcome["error"] = f"{type(exc).__name__}: {exc}"
+    outcome["seconds"] = round(time.perf_counter() - start, 4)
+    outcome["latencies"] = latencies
+    if recorder is not None:
+        outcome["calls"] = recorder
+    if replay is not None:
+        outcome["mismatches"] = replay_mismatches(replay)
+    return outcome
+
+
+def replay_mismatches(replay: Dict[str, ReplayProvider]) -> List[str]:
+    mismatches = [message for provider in replay.values() for message in provider.mismatches]
+    for provider in replay.values():
+        if provider.remaining and not provider.mismatches:
+            mismatches.append(f"{provider.role}: {provider.remaining} recorded calls never made")
+    return mismatches
+
+
+def state_digest(engine: GameEngine) -> str:
+    payload = json.dumps(
+        {"state": engine.state.to_dict(), "summary": engine.summary},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def run_games(
+    config_path: Path,
+    db_path: Path,
+    games: List[Dict[str, Any]],
+    args: argparse.Namespace,
+    *,
+    record: bool = False,
+    recorded: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Tuple[List[Dict[str, Any]], float]:
+    executor: Executor
+    if args.executor == "process":
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="simulate")
+    start = time.perf_counter()
+    with executor:
+        futures = [
+            executor.submit(
+                play_game,
+                config_path,
+                db_path,
+                game,
+                provider=args.provider,
+                record=record,
+                replay_calls=recorded[game["id"]]["calls"] if recorded is not None else None,
+            )
+            for game in games
+        ]
+        outcomes = [future.result() for future in futures]
+    return outcomes, time.perf_counter() - start
+
+
+def compare(recorded: Dict[str, Any], replayed: Dict[str, Any]) -> List[str]:
+    """Differences between a recorded game and its replay."""
+    diffs = list(replayed.get("mismatches", []))
+    if replayed.get("error"):
+        diffs.append(f"replay failed: {replayed['error']}")
+    if recorded.get("intro") != replayed.get("intro"):
+        diffs.append("intro narration differs")
+    for before, after in zip(recorded["turns"], replayed["turns"]):
+        for key in ("narration", "error"):
+            if before.get(key) != after.get(key):
+                diffs.append(f"turn {before['turn']}: {key} differs")
+    if recorded.get("state_sha256") != replayed.get("state_sha256"):
+        diffs.append("final state differs")
+    return diffs
+
+
+def summarize(outcomes: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    latencies = sorted(value for outcome in outcomes for value in outcome["latencies"])
+    calls = [call for outcome in outcomes for call in outcome.get("calls", [])]
+    return {
+        "games": len(outcomes),
+        "failed_games": sum(1 for outcome in outcomes if outcome.get("error")),
+        "turns": len(latencies),
+        "turn_errors": sum(1 for o in outcomes for turn in o["turns"] if "error" in turn),
+        "wall_seconds": round(wall, 3),
+        "throughput_turns_per_s": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p95_ms": _percentile_ms(latencies, 95),
+        "p99_ms": _percentile_ms(latencies, 99),
+        "recorded_calls": len(calls),
+        "prompt_tokens": sum(call["usage"].get("prompt_tokens", 0) for call in calls),
+        "completion_tokens": sum(call["usage"].get("completion_tokens", 0) for call in calls),
+    }
+
+
+def _percentile_ms(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    idx = max(0, math.ceil(pct / 100 * len(values)) - 1)
+    return round(values[idx] * 1000, 2)
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    config_path = args.config.resolve()
+    games = load_script(args.script)
+    if args.repeat > 1:
+        games = [
+            {"id": f"{game['id']}#{n}", "actions": game["actions"]}
+            for game in games
+            for n in range(args.repeat)
+        ]
+    db_path = args.db or Path(tempfile.mkdtemp(prefix="adventure-sim-")) / "simulate.db"
+    outcomes, wall = run_games(config_path, db_path, games, args, record=args.record is not None)
+    report = summarize(outcomes, wall)
+    if args.record is not None:
+        config = load_config(config_path)
+        header = {
+            "kind": "header",
+            "version": RECORDING_VERSION,
+            "game_name": config["game_name"],
+            "config_path": str(config_path),
+            # Snapshot, so replays do not depend on later edits to the file.
+            "config": json.loads(json.dumps(config)),
+            "provider": args.provider,
+        }
+        with open(args.record, "w", encoding="utf-8") as f:
+            for entry in [header, *outcomes]:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        report["recording"] = str(args.record)
+    _print(report, args)
+    return 1 if report["failed_games"] else 0
+
+
+def cmd_replay(args: argparse.Namespace) -> int:
+    with open(args.recording, "r", encoding="utf-8") as f:
+        header, *recorded_games = [json.loads(line) for line in f if line.strip()]
+    if header.get("kind") != "header" or header.get("version") != RECORDING_VERSION:
+        raise SystemExit(f"{args.recording} is not a version {RECORDING_VERSION} recording")
+    work_dir = Path(tempfile.mkdtemp(prefix="adventure-replay-"))
+    if args.config is not None:
+        config_path = args.config.resolve()
+    else:
+        config_path = work_dir / f"{header['game_name']}.yaml"
+        with open(config_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(header["config"], f, allow_unicode=True)
+    recorded = {game["id"]: game for game in recorded_games if "calls" in game}
+    games = [{"id": game["id"], "actions": game["actions"]} for game in recorded.values()]
+
+    outcomes, wall = run_games(config_path, work_dir / "replay.db", games, args, recorded=recorded)
+    report = summarize(outcomes, wall)
+    diverged = {}
+    for outcome in outcomes:
+        diffs = compare(recorded[outcome["id"]], outcome)
+        if diffs:
+            diverged[outcome["id"]] = diffs
+    report["identical_games"] = len(outcomes) - len(diverged)
+    report["diverged_games"] = diverged
+    _print(report, args)
+    return 1 if diverged else 0
+
+
+def _print(report: Dict[str, Any], args: argparse.Namespace) -> None:
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    for key, value in report.items():
+        if key == "diverged_games":
+            print(f"  {key:<24}{len(value)}")
+            for game_id, diffs in value.items():
+                print(f"    {game_id}: {'; '.join(diffs[:5])}")
+        else:
+            print(f"  {key:<24}{value}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="play scripted games, optionally recording them")
+    run.add_argument("config", type=Path)
+    run.add_argument("script", type=Path, help="JSONL, one game's actions per line")
+    run.add_argument("--record", type=Path, help="write prompts, responses and outcomes here")
+    run.add_argument("--repeat", type=int, default=1, help="play each scripted game N times")
+    run.add_argument("--provider", help="replace every role's provider, e.g. 'fake'")
+    run.add_argument("--db", type=Path, help="database to play in (default: a fresh one)")
+    run.set_defaults(handler=cmd_run)
+
+    replay = commands.add_parser("replay", help="replay a recording without calling any model")
+    replay.add_argument("recording", type=Path)
+    replay.add_argument("--config", type=Path, help="replay against this config instead of the snapshot")
+    replay.set_defaults(handler=cmd_replay, provider=None)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    raise SystemExit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
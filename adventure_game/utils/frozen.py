@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+class FrozenDict(dict):
+    """Read-only dict, for configs shared across engines and threads.
+
+    Still a ``dict``, so it serializes and unpacks like one; ``{**frozen}``
+    gives a mutable copy.
+    """
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("this mapping is read-only; copy it with {**mapping} to modify")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly  # type: ignore[assignment]
+    clear = pop = popitem = setdefault = update = _readonly  # type: ignore[assignment]
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        return id(self)
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into ``FrozenDict`` and lists into tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
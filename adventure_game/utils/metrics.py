@@ -0,0 +1,292 @@
+"""Process-wide counters and latency histograms.
+
+Everything lives in ``REGISTRY``; ``REGISTRY.render()`` produces the
+Prometheus text format served at ``/metrics``. ``TurnTrace`` times the stages
+of one turn and emits a per-turn event on the ``adventure_game.events``
+logger, which ``configure_logging(json_logs=True)`` renders as JSON lines.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# Seconds; from sub-millisecond prompt building to slow LLM calls.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger(__name__)
+event_logger = logging.getLogger("adventure_game.events")
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(key)} {_format_value(value)}"
+            for key, value in sorted(self.values().items())
+        ]
+
+
+class Histogram:
+    """Bucketed observations per label set, with running sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelKey, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def totals(self, by: str, **match: Any) -> Dict[str, Tuple[float, int]]:
+        """``(sum, count)`` per value of label ``by`` over series matching ``match``."""
+        wanted = _key(match)
+        out: Dict[str, Tuple[float, int]] = {}
+        with self._lock:
+            for key, (_, total, count) in self._series.items():
+                labels = dict(key)
+                if any(labels.get(name) != value for name, value in wanted):
+                    continue
+                label = labels.get(by, "")
+                prev_total, prev_count = out.get(label, (0.0, 0))
+                out[label] = (prev_total + total, prev_count + count)
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        lines: List[str] = []
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help_text))
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Register a gauge whose value is read at render time (replaces any previous one)."""
+        with self._lock:
+            self._gauges[name] = (help_text, read)
+
+    def reset(self) -> None:
+        """Zero every counter and histogram (used between benchmark runs)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+            gauges = sorted(self._gauges.items())
+        lines: List[str] = []
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} {metric.help_text}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        for name, (help_text, read) in gauges:
+            try:
+                value = read()
+            except Exception:
+                logger.exception("Reading gauge %s failed", name)
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "adventure_stage_seconds", "Time spent in each stage of a turn or intro."
+)
+TURN_SECONDS = REGISTRY.histogram("adventure_turn_seconds", "End-to-end turn and intro latency.")
+TURNS = REGISTRY.counter("adventure_turns_total", "Turns and intros handled, by outcome.")
+
+
+class TurnTrace:
+    """Stage timings of one turn (or intro).
+
+    Use as a context manager around the whole turn and ``trace.stage(name)``
+    around each step. Stages are recorded in ``STAGE_SECONDS`` as they end;
+    on exit the total goes to ``TURN_SECONDS`` and a per-turn event is logged.
+    """
+
+    def __init__(self, kind: str, **fields: Any) -> None:
+        self.kind = kind
+        self.fields = fields
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    def __enter__(self) -> "TurnTrace":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            outcome = "ok"
+        elif issubclass(exc_type, (GeneratorExit, asyncio.CancelledError)):
+            # The client went away before the turn finished.
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        self.finish(outcome)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            STAGE_SECONDS.observe(elapsed, kind=self.kind, stage=name)
+
+    def finish(self, outcome: str) -> None:
+        total = time.perf_counter() - self._start
+        TURN_SECONDS.observe(total, kind=self.kind, outcome=outcome)
+        TURNS.inc(kind=self.kind, outcome=outcome)
+        if not event_logger.isEnabledFor(logging.INFO):
+            return
+        stages_ms = {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+        event_logger.info(
+            "%s %s in %.1f ms (%s)",
+            self.kind,
+            outcome,
+            total * 1000,
+            " ".join(f"{name}={ms}" for name, ms in stages_ms.items()),
+            extra={
+                "event": {
+                    "event": self.kind,
+                    "outcome": outcome,
+                    "total_ms": round(total * 1000, 2),
+                    "stages_ms": stages_ms,
+                    **self.fields,
+                }
+            },
+        )
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line; per-turn events are merged in as fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        event = getattr(record, "event", None)
+        if isinstance(event, dict):
+            payload.update(event)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = "INFO", *, json_logs: bool = False) -> None:
+    """Set up root logging, as plain text or as JSON lines."""
+    if not json_logs:
+        logging.basicConfig(level=level)
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonLogFormatter())
+    logging.basicConfig(level=level, handlers=[handler])
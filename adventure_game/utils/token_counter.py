@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing import Iterable
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Iterable, List, Sequence
 
 
 try:  # pragma: no cover - optional dependency
@@ -9,9 +14,60 @@ except ImportError:  # pragma: no cover - fallback approximation
     tiktoken = None  # type: ignore[assignment]
 
 
-def count_tokens(chunks: Iterable[str], *, model: str = "gpt-4o-mini") -> int:
-    text = "".join(chunks)
+logger = logging.getLogger(__name__)
+
+SEGMENT_CACHE_SIZE = 4096
+
+_segment_counts: "OrderedDict[tuple[str, bytes], int]" = OrderedDict()
+_segment_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> Any:
+    """Process-wide tiktoken encoder, loaded once per model.
+
+    None when tiktoken is missing or its encoding files cannot be fetched
+    (e.g. offline); counts then fall back to the length approximation.
+    """
     if tiktoken is None:
-        return max(1, len(text) // 4)
-    enc = tiktoken.encoding_for_model(model)
-    return len(enc.encode(text))
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as exc:
+        logger.warning("tiktoken encoding for %s unavailable, approximating: %s", model, exc)
+        return None
+
+
+def count_tokens(chunks: Iterable[str], *, model: str = "gpt-4o-mini") -> int:
+    """Count tokens across ``chunks``, memoizing each chunk by content hash.
+
+    Large segments that repeat across turns, such as the system prompt with
+    the hidden lore, are therefore only encoded once.
+    """
+    return sum(count_tokens_batch(list(chunks), model=model))
+
+
+def count_tokens_batch(texts: Sequence[str], *, model: str = "gpt-4o-mini") -> List[int]:
+    """Count tokens for many strings at once; cache misses are encoded together."""
+    enc = get_encoding(model)
+    if enc is None:
+        return [max(1, len(text) // 4) if text else 0 for text in texts]
+
+    keys = [(enc.name, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()) for text in texts]
+    counts: List[int | None] = [None] * len(texts)
+    with _segment_lock:
+        for idx, key in enumerate(keys):
+            if key in _segment_counts:
+                _segment_counts.move_to_end(key)
+                counts[idx] = _segment_counts[key]
+
+    missing = [idx for idx, count in enumerate(counts) if count is None]
+    if missing:
+        encoded = enc.encode_ordinary_batch([texts[idx] for idx in missing])
+        with _segment_lock:
+            for idx, tokens in zip(missing, encoded):
+                counts[idx] = len(tokens)
+                _segment_counts[keys[idx]] = len(tokens)
+            while len(_segment_counts) > SEGMENT_CACHE_SIZE:
+                _segment_counts.popitem(last=False)
+    return counts  # type: ignore[return-value]
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from adventure_game.bench.config import DEFAULT_CONFIG, make_config
+
+
+@pytest.fixture
+def fake_config(tmp_path: Path) -> Path:
+    """The default scenario with every role on the offline ``fake`` provider."""
+    return make_config(DEFAULT_CONFIG, tmp_path)
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    return tmp_path / "game_state.db"
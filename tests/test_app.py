@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import importlib
+import sys
+
+import pytest
+
+from adventure_game.models.db_models import GameStateRepository
+
+
+@pytest.fixture
+def app_module(fake_config, db_path, monkeypatch):
+    monkeypatch.setenv("ADVENTURE_CONFIG", str(fake_config))
+    monkeypatch.setenv("ADVENTURE_CONFIG_DIR", str(fake_config.parent))
+    monkeypatch.setenv("ADVENTURE_DB", str(db_path))
+    sys.modules.pop("adventure_game.app", None)
+    module = importlib.import_module("adventure_game.app")
+    module.app.config["TESTING"] = True
+    yield module
+    module.catalog.stop()
+    sys.modules.pop("adventure_game.app", None)
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def _current_slot(client):
+    with client.session_transaction() as session:
+        return f"{session['game']}:{session['slot']}"
+
+
+def _save_from_other_worker(db_path, slot):
+    other = GameStateRepository(db_path)
+    state, summary = other.load(slot)
+    other.save(slot, game_state=state, summary=summary)
+
+
+def test_stale_turn_answers_409_and_next_turn_recovers(app_module, client, db_path, monkeypatch):
+    assert client.get("/").status_code == 200
+    slot = _current_slot(client)
+    pooled = app_module.engine_pool._get(slot)
+    # Another worker saves after the pool's freshness check, mid-turn.
+    monkeypatch.setattr(pooled, "is_current", lambda: True)
+    _save_from_other_worker(db_path, slot)
+
+    assert client.post("/", data={"player_input": "look around"}).status_code == 409
+    assert app_module.engine_pool._get(slot) is None
+    for _ in range(3):
+        assert client.post("/", data={"player_input": "look around"}).status_code == 200
+
+
+def test_outdated_pooled_engine_is_rebuilt(client, db_path):
+    assert client.get("/").status_code == 200
+    _save_from_other_worker(db_path, _current_slot(client))
+    for _ in range(3):
+        assert client.post("/", data={"player_input": "look around"}).status_code == 200
+
+
+def test_import_starts_no_prewarm_workers(app_module):
+    assert app_module.catalog._prewarm == {}
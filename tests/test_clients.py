@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from adventure_game.core.llm_provider import clients
+from adventure_game.core.llm_provider.factory import build_role_provider
+from adventure_game.core.llm_provider.ollama_llm import OllamaLLM
+
+
+def _pool_size(session) -> int:
+    return session.get_adapter("http://localhost")._pool_maxsize
+
+
+def test_sessions_are_pooled_per_settings():
+    small = clients.ClientSettings(pool_size=2, timeout=5)
+    large = clients.ClientSettings(pool_size=64, timeout=5)
+
+    assert clients.get_http_session("http://h", small) is clients.get_http_session(
+        "http://h", clients.ClientSettings(pool_size=2, timeout=5)
+    )
+    assert _pool_size(clients.get_http_session("http://h", small)) == 2
+    assert _pool_size(clients.get_http_session("http://h", large)) == 64
+
+
+def _ollama_config(pool_size: int):
+    return {
+        "models": {"narrator": {"provider": "ollama", "create_params": {"host": "http://h"}}},
+        "http": {"pool_size": pool_size, "timeout": 7},
+    }
+
+
+def _ollama(provider) -> OllamaLLM:
+    while not isinstance(provider, OllamaLLM):
+        provider = provider.inner
+    return provider
+
+
+def test_configs_with_different_http_blocks_do_not_share_clients(db_path):
+    first = _ollama(build_role_provider(_ollama_config(3), "narrator", db_path=db_path))
+    second = _ollama(build_role_provider(_ollama_config(9), "narrator", db_path=db_path))
+    # Building the second config leaves the first one's settings alone.
+    assert first.http == clients.ClientSettings(pool_size=3, timeout=7)
+    assert second.http == clients.ClientSettings(pool_size=9, timeout=7)
+    assert _pool_size(clients.get_http_session(first.host, first.http)) == 3
+    assert _pool_size(clients.get_http_session(second.host, second.http)) == 9
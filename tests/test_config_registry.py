@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+import yaml
+
+from adventure_game.core.config_registry import (
+    ConfigError,
+    ConfigRegistry,
+    get_config_registry,
+    load_config,
+    validate_config,
+)
+
+
+def _write(path, data):
+    path.write_text(yaml.safe_dump(data))
+    # Make sure the change is visible to an mtime check on coarse filesystems.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_config_is_shared_and_read_only(fake_config):
+    config = load_config(fake_config)
+    assert load_config(fake_config) is config
+    with pytest.raises(TypeError):
+        config["game_name"] = "other"
+    with pytest.raises(TypeError):
+        config["models"]["narrator"]["provider"] = "openai"
+    assert isinstance(config["stats"], tuple)
+    assert {**config}["game_name"] == config["game_name"]
+
+
+def test_edit_is_reloaded_and_bad_edit_keeps_last_good(fake_config):
+    registry = get_config_registry(fake_config.parent)
+    registry.check_seconds = 0
+    first = load_config(fake_config)
+    version = registry.version(fake_config)
+
+    data = yaml.safe_load(fake_config.read_text())
+    _write(fake_config, {**data, "lore_seed": "A new seed."})
+    reloaded = load_config(fake_config)
+    assert reloaded is not first and reloaded["lore_seed"] == "A new seed."
+    assert registry.version(fake_config) == version + 1
+
+    _write(fake_config, {**data, "stats": "health"})
+    assert load_config(fake_config) is reloaded
+    assert registry.version(fake_config) == version + 1
+
+
+def test_games_are_listed_by_name_and_invalid_files_skipped(fake_config, tmp_path):
+    (tmp_path / "broken.yaml").write_text("game_name: [unclosed")
+    registry = ConfigRegistry(tmp_path)
+    name = load_config(fake_config)["game_name"]
+    assert registry.names() == [name]
+    assert registry.path(name) == fake_config.resolve()
+    with pytest.raises(ConfigError):
+        registry.path("missing")
+    with pytest.raises(ConfigError):
+        registry.get(tmp_path / "broken.yaml")
+
+
+def test_validation_reports_every_problem(fake_config):
+    data = yaml.safe_load(fake_config.read_text())
+    data["models"]["narrator"]["colour"] = "blue"
+    data["http"] = {"pool_size": "lots"}
+    data["persistence"]["durability"] = "eventually"
+    del data["models"]["summarizer"]
+    with pytest.raises(ConfigError) as info:
+        validate_config(data)
+    message = str(info.value)
+    for problem in (
+        "unknown key 'models.narrator.colour'",
+        "'http.pool_size' must be int",
+        "'persistence.durability'",
+        "'models.summarizer' is required",
+    ):
+        assert problem in message
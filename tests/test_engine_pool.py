@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import pytest
+
+from adventure_game.core import engine_pool
+from adventure_game.core.engine_pool import EnginePool
+from adventure_game.core.game_engine import GameEngine
+from adventure_game.models.db_models import GameStateRepository, StaleStateError
+
+
+def _save_from_other_worker(db_path, slot):
+    # A repository of its own tracks versions like another process would.
+    other = GameStateRepository(db_path)
+    state, summary = other.load(slot)
+    other.save(slot, game_state=state, summary=summary)
+
+
+@pytest.fixture
+def pool(fake_config, db_path):
+    return EnginePool(lambda slot: GameEngine(config_path=fake_config, db_path=db_path, slot=slot))
+
+
+def test_stale_save_drops_engine_without_leases(pool, db_path):
+    with pool.lease("player") as engine:
+        engine.process_turn("look around")
+        slot = engine.slot
+
+    with pytest.raises(StaleStateError):
+        with pool.lease("player") as engine:
+            _save_from_other_worker(db_path, slot)
+            engine.process_turn("open the door")
+    assert pool.stats()["engines"] == 0
+
+    with pool.lease("player") as engine:
+        engine.process_turn("open the door")
+    assert [entry.player for entry in engine.history()][-2:] == ["look around", "open the door"]
+
+
+def test_outdated_engine_is_rebuilt_without_leases(pool, db_path):
+    with pool.lease("player") as first:
+        first.process_turn("look around")
+    _save_from_other_worker(db_path, first.slot)
+
+    with pool.lease("player") as engine:
+        engine.process_turn("open the door")
+    assert engine is not first
+
+
+def test_engine_size_is_estimated_once_per_turn(pool, monkeypatch):
+    estimates = []
+    real = engine_pool.estimate_engine_bytes
+    monkeypatch.setattr(
+        engine_pool, "estimate_engine_bytes", lambda engine: estimates.append(1) or real(engine)
+    )
+    for _ in range(3):
+        with pool.lease("player"):
+            pass
+    assert len(estimates) == 1
+
+    with pool.lease("player") as engine:
+        engine.process_turn("look around")
+    assert len(estimates) == 2
+    assert pool.stats()["bytes"] == real(engine)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+
+from adventure_game.core.json_repair import loads_lenient
+
+
+def test_truncated_object_is_not_cut_at_inner_brace():
+    payload, repairs = loads_lenient('{"stats":{"health":95},"text":"The long narration trunc')
+    assert payload == {"stats": {"health": 95}, "text": "The long narration trunc"}
+    assert repairs == ["truncated"]
+
+
+def test_prose_around_complete_object_is_trimmed():
+    payload, repairs = loads_lenient('Sure! {"text": "hi", "stats": {"a": {}}} hope that helps')
+    assert payload == {"text": "hi", "stats": {"a": {}}}
+    assert repairs == ["surrounding_text"]
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ('{"text":"x","inventory_add":["Rusty ke', {"text": "x", "inventory_add": []}),
+        ('{"text":"x","inventory_add":["Lamp", "Rusty ke', {"text": "x", "inventory_add": ["Lamp"]}),
+        ('{"text":"x","npc_rel":{"Ana": "fri', {"text": "x", "npc_rel": {}}),
+        ('{"text":"x","world_state":"game_o', {"text": "x"}),
+        ('{"text":"x","inv', {"text": "x"}),
+    ],
+)
+def test_partial_strings_outside_text_are_dropped(raw, expected):
+    payload, repairs = loads_lenient(raw)
+    assert payload == expected
+    assert repairs == ["truncated"]
+
+
+def test_partial_text_is_kept():
+    payload, _ = loads_lenient('{"text": "a \\"quoted\\" wor')
+    assert payload == {"text": 'a "quoted" wor'}
+
+
+def test_valid_json_needs_no_repair():
+    assert loads_lenient('{"text": "hi"}') == ({"text": "hi"}, [])
+
+
+def test_code_fence_and_trailing_commas_are_removed():
+    payload, repairs = loads_lenient('```json\n{"text": "hi", "inventory_add": ["Lamp",],}\n```')
+    assert payload == {"text": "hi", "inventory_add": ["Lamp"]}
+    assert repairs == ["code_fence", "trailing_comma"]
+
+
+def test_truncated_number_is_dropped_not_shortened():
+    payload, repairs = loads_lenient('{"text": "x", "stats": {"health": 9')
+    # "9" may have been "95": the half-written member goes, not a wrong value.
+    assert payload == {"text": "x"}
+    assert repairs == ["truncated"]
+
+
+def test_reply_without_an_object_becomes_narration():
+    assert loads_lenient("The door creaks open.") == ({"text": "The door creaks open."}, ["prose"])
+
+
+@pytest.mark.parametrize("raw", ["", "   ", "```\n```"])
+def test_empty_reply_raises(raw):
+    with pytest.raises(ValueError):
+        loads_lenient(raw)
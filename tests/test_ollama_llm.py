@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from adventure_game.bench.config import DEFAULT_CONFIG, make_config
+from adventure_game.bench.ollama_stub import OllamaStub
+from adventure_game.core.game_engine import GameEngine
+from adventure_game.core.llm_provider.ollama_llm import LineDecoder, OllamaError, OllamaLLM
+
+
+@pytest.fixture
+def stub():
+    with OllamaStub() as server:
+        yield server
+
+
+def _wait_for(stub: OllamaStub, key: str, timeout: float = 5.0) -> int:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not stub.stats()[key]:
+        time.sleep(0.01)
+    return stub.stats()[key]
+
+
+def test_stream_reports_usage_from_done_record(stub):
+    provider = OllamaLLM({"host": stub.url, "model": "stub", "options": {"completion_tokens": 8}})
+    chunks = list(provider.generate_stream(system_prompt="Narrate.", user_prompt="look"))
+    assert "".join(chunk["text"] for chunk in chunks)
+    assert chunks[-1]["usage"]["completion_tokens"] == 8
+    assert stub.stats()["completed"] == 1
+
+
+def test_closing_the_stream_early_aborts_the_request(stub):
+    provider = OllamaLLM(
+        {
+            "host": stub.url,
+            "model": "stub",
+            "options": {"latency_ms": 2000, "first_token_ms": 0, "completion_tokens": 400},
+        }
+    )
+    stream = provider.generate_stream(system_prompt="Narrate.", user_prompt="look")
+    assert next(stream)["text"]
+    stream.close()
+
+    assert _wait_for(stub, "cancelled") == 1
+    assert stub.stats()["completed"] == 0
+
+
+def test_line_decoder_holds_partial_lines():
+    decoder = LineDecoder(max_line_bytes=16)
+    assert decoder.feed(b'{"a":1}\n{"b"') == [b'{"a":1}']
+    assert decoder.feed(b":2}\n\n") == [b'{"b":2}']
+    assert decoder.flush() == []
+    with pytest.raises(OllamaError):
+        decoder.feed(b"x" * 17)
+
+
+def test_conversation_is_threaded_into_the_next_call(stub):
+    provider = OllamaLLM({"host": stub.url, "model": "stub"})
+    first = provider.generate(system_prompt="Narrate.", user_prompt="look")
+    assert first["usage"]["cached_tokens"] == 0
+    assert first["context"] == [
+        {"role": "user", "content": "look"},
+        {"role": "assistant", "content": first["text"]},
+    ]
+
+    second = provider.generate(
+        system_prompt="Narrate.", user_prompt="listen", context=first["context"]
+    )
+    assert stub.requests[-1]["messages"] == [
+        {"role": "system", "content": "Narrate."},
+        *first["context"],
+        {"role": "user", "content": "listen"},
+    ]
+    assert second["usage"]["cached_tokens"] > 0
+    assert second["context"][:2] == first["context"]
+
+
+def test_engine_threads_narrator_conversation(stub, tmp_path, db_path):
+    config_path = make_config(DEFAULT_CONFIG, tmp_path, ollama_host=stub.url)
+    engine = GameEngine(config_path=config_path, db_path=db_path, slot="player")
+    engine.process_turn("look around")
+    engine.process_turn("open the door")
+
+    narrator_calls = [body for body in stub.requests if body["model"] == "narrator"]
+    messages = narrator_calls[-1]["messages"]
+    assert [message["role"] for message in messages] == ["system", "user", "assistant", "user"]
+    # The first turn of the conversation carries the full state, later ones a diff.
+    assert "\nCurrent state: " in messages[1]["content"]
+    assert "\nState changes since last turn: " in messages[3]["content"]
+    assert engine.cached_tokens > 0
+    assert len(engine.narrator_context) == 4
+
+
+def test_async_stream_threads_the_conversation(stub):
+    pytest.importorskip("httpx")
+    provider = OllamaLLM({"host": stub.url, "model": "stub", "options": {"completion_tokens": 8}})
+
+    async def collect(**kwargs):
+        return [c async for c in provider.agenerate_stream(system_prompt="Narrate.", **kwargs)]
+
+    chunks = asyncio.run(collect(user_prompt="look"))
+    text = "".join(chunk["text"] for chunk in chunks)
+    assert chunks[-1]["usage"]["completion_tokens"] == 8
+    assert chunks[-1]["context"] == [
+        {"role": "user", "content": "look"},
+        {"role": "assistant", "content": text},
+    ]
+    second = asyncio.run(
+        provider.agenerate(
+            system_prompt="Narrate.", user_prompt="listen", context=chunks[-1]["context"]
+        )
+    )
+    assert second["usage"]["cached_tokens"] > 0
+
+
+def test_async_turn_completes_off_the_event_loop(stub, tmp_path, db_path, monkeypatch):
+    pytest.importorskip("httpx")
+    config_path = make_config(DEFAULT_CONFIG, tmp_path, ollama_host=stub.url)
+    engine = GameEngine(config_path=config_path, db_path=db_path, slot="player")
+    persisted_on = []
+    persist = engine._persist
+    monkeypatch.setattr(
+        engine, "_persist", lambda: persisted_on.append(threading.get_ident()) or persist()
+    )
+
+    async def play():
+        result = await engine.aprocess_turn("look around")
+        return result, threading.get_ident()
+
+    result, loop_thread = asyncio.run(play())
+    assert result["narration"]
+    assert persisted_on and loop_thread not in persisted_on
+    assert [entry.player for entry in engine.history()][-1] == "look around"
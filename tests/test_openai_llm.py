@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from adventure_game.core.llm_provider import clients
+from adventure_game.core.llm_provider.openai_llm import OpenAILLM
+
+
+class FakeStream:
+    def __init__(self, deltas):
+        self.chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=d))], usage=None)
+            for d in deltas
+        ]
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    stream = FakeStream(["The ", "door ", "opens."])
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: stream))
+    )
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(clients, "get_openai_client", lambda **kwargs: client)
+    return stream
+
+
+def test_stream_is_closed_when_consumer_stops_early(stream):
+    provider = OpenAILLM({"model": "gpt-test"})
+    chunks = provider.generate_stream(system_prompt="Narrate.", user_prompt="look")
+    assert next(chunks)["text"] == "The "
+    chunks.close()
+    assert stream.closed
+
+
+def test_stream_is_closed_after_the_last_chunk(stream):
+    provider = OpenAILLM({"model": "gpt-test"})
+    text = "".join(c["text"] for c in provider.generate_stream(system_prompt="s", user_prompt="u"))
+    assert text == "The door opens."
+    assert stream.closed
+
+
+class FakeAsyncStream(FakeStream):
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+
+def test_async_stream_yields_deltas_and_closes(monkeypatch):
+    stream = FakeAsyncStream(["The ", "door ", "opens."])
+    requests = []
+
+    async def create(**kwargs):
+        requests.append(kwargs)
+        return stream
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(clients, "get_openai_client", lambda **kwargs: None)
+    monkeypatch.setattr(clients, "get_async_openai_client", lambda **kwargs: client)
+    provider = OpenAILLM({"model": "gpt-test"})
+
+    async def collect():
+        return [c["text"] async for c in provider.agenerate_stream(system_prompt="s", user_prompt="u")]
+
+    assert "".join(asyncio.run(collect())) == "The door opens."
+    assert stream.closed
+    assert requests[0]["stream"] is True
+    assert requests[0]["messages"][-1] == {"role": "user", "content": "u"}
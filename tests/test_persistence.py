@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from adventure_game.core.game_engine import GameEngine
+from adventure_game.models import db_models
+from adventure_game.models.db_models import GameStateRepository, StaleStateError, transaction
+from adventure_game.models.persistence import WriteBehindPersister, delete_slot
+from adventure_game.models.state import GameState
+
+
+def _stored_turns(db_path, slot):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT turn FROM turn_log WHERE slot = ? ORDER BY turn", (slot,))]
+    finally:
+        conn.close()
+
+
+def test_reset_then_new_game_keeps_its_turns(fake_config, db_path):
+    engine = GameEngine(config_path=fake_config, db_path=db_path, slot="player")
+    for action in ("look around", "open the door", "walk north"):
+        engine.process_turn(action)
+    assert _stored_turns(db_path, engine.slot) == [0, 1, 2, 3]
+
+    delete_slot(db_path, engine.slot)
+    engine = GameEngine(config_path=fake_config, db_path=db_path, slot="player")
+    engine.process_turn("wait")
+    engine.process_turn("listen")
+    assert _stored_turns(db_path, engine.slot) == [0, 1, 2]
+
+    replayed = GameEngine(config_path=fake_config, db_path=db_path, slot="player")
+    assert [entry.turn for entry in replayed.state.log] == [0, 1, 2]
+    assert [entry.player for entry in replayed.history()] == ["", "wait", "listen"]
+
+
+class _FailingCommit:
+    """Connection stand-in whose COMMIT fails, as it does when the database is busy."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT":
+            raise sqlite3.OperationalError("database is locked")
+        return self.conn.execute(sql, *args)
+
+
+def test_failed_commit_rolls_back(db_path):
+    shared = db_models._shared(db_path)
+    conn = shared.conn
+    shared.conn = _FailingCommit(conn)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            with transaction(db_path) as tx:
+                tx.execute("CREATE TABLE scratch (x)")
+    finally:
+        shared.conn = conn
+    assert not conn.in_transaction
+    with transaction(db_path) as tx:
+        assert not tx.execute("SELECT name FROM sqlite_master WHERE name = 'scratch'").fetchall()
+
+
+def test_background_stale_flush_fails_the_next_save(db_path):
+    persister = WriteBehindPersister(GameStateRepository(db_path), flush_interval=3600)
+    try:
+        state = GameState.new(["health"])
+        persister.save("slot", game_state=state, summary=None)
+        persister.flush()
+        # Another worker writes the slot while our next save is still queued.
+        other = GameStateRepository(db_path)
+        other.load("slot")
+        other.save("slot", game_state=state, summary=None)
+        persister.save("slot", game_state=state, summary=None)
+        persister._wake.set()
+        for _ in range(500):
+            if persister._stale:
+                break
+            persister._stop.wait(0.01)
+
+        with pytest.raises(StaleStateError):
+            persister.save("slot", game_state=state, summary=None)
+        # Reported once; the game carries on after reloading.
+        persister.load("slot")
+        persister.save("slot", game_state=state, summary=None)
+        persister.flush()
+    finally:
+        persister.close()
+
+
+def _add_items(db_path, worker, count):
+    """Append ``count`` items to the shared slot, retrying on lost races."""
+    repository = GameStateRepository(db_path)
+    added = 0
+    while added < count:
+        loaded = repository.load("shared")
+        state = loaded[0] if loaded else GameState.new(["health"])
+        state.inventory.append(f"{worker}-{added}")
+        try:
+            repository.save("shared", game_state=state, summary=None)
+        except StaleStateError:
+            continue
+        added += 1
+
+
+def test_two_processes_share_one_database(db_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_add_items, args=(db_path, name, 20)) for name in "ab"]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    assert [worker.exitcode for worker in workers] == [0, 0]
+
+    state, _ = GameStateRepository(db_path).load("shared")
+    # Every save was either applied on top of the other's or retried.
+    assert sorted(state.inventory) == sorted(f"{w}-{i}" for w in "ab" for i in range(20))
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+
+import yaml
+
+from adventure_game.core.config_registry import get_config_registry, load_config
+from adventure_game.core.prewarm import PrewarmWorker, config_version
+
+
+def _edit_config(path, **changes):
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    data.update(changes)
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reloaded_config_reaches_prewarm_and_drops_old_bundles(fake_config, db_path):
+    get_config_registry(fake_config.parent).check_seconds = 0
+    worker = PrewarmWorker(
+        config=load_config(fake_config), db_path=db_path, depth=2, config_path=fake_config
+    )
+    worker.repository.push(worker.game_name, worker.build_bundle())
+    worker.repository.push(worker.game_name, worker.build_bundle())
+
+    _edit_config(fake_config, lore_seed="A reloaded seed.")
+    current = load_config(fake_config)
+    assert current["lore_seed"] == "A reloaded seed."
+
+    # Both queued bundles predate the reload.
+    assert worker.pop() is None
+    assert worker.repository.count(worker.game_name) == 0
+
+    bundle = worker.build_bundle()
+    assert worker.config is current
+    assert bundle["config_version"] == config_version(current)
+    worker.repository.push(worker.game_name, bundle)
+    assert worker.pop() == bundle
+
+
+def test_bundle_is_not_stored_when_lore_generation_fails(fake_config, db_path):
+    data = yaml.safe_load(fake_config.read_text())
+    data["models"]["lore_generator"]["create_params"]["failure_rate"] = 1.0
+    fake_config.write_text(yaml.safe_dump(data))
+    worker = PrewarmWorker(config=load_config(fake_config), db_path=db_path, depth=1)
+    worker._in_flight = 1
+
+    worker._fill_one()
+    assert worker.repository.count(worker.game_name) == 0
+    assert worker._in_flight == 0
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from adventure_game.core import prompts
+
+
+def test_diff_state_keeps_only_changed_fields():
+    previous = {"stats": {"health": 90}, "inventory": ["key"], "npc_rel": {}}
+    current = {"stats": {"health": 80}, "inventory": ["key"], "npc_rel": {}}
+    assert prompts.diff_state(previous, current) == {"stats": {"health": 80}}
+    assert prompts.diff_state(current, current) == {}
+
+
+def test_user_prompt_labels_a_diff():
+    kwargs = dict(
+        player_input="look", game_state={"stats": {"health": 80}}, log_history=[], summary=None
+    )
+    assert 'Current state: {"stats":{"health":80}}' in prompts.build_user_prompt(**kwargs)
+    assert "State changes since last turn: " in prompts.build_user_prompt(**kwargs, changes_only=True)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+
+from adventure_game.core.llm_provider.base import (
+    BaseLLMProvider,
+    LLMContext,
+    LLMResponse,
+    register_provider,
+)
+from adventure_game.core.llm_provider.factory import build_role_provider
+
+GOOD = '{"text": "The door creaks open.", "stats": {}}'
+BROKEN = '{"text": "", "stats": {"health": -5}}'
+
+
+@register_provider("scripted")
+class ScriptedLLM(BaseLLMProvider):
+    """Returns ``replies`` in order and counts the calls that reached it."""
+
+    replies: List[str] = []
+    calls = 0
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        type(self).calls += 1
+        return LLMResponse(text=self.replies.pop(0), usage={"total_tokens": 10})
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        response = self.generate(system_prompt=system_prompt, user_prompt=user_prompt)
+        text = response["text"]
+        yield LLMResponse(text=text[:10], usage={})
+        yield LLMResponse(text=text[10:], usage=response["usage"])
+
+
+@pytest.fixture
+def scripted():
+    ScriptedLLM.calls = 0
+    yield ScriptedLLM
+    ScriptedLLM.replies = []
+
+
+def _provider(role: str, db_path) -> BaseLLMProvider:
+    config: Dict[str, Any] = {
+        "models": {role: {"provider": "scripted", "create_params": {}, "cache": {"enabled": True}}}
+    }
+    return build_role_provider(config, role, db_path=db_path)
+
+
+def _call(provider: BaseLLMProvider, stream: bool) -> str:
+    if stream:
+        return "".join(c["text"] for c in provider.generate_stream(system_prompt="s", user_prompt="u"))
+    return provider.generate(system_prompt="s", user_prompt="u")["text"]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_unparseable_narration_is_not_replayed_from_cache(scripted, db_path, stream):
+    scripted.replies = [BROKEN, GOOD]
+    narrator = _provider("narrator", db_path)
+
+    assert _call(narrator, stream) == BROKEN
+    assert _call(narrator, stream) == GOOD
+    # The parseable reply is cached; the retry above was not served the broken one.
+    assert _call(narrator, stream) == GOOD
+    assert scripted.calls == 2
+
+
+def test_other_roles_cache_plain_text(scripted, db_path):
+    scripted.replies = [BROKEN]
+    summarizer = _provider("summarizer", db_path)
+
+    assert _call(summarizer, False) == BROKEN
+    assert _call(summarizer, False) == BROKEN
+    assert scripted.calls == 1
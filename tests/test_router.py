@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+
+import pytest
+import yaml
+
+from adventure_game.core.config_registry import ConfigError, validate_config
+from adventure_game.core.llm_provider.base import BaseLLMProvider, LLMContext, LLMResponse
+from adventure_game.core.llm_provider.router import CircuitBreaker, ProviderRouter, RouteMember
+
+
+class ThreadLLM(BaseLLMProvider):
+    """Streams its name after ``delay`` seconds, recording the calling thread."""
+
+    def __init__(self, name: str, *, delay: float = 0.0, fail: bool = False) -> None:
+        super().__init__({})
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.threads: List[int] = []
+
+    def generate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> LLMResponse:
+        return list(self.generate_stream(system_prompt=system_prompt, user_prompt=user_prompt))[-1]
+
+    def generate_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        context: Optional[LLMContext] = None,
+    ) -> Iterator[LLMResponse]:
+        self.threads.append(threading.get_ident())
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        yield LLMResponse(text=self.name, usage={})
+
+
+def _router(*providers: ThreadLLM, **kwargs: Any) -> ProviderRouter:
+    members = [RouteMember(p.name, p, CircuitBreaker()) for p in providers]
+    return ProviderRouter(members, **kwargs)
+
+
+def _text(router: ProviderRouter) -> str:
+    return "".join(c["text"] for c in router.generate_stream(system_prompt="s", user_prompt="u"))
+
+
+def test_failover_runs_on_the_callers_thread():
+    primary, backup = ThreadLLM("primary", fail=True), ThreadLLM("backup")
+    router = _router(primary, backup)
+
+    assert _text(router) == "backup"
+    assert primary.threads == backup.threads == [threading.get_ident()]
+    assert router.stats["failovers"] == 1
+    assert router._executor is None
+
+
+def test_failover_raises_the_last_error_when_every_provider_fails():
+    router = _router(ThreadLLM("a", fail=True), ThreadLLM("b", fail=True))
+    with pytest.raises(RuntimeError, match="b is down"):
+        _text(router)
+
+
+class MidStreamFailure(ThreadLLM):
+    def generate_stream(self, **kwargs: Any) -> Iterator[LLMResponse]:
+        yield LLMResponse(text="The door", usage={})
+        raise RuntimeError("connection reset")
+
+
+def test_failure_after_output_is_not_retried_elsewhere():
+    backup = ThreadLLM("backup")
+    router = _router(MidStreamFailure("primary"), backup)
+    chunks = router.generate_stream(system_prompt="s", user_prompt="u")
+    assert next(chunks)["text"] == "The door"
+    with pytest.raises(RuntimeError, match="connection reset"):
+        next(chunks)
+    assert backup.threads == []
+
+
+def test_open_breaker_skips_the_failing_provider():
+    primary, backup = ThreadLLM("primary", fail=True), ThreadLLM("backup")
+    members = [
+        RouteMember("primary", primary, CircuitBreaker(failure_threshold=1, cooldown_seconds=60)),
+        RouteMember("backup", backup, CircuitBreaker()),
+    ]
+    router = ProviderRouter(members)
+    assert _text(router) == _text(router) == "backup"
+    # The second call went straight to the backup.
+    assert len(primary.threads) == 1 and len(backup.threads) == 2
+    assert members[0].breaker.state == "open"
+
+
+def test_hedge_races_on_the_routers_pool():
+    slow, fast = ThreadLLM("slow", delay=0.5), ThreadLLM("fast")
+    router = _router(slow, fast, policy="hedge", hedge_delay_ms=20, max_workers=2)
+
+    assert _text(router) == "fast"
+    assert router.stats["hedges"] == 1
+    assert router._executor is not None and router._executor._max_workers == 2
+    assert threading.get_ident() not in slow.threads + fast.threads
+
+
+def test_routing_max_workers_is_validated(fake_config):
+    config = yaml.safe_load(fake_config.read_text())
+    routing = config["models"]["narrator"].setdefault("routing", {})
+
+    routing.update(policy="hedge", max_workers=4)
+    validate_config(config)
+    for bad in (0, "many"):
+        routing["max_workers"] = bad
+        with pytest.raises(ConfigError, match="max_workers"):
+            validate_config(config)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+
+from adventure_game.core.stream_parser import NarrationTextStream
+
+
+def _feed_all(chunks):
+    stream = NarrationTextStream()
+    return "".join(stream.feed(chunk) for chunk in chunks)
+
+
+def test_escapes_split_across_chunks_are_decoded():
+    chunks = ['{"stats": {"text": "x"}, "text": "Caf', "\\u00", "e9 \\ud83d", "\\udd25 ", 'done", "x": 1}']
+    assert _feed_all(chunks) == "Café \U0001f525 done"
+
+
+@pytest.mark.parametrize(
+    "bad",
+    ["\\uZZZZ", "\\u12G4", "\\ud83d\\u0041", "\\ud83dxxxxxx", "\\udd25"],
+)
+def test_invalid_unicode_escape_stops_streaming(bad):
+    stream = NarrationTextStream()
+    assert stream.feed('{"text": "Before ') == "Before "
+    assert stream.feed(bad + ' after", "stats": {}}') == ""
+    assert stream.feed(" more") == ""
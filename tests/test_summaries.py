@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import pytest
+import yaml
+
+from adventure_game.core.game_engine import GameEngine
+from adventure_game.core.summarizer import LogSummarizer, empty_summary_tree
+from adventure_game.models.state import TurnLogEntry
+
+
+def _set_history_cap(config_path, cap):
+    with open(config_path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    data["history"] = {**(data.get("history") or {}), "max_in_memory": cap}
+    # Short turns never get near this budget.
+    data["models"]["narrator"]["context_budget"] = 1_000_000
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f)
+
+
+def test_log_cap_summarizes_instead_of_dropping_turns(fake_config, db_path):
+    _set_history_cap(fake_config, 8)
+    engine = GameEngine(config_path=fake_config, db_path=db_path, slot="player")
+    for turn in range(30):
+        engine.process_turn(f"step {turn}")
+        if engine._pending_summary is not None:
+            engine._pending_summary.future.result()
+
+        covered = (engine.state.summary_tree or {}).get("through_turn", 0)
+        turns = [entry.turn for entry in engine.state.log]
+        # Every turn is either in the summary or still in the log.
+        assert turns[0] <= covered + 1
+        assert turns == list(range(turns[0], engine.turn + 1))
+
+    assert engine.summary_metrics["submitted"] >= 3
+    assert engine.summary
+    assert len(engine.state.log) <= 8 + 2
+
+
+class FailingProvider:
+    def generate(self, *, system_prompt, user_prompt, context=None):
+        raise RuntimeError("provider unavailable")
+
+
+def test_failed_summary_keeps_recap_and_turns(fake_config, db_path):
+    tree = {**empty_summary_tree(), "current": "The story so far.", "through_turn": 2}
+    with pytest.raises(RuntimeError):
+        LogSummarizer(FailingProvider()).summarize(
+            [TurnLogEntry(turn=3, player="look", narrator="Dust.")], tree
+        )
+    assert tree["current"] == "The story so far." and tree["through_turn"] == 2
+
+    _set_history_cap(fake_config, 6)
+    engine = GameEngine(config_path=fake_config, db_path=db_path, slot="player")
+    engine.summarizer.provider = FailingProvider()
+    for turn in range(7):
+        engine.process_turn(f"step {turn}")
+        if engine._pending_summary is not None:
+            engine._pending_summary.future.exception()
+
+    assert engine.summary_metrics["failed"] >= 1
+    assert engine.summary is None
+    # Nothing past the intro was summarized, so no played turn may leave the log.
+    assert [entry.turn for entry in engine.state.log][-engine.turn :] == list(range(1, engine.turn + 1))
+
+
+class RecordingSummaries:
+    """Answers every call with a numbered recap and keeps the prompts."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, *, system_prompt, user_prompt, context=None):
+        self.prompts.append(user_prompt)
+        return {"text": f"recap {len(self.prompts)}", "usage": {}}
+
+
+def _turns(first, last):
+    return [
+        TurnLogEntry(turn=turn, player=f"act {turn}", narrator=f"result {turn}")
+        for turn in range(first, last + 1)
+    ]
+
+
+def test_incremental_summary_sends_only_unseen_turns():
+    provider = RecordingSummaries()
+    summarizer = LogSummarizer(provider)
+    tree = summarizer.summarize(_turns(1, 3))
+    assert tree["current"] == "recap 1" and tree["through_turn"] == 3
+
+    # The log still holds turns 2-3; only 4-5 are new.
+    tree = summarizer.summarize(_turns(2, 5), tree)
+    assert tree["current"] == "recap 2" and tree["through_turn"] == 5
+    assert provider.prompts[1].startswith("Previous recap: recap 1")
+    assert "act 4" in provider.prompts[1] and "act 3" not in provider.prompts[1]
+    assert summarizer.summarize(_turns(4, 5), tree) == tree
+    assert len(provider.prompts) == 2
+
+
+def test_chapters_are_sealed_and_folded_into_an_arc():
+    provider = RecordingSummaries()
+    summarizer = LogSummarizer(provider, chapter_turns=2, max_chapters=2)
+    tree = None
+    for last in (2, 4, 6):
+        tree = summarizer.summarize(_turns(last - 1, last), tree)
+    # The third chapter pushed past max_chapters: all three became the arc.
+    assert tree["chapters"] == [] and tree["current"] is None
+    assert tree["arc"] == "recap 4"
+    assert provider.prompts[-1].splitlines() == [
+        "Chapter 1: recap 1",
+        "Chapter 2: recap 2",
+        "Chapter 3: recap 3",
+    ]
+
+
+def test_should_summarize_needs_min_turns_and_a_full_budget_or_log():
+    summarizer = LogSummarizer(RecordingSummaries(), min_turns=3)
+    assert not summarizer.should_summarize(prompt_tokens=900, budget=1000, turn_count=10)
+    assert not summarizer.should_summarize(prompt_tokens=1000, budget=1000, turn_count=2)
+    assert summarizer.should_summarize(prompt_tokens=1000, budget=1000, turn_count=3)
+    assert summarizer.should_summarize(prompt_tokens=10, budget=1000, turn_count=8, max_turns=8)